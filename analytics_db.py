@@ -0,0 +1,752 @@
+"""SQLite bookkeeping shared by app.py and scripts/clean_and_reseed.py.
+
+Only the standard library is used here so the web app can import it without
+the data-cleaning dependencies.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from quantile_sketch import QuantileSketch
+
+# Counters bumped whenever the data behind cached results changes
+CONTENT_VERSION = "content"
+VERSIONED_TABLES = ("report_queries", "report_templates")
+# One counter for the dimension tables cached by the web app; bump it with every
+# write to DIMENSION_TABLES, in the same transaction
+DIMENSIONS_VERSION = "dimensions"
+DIMENSION_TABLES = ("Country", "Author")
+
+
+def init_data_versions_table(conn: sqlite3.Connection, tables: Iterable[str] = VERSIONED_TABLES) -> None:
+    """Create data_versions plus triggers that bump a counter per table on every write."""
+    with conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS data_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        conn.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES (?, 0)", (CONTENT_VERSION,))
+        for table in tables:
+            conn.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES (?, 0)", (table,))
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(
+                    f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE data_versions SET version = version + 1 WHERE name = '{table}';
+                    END
+                    """
+                )
+
+
+def init_dimensions_version(conn: sqlite3.Connection, tables: Iterable[str] = DIMENSION_TABLES) -> None:
+    """Create the `dimensions` counter; writers to Country / Author bump it explicitly.
+
+    Also drops the per-row triggers that used to bump it: they slowed bulk loads
+    and kept SQLite from truncating the tables on an unfiltered DELETE.
+    """
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES (?, 0)", (DIMENSIONS_VERSION,))
+        for table in tables:
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {table}_{DIMENSIONS_VERSION}_{event.lower()}")
+
+
+def read_data_version(conn: sqlite3.Connection, name: str) -> Optional[int]:
+    try:
+        row = conn.execute("SELECT version FROM data_versions WHERE name=?", (name,)).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def read_data_versions(conn: sqlite3.Connection) -> Dict[str, int]:
+    try:
+        return {row[0]: row[1] for row in conn.execute("SELECT name, version FROM data_versions")}
+    except sqlite3.Error:
+        return {}
+
+
+def bump_data_version(conn: sqlite3.Connection, name: str = CONTENT_VERSION) -> None:
+    """Increment a counter inside the caller's transaction (no commit here)."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    conn.execute(
+        "INSERT INTO data_versions (name, version) VALUES (?, 1) "
+        "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+        (name,),
+    )
+
+
+def mark_version_synced(conn: sqlite3.Connection, name: str, source: str = CONTENT_VERSION) -> None:
+    """Record that `name` reflects the current value of the `source` counter."""
+    conn.execute(
+        "INSERT INTO data_versions (name, version) "
+        "VALUES (?, COALESCE((SELECT version FROM data_versions WHERE name = ?), 0)) "
+        "ON CONFLICT(name) DO UPDATE SET version = excluded.version",
+        (name, source),
+    )
+
+
+def version_synced(conn: sqlite3.Connection, name: str, source: str = CONTENT_VERSION) -> bool:
+    versions = read_data_versions(conn)
+    return name in versions and versions[name] == versions.get(source, 0)
+
+
+# ---------------------------------------------------------------------------
+# Monthly rollups of the Content fact table
+# ---------------------------------------------------------------------------
+ROLLUPS_VERSION = "rollups"
+ROLLUP_SUFFIX = "_rollup"
+
+INTEGER_MEASURES = ("views", "likes", "comments", "shares", "interactions")
+RATE_MEASURES = ("engagement_rate", "engagement_per_1k", "completion_rate")
+# Measures computed per row rather than read from a Content column. "interactions"
+# is the likes + comments + shares total the reports rank by, NULL when any term is
+# (the CSV engagement_total column is not guaranteed to equal it).
+DERIVED_MEASURES = {"interactions": "c.likes + c.comments + c.shares"}
+
+# Each measure is kept as SUM + non-null COUNT so AVG() can be reproduced exactly;
+# "extremes" additionally keep MIN/MAX. Dimensions map to expressions over
+# Content c / Author a / Device d.
+ROLLUP_TABLES = {
+    "content_rollup_monthly": {
+        "dims": (
+            ("platform", "c.platform"),
+            ("year_month", "c.year_month"),
+            ("country_id", "c.country_id"),
+            ("category", "c.category"),
+            ("creator_tier", "a.creator_tier"),
+            ("upload_hour", "d.upload_hour"),
+        ),
+        "measures": INTEGER_MEASURES + RATE_MEASURES,
+        "extremes": ("engagement_rate",),
+    },
+    "content_rollup_hashtag": {
+        "dims": (
+            ("platform", "c.platform"),
+            ("year_month", "c.year_month"),
+            ("country_id", "c.country_id"),
+            ("hashtag", "c.hashtag"),
+        ),
+        "measures": ("views",),
+        "extremes": (),
+    },
+    # Publish-timing cube: every /api/publish-timing-analysis mode folds these cells
+    "content_rollup_timing": {
+        "dims": (
+            ("platform", "c.platform"),
+            ("year_month", "c.year_month"),
+            ("upload_hour", "d.upload_hour"),
+            ("publish_period", "c.publish_period"),
+            ("publish_dayofweek", "c.publish_dayofweek"),
+        ),
+        "measures": ("views", "engagement_rate", "completion_rate"),
+        "extremes": ("engagement_rate",),
+    },
+}
+
+ROLLUP_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_rollup_monthly_cell ON content_rollup_monthly "
+    "(platform, year_month, country_id, category, creator_tier, upload_hour)",
+    "CREATE INDEX IF NOT EXISTS idx_rollup_monthly_country ON content_rollup_monthly (country_id, platform)",
+    "CREATE INDEX IF NOT EXISTS idx_rollup_hashtag_cell ON content_rollup_hashtag (platform, year_month, country_id, hashtag)",
+    "CREATE INDEX IF NOT EXISTS idx_rollup_hashtag_country ON content_rollup_hashtag (platform, country_id)",
+    "CREATE INDEX IF NOT EXISTS idx_rollup_timing_cell ON content_rollup_timing "
+    "(platform, year_month, upload_hour, publish_period, publish_dayofweek)",
+)
+
+# Quantile sketches per (platform, country, month), one BLOB per metric. They are
+# rebuilt and patched together with the rollups, so rollups_current() covers them.
+SKETCH_TABLE = "content_sketch_monthly"
+SKETCH_DIMS = ("platform", "country_id", "year_month")
+SKETCH_METRICS = ("engagement_rate", "completion_rate", "engagement_per_1k")
+
+_ROLLUP_SOURCE = """
+    FROM Content c
+    LEFT JOIN Author a ON c.author_id = a.author_id
+    LEFT JOIN Device d ON c.device_id = d.device_id
+"""
+
+
+def _rollup_columns(spec) -> List[Tuple[str, str, str]]:
+    """(column, SQL type, aggregate expression over the source rows) for each measure column."""
+    cols = [("n", "INTEGER NOT NULL DEFAULT 0", "COUNT(*)")]
+    for m in spec["measures"]:
+        sql_type = "INTEGER" if m in INTEGER_MEASURES else "REAL"
+        expr = DERIVED_MEASURES.get(m, f"c.{m}")
+        cols.append((f"{m}_sum", f"{sql_type} NOT NULL DEFAULT 0", f"COALESCE(SUM({expr}), 0)"))
+        cols.append((f"{m}_n", "INTEGER NOT NULL DEFAULT 0", f"COUNT({expr})"))
+    for m in spec["extremes"]:
+        cols.append((f"{m}_min", "REAL", f"MIN(c.{m})"))
+        cols.append((f"{m}_max", "REAL", f"MAX(c.{m})"))
+    return cols
+
+
+def create_rollup_tables(conn: sqlite3.Connection) -> None:
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table, spec in ROLLUP_TABLES.items():
+        columns = [name for name, _ in spec["dims"]] + [name for name, _, _ in _rollup_columns(spec)]
+        # A table built with an older set of measures is dropped and refilled below
+        if table in existing and [row[1] for row in conn.execute(f"PRAGMA table_info({table})")] != columns:
+            conn.execute(f"DROP TABLE {table}")
+            existing.discard(table)
+        column_defs = [name for name, _ in spec["dims"]]
+        column_defs += [f"{name} {sql_type}" for name, sql_type, _ in _rollup_columns(spec)]
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(column_defs)})")
+    for ddl in ROLLUP_INDEXES:
+        conn.execute(ddl)
+    # A rollup table added after the others were built starts empty: fill it so they stay current together
+    if rollups_current(conn):
+        for table, spec in ROLLUP_TABLES.items():
+            if table not in existing:
+                _rebuild_rollup_table(conn, table, spec)
+    sketch_columns = [f"{m}_sketch BLOB" for m in SKETCH_METRICS]
+    sketches_exist = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SKETCH_TABLE,)
+    ).fetchone()
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {SKETCH_TABLE} "
+        f"({', '.join(SKETCH_DIMS)}, n INTEGER NOT NULL DEFAULT 0, {', '.join(sketch_columns)})"
+    )
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_sketch_cell ON {SKETCH_TABLE} (platform, year_month, country_id)")
+    # Rollups built before the sketches existed would otherwise count as current with no sketches
+    if not sketches_exist and rollups_current(conn):
+        rebuild_sketches(conn)
+
+
+def _rollup_select(spec) -> Tuple[List[str], str]:
+    dim_exprs = [expr for _, expr in spec["dims"]]
+    agg_exprs = [agg for _, _, agg in _rollup_columns(spec)]
+    return dim_exprs, f"SELECT {', '.join(dim_exprs + agg_exprs)} {_ROLLUP_SOURCE}"
+
+
+def _rebuild_rollup_table(conn: sqlite3.Connection, table: str, spec) -> int:
+    columns = [name for name, _ in spec["dims"]] + [name for name, _, _ in _rollup_columns(spec)]
+    dim_exprs, select = _rollup_select(spec)
+    conn.execute(f"DELETE FROM {table}")
+    conn.execute(
+        f"INSERT INTO {table} ({', '.join(columns)}) {select} GROUP BY {', '.join(dim_exprs)}"
+    )
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def rebuild_rollups(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Recompute every rollup table from Content in one GROUP BY pass each."""
+    create_rollup_tables(conn)
+    counts = {}
+    for table, spec in ROLLUP_TABLES.items():
+        counts[table] = _rebuild_rollup_table(conn, table, spec)
+    counts[SKETCH_TABLE] = rebuild_sketches(conn)
+    mark_version_synced(conn, ROLLUPS_VERSION)
+    return counts
+
+
+def rollups_current(conn: sqlite3.Connection) -> bool:
+    """True when the rollups were built (and since maintained) for the current content version."""
+    return version_synced(conn, ROLLUPS_VERSION)
+
+
+def _chunks(values: Sequence, size: int = 500):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def apply_rollup_delta(conn: sqlite3.Connection, content_ids: Sequence[str], sign: int) -> None:
+    """Add (sign=1) or subtract (sign=-1) the current Content rows for `content_ids`."""
+    ids = [cid for cid in content_ids if cid is not None]
+    for table, spec in ROLLUP_TABLES.items():
+        dim_cols = [name for name, _ in spec["dims"]]
+        measure_cols = [name for name, _, _ in _rollup_columns(spec)]
+        dim_exprs, select = _rollup_select(spec)
+        for chunk in _chunks(ids):
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"{select} WHERE c.content_id IN ({placeholders}) GROUP BY {', '.join(dim_exprs)}",
+                chunk,
+            ).fetchall()
+            for row in rows:
+                cell = list(row[:len(dim_cols)])
+                delta = dict(zip(measure_cols, row[len(dim_cols):]))
+                if sign > 0:
+                    _add_to_cell(conn, table, spec, dim_cols, cell, delta)
+                else:
+                    _subtract_from_cell(conn, table, spec, dim_cols, cell, delta, chunk)
+    _apply_sketch_delta(conn, ids, sign)
+
+
+def _summed_columns(delta: Dict[str, object]) -> List[str]:
+    return [col for col in delta if not col.endswith(("_min", "_max"))]
+
+
+def _add_to_cell(conn, table, spec, dim_cols, cell, delta) -> None:
+    cell_where = " AND ".join(f"{col} IS ?" for col in dim_cols)
+    sets = [f"{col} = {col} + ?" for col in _summed_columns(delta)]
+    params = [delta[col] for col in _summed_columns(delta)]
+    for m in spec["extremes"]:
+        sets.append(f"{m}_min = COALESCE(MIN({m}_min, ?), {m}_min, ?)")
+        sets.append(f"{m}_max = COALESCE(MAX({m}_max, ?), {m}_max, ?)")
+        params += [delta[f"{m}_min"], delta[f"{m}_min"], delta[f"{m}_max"], delta[f"{m}_max"]]
+    cur = conn.execute(f"UPDATE {table} SET {', '.join(sets)} WHERE {cell_where}", params + cell)
+    if cur.rowcount == 0:
+        columns = dim_cols + list(delta)
+        conn.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            cell + list(delta.values()),
+        )
+
+
+def _subtract_from_cell(conn, table, spec, dim_cols, cell, delta, removed_ids) -> None:
+    cell_where = " AND ".join(f"{col} IS ?" for col in dim_cols)
+    sets = [f"{col} = {col} - ?" for col in _summed_columns(delta)]
+    conn.execute(
+        f"UPDATE {table} SET {', '.join(sets)} WHERE {cell_where}",
+        [delta[col] for col in _summed_columns(delta)] + cell,
+    )
+    conn.execute(f"DELETE FROM {table} WHERE {cell_where} AND n <= 0", cell)
+    if not spec["extremes"]:
+        return
+    # MIN/MAX cannot be subtracted: recompute them for the cell without the removed rows
+    source_where = " AND ".join(f"{expr} IS ?" for _, expr in spec["dims"])
+    placeholders = ", ".join("?" for _ in removed_ids)
+    for m in spec["extremes"]:
+        lo, hi = conn.execute(
+            f"SELECT MIN(c.{m}), MAX(c.{m}) {_ROLLUP_SOURCE} "
+            f"WHERE {source_where} AND c.content_id NOT IN ({placeholders})",
+            cell + list(removed_ids),
+        ).fetchone()
+        conn.execute(f"UPDATE {table} SET {m}_min = ?, {m}_max = ? WHERE {cell_where}", [lo, hi] + cell)
+
+
+_SKETCH_SOURCE = f"SELECT {', '.join('c.' + d for d in SKETCH_DIMS + SKETCH_METRICS)} FROM Content c"
+
+
+def _sketch_cells(rows: Iterable[Sequence], sign: int = 1) -> Dict[tuple, list]:
+    """Group (dims..., metrics...) rows into {cell: [n, {metric: sketch}]}."""
+    cells: Dict[tuple, list] = {}
+    width = len(SKETCH_DIMS)
+    for row in rows:
+        cell = tuple(row[:width])
+        entry = cells.get(cell)
+        if entry is None:
+            entry = cells[cell] = [0, {m: QuantileSketch() for m in SKETCH_METRICS}]
+        entry[0] += sign
+        for metric, value in zip(SKETCH_METRICS, row[width:]):
+            entry[1][metric].add(value, sign)
+    return cells
+
+
+def _write_sketch_cell(conn: sqlite3.Connection, cell: tuple, n: int, sketches: Dict[str, QuantileSketch]) -> None:
+    where = " AND ".join(f"{d} IS ?" for d in SKETCH_DIMS)
+    conn.execute(f"DELETE FROM {SKETCH_TABLE} WHERE {where}", cell)
+    if n <= 0:
+        return
+    columns = list(SKETCH_DIMS) + ["n"] + [f"{m}_sketch" for m in SKETCH_METRICS]
+    conn.execute(
+        f"INSERT INTO {SKETCH_TABLE} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        list(cell) + [n] + [sketches[m].to_bytes() for m in SKETCH_METRICS],
+    )
+
+
+def rebuild_sketches(conn: sqlite3.Connection) -> int:
+    """Recompute every sketch cell from Content; returns the number of cells."""
+    conn.execute(f"DELETE FROM {SKETCH_TABLE}")
+    cells = _sketch_cells(conn.execute(_SKETCH_SOURCE))
+    for cell, (n, sketches) in cells.items():
+        _write_sketch_cell(conn, cell, n, sketches)
+    return len(cells)
+
+
+def _apply_sketch_delta(conn: sqlite3.Connection, content_ids: Sequence[str], sign: int) -> None:
+    where = " AND ".join(f"{d} IS ?" for d in SKETCH_DIMS)
+    blob_cols = ", ".join(f"{m}_sketch" for m in SKETCH_METRICS)
+    for chunk in _chunks(list(content_ids)):
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(f"{_SKETCH_SOURCE} WHERE c.content_id IN ({placeholders})", chunk).fetchall()
+        for cell, (n, delta) in _sketch_cells(rows, sign).items():
+            stored = conn.execute(f"SELECT n, {blob_cols} FROM {SKETCH_TABLE} WHERE {where}", cell).fetchone()
+            if stored is not None:
+                n += stored[0]
+                for metric, blob in zip(SKETCH_METRICS, stored[1:]):
+                    delta[metric].merge(QuantileSketch.from_bytes(blob))
+            _write_sketch_cell(conn, cell, n, delta)
+
+
+def merge_sketches(rows: Iterable[Sequence]) -> Tuple[int, Dict[str, QuantileSketch]]:
+    """Merge (n, blob per metric) rows, e.g. a month range of one slice."""
+    total = 0
+    merged = {m: QuantileSketch() for m in SKETCH_METRICS}
+    for row in rows:
+        total += row[0]
+        for metric, blob in zip(SKETCH_METRICS, row[1:]):
+            if blob is not None:
+                merged[metric].merge(QuantileSketch.from_bytes(blob))
+    return total, merged
+
+
+def sketch_values(rows: Iterable[Sequence]) -> Tuple[int, Dict[str, QuantileSketch]]:
+    """Sketch raw metric rows straight from Content (used while the stored sketches are stale)."""
+    total = 0
+    sketches = {m: QuantileSketch() for m in SKETCH_METRICS}
+    for row in rows:
+        total += 1
+        for metric, value in zip(SKETCH_METRICS, row):
+            sketches[metric].add(value)
+    return total, sketches
+
+
+def retract_content(conn: sqlite3.Connection, content_ids: Sequence[str]) -> bool:
+    """Take rows out of the rollups before they are replaced, updated or deleted.
+
+    Returns whether the rollups are being maintained, to pass on to record_content_change().
+    """
+    live = rollups_current(conn)
+    if live:
+        apply_rollup_delta(conn, content_ids, -1)
+    return live
+
+
+def record_content_change(conn: sqlite3.Connection, content_ids: Sequence[str], rollups_live: bool) -> None:
+    """Bump the content counter and fold the rows' new state back into the rollups."""
+    bump_data_version(conn, CONTENT_VERSION)
+    if rollups_live:
+        apply_rollup_delta(conn, content_ids, 1)
+        mark_version_synced(conn, ROLLUPS_VERSION)
+
+
+# report_queries variants answered from the rollups; seeded with INSERT OR IGNORE so
+# they stay editable like every other stored query (delete one to fall back to Content).
+ROLLUP_QUERIES = {
+    "global_summary": """
+        SELECT SUM(c.n), SUM(c.views_sum), SUM(c.likes_sum),
+               SUM(c.engagement_rate_sum) * 1.0 / NULLIF(SUM(c.engagement_rate_n), 0)
+        FROM content_rollup_monthly c
+        WHERE c.platform = ? AND c.year_month = ?
+    """,
+    "global_top_countries": """
+        SELECT co.country_name, SUM(c.views_sum) AS total_views
+        FROM content_rollup_monthly c
+        JOIN Country co ON c.country_id = co.country_id
+        WHERE c.platform = ? AND c.year_month = ?
+        GROUP BY co.country_name
+        ORDER BY total_views DESC
+        LIMIT 10
+    """,
+    "global_top_hashtag": """
+        SELECT c.hashtag, SUM(c.views_sum) AS total_views
+        FROM content_rollup_hashtag c
+        WHERE c.platform = ? AND c.year_month = ?
+        GROUP BY c.hashtag
+        ORDER BY total_views DESC
+        LIMIT 1
+    """,
+    "global_category_dist": """
+        SELECT c.category, SUM(c.views_sum) AS total_views
+        FROM content_rollup_monthly c
+        WHERE c.platform = ? AND c.year_month = ?
+        GROUP BY c.category
+        ORDER BY total_views DESC
+    """,
+    "hashtag_main": """
+        SELECT c.hashtag, SUM(c.views_sum) AS total_views
+        FROM content_rollup_hashtag c
+        WHERE c.platform = ? AND c.country_id = ?
+        GROUP BY c.hashtag
+        HAVING SUM(c.views_sum) > ?
+        ORDER BY total_views DESC
+    """,
+    "creator_total_views": """
+        SELECT SUM(c.views_sum)
+        FROM content_rollup_monthly c
+        WHERE c.platform = ? AND c.year_month BETWEEN ? AND ?
+    """,
+    "creator_tier_agg": """
+        SELECT c.creator_tier, SUM(c.views_sum) AS total_views, SUM(c.n) AS content_count
+        FROM content_rollup_monthly c
+        WHERE c.platform = ? AND c.creator_tier IN ({tier_placeholders}) AND c.year_month BETWEEN ? AND ?
+        GROUP BY c.creator_tier
+        ORDER BY total_views DESC
+    """,
+    "creator_single_tier_monthly": """
+        SELECT c.year_month, SUM(c.views_sum), SUM(c.n)
+        FROM content_rollup_monthly c
+        WHERE c.platform = ? AND c.creator_tier = ? AND c.year_month BETWEEN ? AND ?
+        GROUP BY c.year_month
+        ORDER BY c.year_month
+    """,
+    "region_engagement_main": """
+        SELECT c.platform, c.category,
+               CASE WHEN SUM(c.interactions_n) > 0 THEN SUM(c.interactions_sum) END AS total_engagement
+        FROM content_rollup_monthly c
+        JOIN Country co ON c.country_id = co.country_id
+        WHERE co.region = ?
+        GROUP BY c.platform, c.category
+        ORDER BY total_engagement DESC
+    """,
+    "pd_agg_by_country": """
+        SELECT c.platform, SUM(c.n), SUM(c.views_sum),
+               SUM(c.engagement_rate_sum) * 1.0 / NULLIF(SUM(c.engagement_rate_n), 0),
+               SUM(c.engagement_per_1k_sum) * 1.0 / NULLIF(SUM(c.engagement_per_1k_n), 0),
+               SUM(c.likes_sum) * 1.0 / NULLIF(SUM(c.likes_n), 0),
+               SUM(c.comments_sum) * 1.0 / NULLIF(SUM(c.comments_n), 0),
+               SUM(c.shares_sum) * 1.0 / NULLIF(SUM(c.shares_n), 0),
+               SUM(c.completion_rate_sum) * 1.0 / NULLIF(SUM(c.completion_rate_n), 0)
+        FROM content_rollup_monthly c
+        WHERE c.country_id = ?
+        GROUP BY c.platform
+    """,
+    "pd_median_counts": """
+        SELECT c.platform, SUM(c.engagement_rate_n), SUM(c.engagement_per_1k_n), SUM(c.completion_rate_n)
+        FROM content_rollup_monthly c
+        WHERE c.country_id = ?
+        GROUP BY c.platform
+    """,
+    "publish_timing_cube": """
+        SELECT c.upload_hour, c.publish_period, c.publish_dayofweek,
+               SUM(c.n), SUM(c.views_sum),
+               SUM(c.engagement_rate_sum), SUM(c.engagement_rate_n),
+               MAX(c.engagement_rate_max), MIN(c.engagement_rate_min),
+               SUM(c.completion_rate_sum), SUM(c.completion_rate_n)
+        FROM content_rollup_timing c
+        WHERE c.platform = ? AND (? IS NULL OR c.year_month BETWEEN ? AND ?)
+        GROUP BY c.upload_hour, c.publish_period, c.publish_dayofweek
+    """,
+}
+
+
+# Earlier default texts of ROLLUP_QUERIES, replaced on startup unless an admin edited them:
+# the hashtag variants dropped empty hashtags and the region one summed the CSV
+# engagement_total column, so neither matched the Content query they stand in for.
+SUPERSEDED_ROLLUP_QUERIES = {
+    "global_top_hashtag": """
+        SELECT c.hashtag, SUM(c.views_sum) AS total_views
+        FROM content_rollup_hashtag c
+        WHERE c.platform = ? AND c.year_month = ? AND c.hashtag IS NOT NULL AND c.hashtag != ''
+        GROUP BY c.hashtag
+        ORDER BY total_views DESC
+        LIMIT 1
+    """,
+    "hashtag_main": """
+        SELECT c.hashtag, SUM(c.views_sum) AS total_views
+        FROM content_rollup_hashtag c
+        WHERE c.platform = ? AND c.country_id = ? AND c.hashtag IS NOT NULL AND c.hashtag != ''
+        GROUP BY c.hashtag
+        HAVING SUM(c.views_sum) > ?
+        ORDER BY total_views DESC
+    """,
+    "region_engagement_main": """
+        SELECT c.platform, c.category, SUM(c.engagement_total_sum) AS total_engagement
+        FROM content_rollup_monthly c
+        JOIN Country co ON c.country_id = co.country_id
+        WHERE co.region = ?
+        GROUP BY c.platform, c.category
+        ORDER BY total_engagement DESC
+    """,
+}
+
+
+def _same_sql(a: str, b: str) -> bool:
+    return " ".join(a.split()).rstrip(";") == " ".join(b.split()).rstrip(";")
+
+
+def seed_rollup_queries(conn: sqlite3.Connection) -> None:
+    stored = dict(conn.execute(
+        "SELECT slug, sql_text FROM report_queries WHERE slug IN ({})".format(
+            ", ".join("?" for _ in SUPERSEDED_ROLLUP_QUERIES)),
+        [slug + ROLLUP_SUFFIX for slug in SUPERSEDED_ROLLUP_QUERIES],
+    ).fetchall())
+    outdated = [
+        (ROLLUP_QUERIES[slug].strip(), slug + ROLLUP_SUFFIX)
+        for slug, old_sql in SUPERSEDED_ROLLUP_QUERIES.items()
+        if _same_sql(stored.get(slug + ROLLUP_SUFFIX, ""), old_sql)
+    ]
+    with conn:
+        conn.executemany("UPDATE report_queries SET sql_text = ? WHERE slug = ?", outdated)
+        conn.executemany(
+            "INSERT OR IGNORE INTO report_queries (slug, sql_text, description) VALUES (?, ?, ?)",
+            [
+                (slug + ROLLUP_SUFFIX, sql.strip(), f"{slug} answered from the monthly rollups")
+                for slug, sql in ROLLUP_QUERIES.items()
+            ],
+        )
+
+
+# ---------------------------------------------------------------------------
+# Exact medians read straight off an index
+# ---------------------------------------------------------------------------
+# With n non-null values per (country, platform), the median is the one or two
+# rows at OFFSET (n - 1) / 2 of an index on (country_id, platform, metric), so
+# only those rows leave SQLite. The counts come from the rollups when current.
+MEDIAN_METRICS = ("engagement_rate", "engagement_per_1k", "completion_rate")
+
+MEDIAN_QUERIES = {
+    "pd_median_counts": (
+        "SELECT c.platform, "
+        + ", ".join(f"COUNT(c.{m})" for m in MEDIAN_METRICS)
+        + " FROM Content c WHERE c.country_id = ? GROUP BY c.platform"
+    ),
+    **{
+        f"pd_median_{m}": (
+            f"SELECT c.{m} FROM Content c "
+            f"WHERE c.country_id = ? AND c.platform = ? AND c.{m} IS NOT NULL "
+            f"ORDER BY c.{m} LIMIT ? OFFSET ?"
+        )
+        for m in MEDIAN_METRICS
+    },
+}
+
+
+def _seed_queries(conn: sqlite3.Connection, queries: Dict[str, str], description: str) -> None:
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO report_queries (slug, sql_text, description) VALUES (?, ?, ?)",
+            [(slug, sql.strip(), description) for slug, sql in queries.items()],
+        )
+
+
+def seed_median_queries(conn: sqlite3.Connection) -> None:
+    _seed_queries(conn, MEDIAN_QUERIES, "middle rows for exact per-platform medians")
+
+
+# Publish-timing cube straight from Content (one scan for every mode) while the
+# content_rollup_timing cells are stale; same columns as its _rollup variant.
+# Month range optional: pass (platform, start, start, end) with start/end None for all time.
+TIMING_QUERIES = {
+    "publish_timing_cube": """
+        SELECT d.upload_hour, c.publish_period, c.publish_dayofweek,
+               COUNT(*), COALESCE(SUM(c.views), 0),
+               COALESCE(SUM(c.engagement_rate), 0), COUNT(c.engagement_rate),
+               MAX(c.engagement_rate), MIN(c.engagement_rate),
+               COALESCE(SUM(c.completion_rate), 0), COUNT(c.completion_rate)
+        FROM Content c
+        LEFT JOIN Device d ON c.device_id = d.device_id
+        WHERE c.platform = ? AND (? IS NULL OR c.year_month BETWEEN ? AND ?)
+        GROUP BY d.upload_hour, c.publish_period, c.publish_dayofweek
+    """,
+}
+
+
+def seed_timing_queries(conn: sqlite3.Connection) -> None:
+    _seed_queries(conn, TIMING_QUERIES, "publish-timing cube cells for a platform and month range")
+
+
+# Percentile API: stored sketches for a month range of one platform (country optional),
+# and the raw values for the same slice as a fallback while the sketches are stale.
+SKETCH_QUERIES = {
+    "percentile_sketches": f"""
+        SELECT s.n, {', '.join('s.' + m + '_sketch' for m in SKETCH_METRICS)}
+        FROM {SKETCH_TABLE} s
+        WHERE s.platform = ? AND (? IS NULL OR s.country_id = ?) AND s.year_month BETWEEN ? AND ?
+    """,
+    "percentile_values": f"""
+        SELECT {', '.join('c.' + m for m in SKETCH_METRICS)}
+        FROM Content c
+        WHERE c.platform = ? AND (? IS NULL OR c.country_id = ?) AND c.year_month BETWEEN ? AND ?
+    """,
+}
+
+
+def seed_sketch_queries(conn: sqlite3.Connection) -> None:
+    _seed_queries(conn, SKETCH_QUERIES, "percentiles from the monthly quantile sketches")
+
+
+# ---------------------------------------------------------------------------
+# Curated indexes for the report_queries workload
+# ---------------------------------------------------------------------------
+# Column order follows the stored queries: equality filters first, then the
+# range/group column, then the measures they read so the index covers them.
+CURATED_INDEXES = {
+    "idx_content_platform_month": (
+        "Content (platform, year_month, country_id, category, author_id, views, likes, engagement_rate)"
+    ),
+    "idx_content_country_platform": "Content (country_id, platform, publish_date_approx, trend_id, views)",
+    "idx_content_country_hashtag": "Content (country_id, platform, hashtag, views)",
+    "idx_content_country_metrics": (
+        "Content (country_id, platform, engagement_rate, engagement_per_1k, completion_rate, "
+        "views, likes, comments, shares)"
+    ),
+    "idx_content_country_e1k": "Content (country_id, platform, engagement_per_1k)",
+    "idx_content_country_completion": "Content (country_id, platform, completion_rate)",
+    "idx_content_publish_date": "Content (publish_date_approx)",
+    "idx_content_year_month": "Content (year_month)",
+    "idx_content_platform_period": "Content (platform, publish_period, engagement_rate)",
+    "idx_content_platform_weekday": "Content (platform, publish_dayofweek, engagement_rate)",
+    # Admin content list: the implicit trailing rowid keeps each filter's keyset pages in index order
+    "idx_content_platform_rowid": "Content (platform)",
+    "idx_content_country_rowid": "Content (country_id)",
+    "idx_content_country_date": "Content (country_id, publish_date_approx)",
+    "idx_content_author": "Content (author_id)",
+    "idx_content_device": "Content (device_id)",
+    "idx_country_region": "Country (region, country_id)",
+    "idx_author_tier": "Author (creator_tier, author_id)",
+    "idx_content_tags_content": "Content_Tags (content_id)",
+    "idx_content_comments_content": "Content_Comments (content_id)",
+}
+
+
+def ensure_indexes(conn: sqlite3.Connection) -> List[str]:
+    """Create any missing curated index; returns the names that were created."""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    created = []
+    for name, target in CURATED_INDEXES.items():
+        if name in existing:
+            continue
+        try:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+            created.append(name)
+        except sqlite3.OperationalError as e:
+            # Table missing in a partial database: skip rather than fail startup
+            print(f"[warn] Could not create {name}: {e}")
+    if created:
+        conn.execute("ANALYZE")
+    return created
+
+
+def drop_indexes(conn: sqlite3.Connection) -> None:
+    """Drop the curated indexes, e.g. before a bulk load (recreate with ensure_indexes)."""
+    for name in CURATED_INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def bind_report_sql(sql_text: str) -> str:
+    """Fill the str.format placeholders used by stored SQL with a representative value."""
+    return sql_text.replace("{tier_placeholders}", "?, ?, ?, ?")
+
+
+def explain_query(conn: sqlite3.Connection, sql: str) -> List[str]:
+    params = [None] * sql.count("?")
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def plan_scans(plan: Sequence[str]) -> List[str]:
+    """Plan steps that read a whole table (no index) or need a temp b-tree."""
+    return [
+        step for step in plan
+        if (step.startswith("SCAN") and " USING " not in step) or "TEMP B-TREE" in step
+    ]
+
+
+def explain_report_queries(conn: sqlite3.Connection) -> List[Dict[str, object]]:
+    """EXPLAIN QUERY PLAN for every stored report_queries slug."""
+    report = []
+    for slug, sql_text in conn.execute("SELECT slug, sql_text FROM report_queries ORDER BY slug").fetchall():
+        try:
+            plan = explain_query(conn, bind_report_sql(sql_text))
+            error = None
+        except sqlite3.Error as e:
+            plan, error = [], str(e)
+        report.append({"slug": slug, "plan": plan, "scans": plan_scans(plan), "error": error})
+    return report
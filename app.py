@@ -1,11 +1,36 @@
-from flask import Flask, render_template, request, jsonify, session, redirect
+from flask import Flask, render_template, request, jsonify, session, redirect, g
+from flask.json.provider import DefaultJSONProvider
 import sqlite3
 from sqlite3 import Error
-from jinja2 import Environment
+from jinja2 import Environment, BaseLoader, TemplateNotFound
+import base64
 import json
 import html
 import re
 import os
+import sys
+import queue
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import wraps
+from analytics_db import (
+    ROLLUP_SUFFIX, CONTENT_VERSION, DIMENSIONS_VERSION, init_data_versions_table, init_dimensions_version,
+    read_data_version, read_data_versions, bump_data_version,
+    create_rollup_tables, seed_rollup_queries, rollups_current, retract_content, record_content_change,
+    ensure_indexes, MEDIAN_METRICS, seed_median_queries, seed_sketch_queries, merge_sketches, sketch_values,
+    seed_timing_queries, ROLLUP_QUERIES,
+)
+from quantile_sketch import RELATIVE_ACCURACY
+from metrics import Registry
+from timing_stats import DEFAULT_TIME_SLOTS, bucket_stats, parse_time_slots, slot_stats
+from columnar import (
+    COLUMNAR_AVAILABLE, NOT_ANSWERED, SUPPORTED_QUERIES as COLUMNAR_QUERIES, load_columns, normalize_sql,
+    sql_supported, answer as columnar_answer,
+)
 try:
     import markdown  # Optional; used to render Markdown to HTML  # pyright: ignore[reportMissingModuleSource]
 except Exception:
@@ -16,17 +41,912 @@ app = Flask(__name__, template_folder='.')
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here-change-in-production')
 
 ### 数据库连接函数
+DB_PATH = os.environ.get('DB_PATH', 'Tiktok_youtube.db')
+
+# PRAGMAs applied once when a pooled connection is opened
+SQLITE_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("mmap_size", int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))),
+    ("cache_size", int(os.environ.get('SQLITE_CACHE_SIZE', -64000))),  # negative = KiB
+    ("temp_store", "MEMORY"),
+)
+
 def create_connection():
     """Connect to SQLite database"""
     conn = None
     try:
-        conn = sqlite3.connect('Tiktok_youtube.db')
+        conn = sqlite3.connect(DB_PATH)
         conn.row_factory = sqlite3.Row
         return conn
     except Error as e:
         print(f"Database connection error: {e}")
     return conn
 
+def _apply_pragmas(conn):
+    for name, value in SQLITE_PRAGMAS:
+        try:
+            conn.execute(f"PRAGMA {name} = {value}")
+        except Error as e:
+            # e.g. WAL cannot be enabled on a read-only file; keep the connection usable
+            print(f"PRAGMA {name} warning: {e}")
+
+
+class ConnectionPool:
+    """Bounded pool of reusable SQLite connections shared by the worker's threads.
+
+    Connections are opened lazily, configured once with SQLITE_PRAGMAS and handed
+    back to the idle stack at the end of each request instead of being closed.
+    """
+
+    def __init__(self, db_path, max_size=8, acquire_timeout=10.0, health_check_after=30.0, read_only=False):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.read_only = read_only
+        self.acquire_timeout = acquire_timeout
+        self.health_check_after = health_check_after
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._idle = queue.LifoQueue()  # (conn, released_at); LIFO keeps hot connections warm
+        self._all = set()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.acquire_timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        _apply_pragmas(conn)
+        if self.read_only:
+            conn.execute("PRAGMA query_only = ON")
+        with self._lock:
+            self._all.add(conn)
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._all.discard(conn)
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    @staticmethod
+    def _is_healthy(conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except Error:
+            return False
+
+    def acquire(self):
+        if os.getpid() != self._pid:
+            # Forked worker (gunicorn): never share the parent's sqlite handles
+            self._reset()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise sqlite3.OperationalError("Database connection pool exhausted")
+        try:
+            while True:
+                try:
+                    conn, released_at = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if time.monotonic() - released_at < self.health_check_after or self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        try:
+            conn.set_progress_handler(None, 0)
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put((conn, time.monotonic()))
+        except Error:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            opened = len(self._all)
+        return {"max_size": self.max_size, "open": opened, "idle": self._idle.qsize(), "read_only": self.read_only}
+
+
+db_pool = ConnectionPool(DB_PATH, max_size=int(os.environ.get('DB_POOL_SIZE', 8)))
+
+def get_db():
+    """Return the pooled connection bound to the current app context."""
+    if 'db_conn' not in g:
+        g.db_conn = db_pool.acquire()
+        install_cancel_handler(g.db_conn, current_cancel_event())
+    return g.db_conn
+
+@app.teardown_appcontext
+def release_db(exc):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        db_pool.release(conn)
+
+### 查询取消（progress handler）
+# SQLite VM instructions between two checks of the cancel event
+PROGRESS_HANDLER_OPS = 1000
+_cancel_state = threading.local()
+
+@contextmanager
+def cancellable_queries(event):
+    """Abort the SQLite statements this thread (and its fan-out queries) runs once `event` is set.
+
+    Used by the ASGI entry point for timed-out or abandoned requests; an aborted
+    statement raises sqlite3.OperationalError("interrupted").
+    """
+    previous = getattr(_cancel_state, 'event', None)
+    _cancel_state.event = event
+    try:
+        yield event
+    finally:
+        _cancel_state.event = previous
+
+def current_cancel_event():
+    return getattr(_cancel_state, 'event', None)
+
+def queries_cancelled():
+    event = current_cancel_event()
+    return event is not None and event.is_set()
+
+def install_cancel_handler(conn, event):
+    if event is None:
+        conn.set_progress_handler(None, 0)
+    else:
+        conn.set_progress_handler(event.is_set, PROGRESS_HANDLER_OPS)
+
+### 请求埋点（instrumentation）
+# Attach a Server-Timing header with the per-request span totals
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '0') == '1'
+
+metrics = Registry()
+request_duration = metrics.histogram(
+    'app_request_duration_seconds', 'Request handling time.', ('endpoint', 'method', 'status'))
+span_duration = metrics.histogram(
+    'app_span_duration_seconds',
+    'Time per span (sql_execute, sql_fetch, sql_wait, template, markdown, json, python) and report_queries slug.',
+    ('endpoint', 'span', 'slug'))
+response_cache_lookups = metrics.counter(
+    'app_response_cache_lookups', 'Response cache lookups by result (hit / miss).', ('endpoint', 'result'))
+_trace_state = threading.local()
+
+
+class RequestTrace:
+    """Span totals of one request; fan-out worker threads add to the same trace.
+
+    Only spans recorded on the request's own thread count against its wall time, so
+    the remainder is reported as the `python` span (validation, post-processing).
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self._owner = threading.get_ident()
+        self._lock = threading.Lock()
+        self.totals = {}  # span -> [seconds, count]
+        self.own_seconds = 0.0
+
+    def add(self, name, seconds):
+        with self._lock:
+            total = self.totals.setdefault(name, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+            if threading.get_ident() == self._owner:
+                self.own_seconds += seconds
+
+    def finish(self):
+        """(wall seconds, remainder not covered by spans on the request thread)"""
+        elapsed = time.perf_counter() - self.started
+        return elapsed, max(elapsed - self.own_seconds, 0.0)
+
+    def server_timing(self, elapsed, remainder):
+        with self._lock:
+            parts = [f'{name};dur={seconds * 1000:.2f};desc="{count}x"'
+                     for name, (seconds, count) in self.totals.items()]
+        parts.append(f'python;dur={remainder * 1000:.2f}')
+        parts.append(f'total;dur={elapsed * 1000:.2f}')
+        return ', '.join(parts)
+
+
+def current_trace():
+    stack = getattr(_trace_state, 'stack', None)
+    return stack[-1] if stack else None
+
+@contextmanager
+def tracing(trace):
+    """Attribute the spans this thread records to `trace` (used on fan-out worker threads)."""
+    stack = _trace_state.__dict__.setdefault('stack', [])
+    stack.append(trace)
+    try:
+        yield trace
+    finally:
+        stack.pop()
+
+@contextmanager
+def span(name, slug=''):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        trace = current_trace()
+        span_duration.observe((trace.endpoint if trace else '', name, slug), elapsed)
+        if trace is not None:
+            trace.add(name, elapsed)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        with span('json'):
+            return super().dumps(obj, **kwargs)
+
+app.json = TimedJSONProvider(app)
+
+@app.before_request
+def start_trace():
+    trace = RequestTrace(request.url_rule.rule if request.url_rule else 'unmatched')
+    request.environ['app.trace'] = trace
+    _trace_state.__dict__.setdefault('stack', []).append(trace)
+
+@app.after_request
+def finish_trace(response):
+    trace = request.environ.get('app.trace')
+    if trace is not None:
+        elapsed, remainder = trace.finish()
+        request_duration.observe((trace.endpoint, request.method, str(response.status_code)), elapsed)
+        span_duration.observe((trace.endpoint, 'python', ''), remainder)
+        if SERVER_TIMING:
+            response.headers['Server-Timing'] = trace.server_timing(elapsed, remainder)
+    return response
+
+@app.teardown_request
+def end_trace(exc):
+    trace = request.environ.pop('app.trace', None)
+    stack = getattr(_trace_state, 'stack', None)
+    if trace is not None and stack and stack[-1] is trace:
+        stack.pop()
+
+### 慢查询日志（slow-query log）
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 500))  # 0 disables
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', 'slow_queries.jsonl')
+SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 5 * 1024 * 1024))
+
+
+class SlowQueryLog:
+    """JSONL record of report queries slower than threshold_ms, with their EXPLAIN QUERY PLAN.
+
+    The file rolls over to `<path>.1` once it would pass max_bytes, so at most two
+    generations are kept; appends from several worker processes stay line-atomic.
+    """
+
+    def __init__(self, path, threshold_ms, max_bytes):
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.threshold_ms > 0
+
+    def maybe_record(self, conn, slug, sql, params, seconds, rows, timed_out=False):
+        duration_ms = seconds * 1000
+        if not self.enabled or (duration_ms < self.threshold_ms and not timed_out):
+            return
+        try:
+            plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        except Error as e:
+            plan = [f"unavailable: {e}"]
+        entry = {
+            "ts": time.time(),
+            "slug": slug,
+            "duration_ms": round(duration_ms, 2),
+            "rows": rows,
+            "timed_out": timed_out,
+            "params": list(params),
+            "plan": plan,
+        }
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"Slow query log warning: {e}")
+
+    def entries(self, since):
+        for path in (self.path + ".1", self.path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # torn line from a concurrent rollover
+                        if entry.get("ts", 0) >= since:
+                            yield entry
+            except FileNotFoundError:
+                continue
+
+    def worst(self, since, limit=20, sort="max_ms"):
+        """Per-slug summary of the entries since `since`, worst first; keeps the slowest sample's params and plan."""
+        groups = {}
+        for entry in self.entries(since):
+            group = groups.setdefault(entry["slug"], {
+                "slug": entry["slug"], "count": 0, "timeouts": 0, "total_ms": 0.0,
+                "max_ms": 0.0, "max_rows": 0, "last_seen": 0.0, "slowest": None,
+            })
+            group["count"] += 1
+            group["timeouts"] += 1 if entry.get("timed_out") else 0
+            group["total_ms"] += entry["duration_ms"]
+            group["max_rows"] = max(group["max_rows"], entry.get("rows") or 0)
+            group["last_seen"] = max(group["last_seen"], entry["ts"])
+            if group["slowest"] is None or entry["duration_ms"] >= group["max_ms"]:
+                group["max_ms"] = entry["duration_ms"]
+                group["slowest"] = {key: entry.get(key) for key in ("ts", "params", "rows", "timed_out", "plan")}
+        for group in groups.values():
+            group["total_ms"] = round(group["total_ms"], 2)
+            group["avg_ms"] = round(group["total_ms"] / group["count"], 2)
+        return sorted(groups.values(), key=lambda group: group[sort], reverse=True)[:limit]
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_LOG, SLOW_QUERY_MS, SLOW_QUERY_LOG_MAX_BYTES)
+
+### 查询预算（report_queries 执行保护）
+# report_queries SQL is editable data, so every execution gets a time budget and a row cap
+QUERY_TIMEOUT_SECS = float(os.environ.get('QUERY_TIMEOUT_SECS', 15))
+QUERY_MAX_ROWS = int(os.environ.get('QUERY_MAX_ROWS', 50000))
+# Per-slug overrides (max_rows None = uncapped); `<slug>_rollup` variants share their base slug's budget
+QUERY_BUDGETS = {
+    'pd_agg_by_country': {'timeout': 30},
+    'pd_details_by_country': {'timeout': 30, 'max_rows': None},
+    'percentile_values': {'timeout': 30, 'max_rows': None},
+    # the indexed_median fallback reads every value (LIMIT -1)
+    **{f'pd_median_{m}': {'max_rows': None} for m in MEDIAN_METRICS},
+}
+
+
+class QueryBudgetExceeded(Exception):
+    """A report query ran past its time budget or row cap.
+
+    Deliberately not a sqlite3.Error, so the generate_* functions don't fold it into
+    "Database query error"; the app-level error handler returns as_dict() instead.
+    """
+
+    def __init__(self, slug, kind, limit):
+        self.slug = slug
+        self.kind = kind
+        self.limit = limit
+        if kind == 'timeout':
+            message = f"Query '{slug}' exceeded its {limit:g}s time budget and was cancelled"
+        else:
+            message = f"Query '{slug}' returned more than {limit} rows"
+        super().__init__(message)
+
+    def as_dict(self):
+        return {"error": str(self), "error_type": "query_" + self.kind, "slug": self.slug, "limit": self.limit}
+
+
+class QueryGuard:
+    """Execute report SQL under a per-slug time budget (progress handler) and row cap."""
+
+    def __init__(self, timeout, max_rows, budgets, slow_log=None):
+        self.timeout = timeout
+        self.max_rows = max_rows
+        self.budgets = budgets
+        self.slow_log = slow_log
+        self._lock = threading.Lock()
+        self._tripped = {}  # slug -> {"timeout": n, "row_limit": n}
+
+    def budget(self, slug):
+        overrides = self.budgets.get(slug.removesuffix(ROLLUP_SUFFIX), {})
+        return overrides.get('timeout', self.timeout), overrides.get('max_rows', self.max_rows)
+
+    def _trip(self, slug, kind, detail):
+        with self._lock:
+            counts = self._tripped.setdefault(slug, {"timeout": 0, "row_limit": 0})
+            counts[kind] += 1
+        print(f"Query guard: {slug} {detail}")
+
+    def run(self, conn, slug, sql, params=(), fetch='all'):
+        """fetchone() / fetchall() of sql; raises QueryBudgetExceeded when the budget is exceeded."""
+        timeout, max_rows = self.budget(slug)
+        cancel_event = current_cancel_event()
+        started = time.monotonic()
+        deadline = started + timeout
+
+        def should_abort():
+            return time.monotonic() > deadline or (cancel_event is not None and cancel_event.is_set())
+
+        conn.set_progress_handler(should_abort, PROGRESS_HANDLER_OPS)
+        timed_out = False
+        try:
+            with span('sql_execute', slug):
+                cursor = conn.execute(sql, params)
+            with span('sql_fetch', slug):
+                if fetch == 'one':
+                    result = cursor.fetchone()
+                elif max_rows is None:
+                    result = cursor.fetchall()
+                else:
+                    result = cursor.fetchmany(max_rows + 1)
+        except sqlite3.OperationalError as e:
+            # "interrupted" without a cancelled request means our own deadline fired
+            if str(e) != 'interrupted' or (cancel_event is not None and cancel_event.is_set()):
+                raise
+            timed_out = True
+        finally:
+            install_cancel_handler(conn, cancel_event)
+        elapsed = time.monotonic() - started
+        if timed_out:
+            self._trip(slug, 'timeout', f"cancelled after {elapsed:.2f}s (budget {timeout:g}s)")
+            if self.slow_log is not None:
+                self.slow_log.maybe_record(conn, slug, sql, params, elapsed, None, timed_out=True)
+            raise QueryBudgetExceeded(slug, 'timeout', timeout)
+        if self.slow_log is not None:
+            rows = (result is not None) if fetch == 'one' else len(result)
+            self.slow_log.maybe_record(conn, slug, sql, params, elapsed, int(rows))
+        if fetch != 'one' and max_rows is not None and len(result) > max_rows:
+            cursor.close()
+            self._trip(slug, 'row_limit', f"stopped after {max_rows} rows")
+            raise QueryBudgetExceeded(slug, 'row_limit', max_rows)
+        return result
+
+    def stats(self):
+        with self._lock:
+            tripped = {slug: dict(counts) for slug, counts in self._tripped.items()}
+        return {"timeout": self.timeout, "max_rows": self.max_rows, "tripped": tripped}
+
+
+query_guard = QueryGuard(QUERY_TIMEOUT_SECS, QUERY_MAX_ROWS, QUERY_BUDGETS, slow_log=slow_query_log)
+
+def run_query(conn, slug, sql, params=(), fetch='all'):
+    result = dimension_cache.lookup(conn, slug, sql, params, fetch)
+    if result is not NOT_ANSWERED:
+        return result
+    result = columnar_engine.lookup(conn, slug, params, fetch)
+    if result is not NOT_ANSWERED:
+        return result
+    return query_guard.run(conn, slug, sql, params, fetch)
+
+@app.errorhandler(QueryBudgetExceeded)
+def handle_query_budget_exceeded(e):
+    return jsonify(e.as_dict()), 503
+
+### 并发查询（query fan-out）
+
+class QueryFanout:
+    """Run a generate_* function's independent read queries at the same time.
+
+    Queries are (slug, sql, params, 'one' | 'all') tuples run through query_guard;
+    results come back in the same order. The first query runs on the caller's connection, the rest on read-only
+    pooled connections (WAL readers don't block each other). sqlite3 releases the
+    GIL while a statement runs, so the queries really overlap.
+    """
+
+    def __init__(self, pool, max_workers):
+        self.pool = pool
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    @property
+    def enabled(self):
+        return self.max_workers > 1
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='query-fanout')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run_pooled(self, cancel_event, trace, slug, sql, params, fetch):
+        conn = self.pool.acquire()
+        try:
+            with cancellable_queries(cancel_event), tracing(trace):
+                return query_guard.run(conn, slug, sql, params, fetch)
+        finally:
+            self.pool.release(conn)
+
+    def run(self, conn, queries):
+        # slugs the columnar engine can answer never reach SQLite
+        results = [columnar_engine.lookup(conn, slug, params, fetch) for slug, _, params, fetch in queries]
+        pending = [i for i, result in enumerate(results) if result is NOT_ANSWERED]
+        for i, result in zip(pending, self._run_sql(conn, [queries[i] for i in pending])):
+            results[i] = result
+        return results
+
+    def _run_sql(self, conn, queries):
+        if not self.enabled or len(queries) < 2:
+            return [query_guard.run(conn, *q) for q in queries]
+        executor = self._get_executor()
+        cancel_event = current_cancel_event()
+        trace = current_trace()
+        futures = [executor.submit(self._run_pooled, cancel_event, trace, *q) for q in queries[1:]]
+        first = query_guard.run(conn, *queries[0])
+        with span('sql_wait'):
+            rest = [f.result() for f in futures]
+        return [first] + rest
+
+
+QUERY_FANOUT_WORKERS = int(os.environ.get('QUERY_FANOUT_WORKERS', 4))
+read_pool = ConnectionPool(DB_PATH, max_size=max(QUERY_FANOUT_WORKERS, 1), read_only=True)
+query_fanout = QueryFanout(read_pool, QUERY_FANOUT_WORKERS)
+
+### 列式分析引擎（columnar engine）
+# Opt-in (needs numpy): a per-worker in-memory copy of Content, roughly 120 bytes per row
+COLUMNAR_ENGINE = os.environ.get('COLUMNAR_ENGINE', '0') == '1'
+
+
+class ColumnarEngine:
+    """Answer the supported report_queries slugs from a columnar snapshot of Content.
+
+    The snapshot is loaded on a background thread (read_pool connection, one read
+    transaction) the first time it is needed and again whenever the content
+    version moves. Until a snapshot of the current version is ready, queries keep
+    going to SQLite, so results are never stale.
+    """
+
+    def __init__(self, pool, enabled):
+        self.pool = pool
+        self.enabled = enabled and COLUMNAR_AVAILABLE
+        self._lock = threading.Lock()
+        self._columns = None
+        self._loading = False
+        self._failed_version = None
+        self._pid = os.getpid()
+        self.loads = 0
+        self.load_seconds = None
+        self.last_error = None
+        self.answered = 0
+        self.fallbacks = 0
+        self.sql_mismatches = {}  # slug -> lookups skipped because its stored SQL was edited
+
+    def _start_load(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # forked worker: the parent's loader thread does not exist here
+                self._pid, self._loading = os.getpid(), False
+            if self._loading:
+                return
+            self._loading = True
+        threading.Thread(target=self.load, name='columnar-load', daemon=True).start()
+
+    def load(self):
+        """Build a snapshot on the calling thread (requests start one in the background)."""
+        started = time.monotonic()
+        conn = version = None
+        try:
+            conn = self.pool.acquire()
+            conn.execute("BEGIN")
+            try:
+                version = read_data_version(conn, CONTENT_VERSION)
+                columns = load_columns(conn, version)
+            finally:
+                conn.rollback()
+            self._columns = columns
+            self.loads += 1
+            self.load_seconds = round(time.monotonic() - started, 3)
+            self.last_error = None
+        except Exception as e:
+            # e.g. columns with mixed value types: stay on SQLite until the data changes
+            self._failed_version = version
+            self.last_error = str(e)
+            print(f"Columnar engine load failed: {e}")
+        finally:
+            if conn is not None:
+                self.pool.release(conn)
+            with self._lock:
+                self._loading = False
+
+    def lookup(self, conn, slug, params, fetch='all'):
+        """Rows for slug from the snapshot, or NOT_ANSWERED to run the SQL instead."""
+        if not self.enabled or not query_registry.has(conn, slug):
+            return NOT_ANSWERED
+        if not sql_supported(slug, query_registry.get(conn, slug)):
+            if slug in COLUMNAR_QUERIES:
+                with self._lock:
+                    self.sql_mismatches[slug] = self.sql_mismatches.get(slug, 0) + 1
+            return NOT_ANSWERED
+        version = read_data_version(conn, CONTENT_VERSION)
+        columns = self._columns
+        if version is None or columns is None or columns.version != version:
+            if version is not None and version != self._failed_version:
+                self._start_load()
+            self.fallbacks += 1
+            return NOT_ANSWERED
+        with span('columnar', slug):
+            result = columnar_answer(columns, slug, params, fetch)
+        _, max_rows = query_guard.budget(slug)
+        if result is NOT_ANSWERED or (fetch != 'one' and max_rows is not None and len(result) > max_rows):
+            # let query_guard produce the row-limit error
+            self.fallbacks += 1
+            return NOT_ANSWERED
+        self.answered += 1
+        return result
+
+    def stats(self):
+        columns = self._columns
+        with self._lock:
+            sql_mismatches = dict(self.sql_mismatches)
+        return {
+            "enabled": self.enabled,
+            "rows": columns.n if columns else 0,
+            "bytes": columns.nbytes if columns else 0,
+            "version": columns.version if columns else None,
+            "loads": self.loads,
+            "load_seconds": self.load_seconds,
+            "loading": self._loading,
+            "answered": self.answered,
+            "fallbacks": self.fallbacks,
+            "sql_mismatches": sql_mismatches,
+            "last_error": self.last_error,
+        }
+
+
+columnar_engine = ColumnarEngine(read_pool, COLUMNAR_ENGINE)
+
+### 日历索引（calendar index）
+class CalendarIndex:
+    """Distinct Content.year_month / publish_date_approx values with their row counts.
+
+    The validate_* helpers check existence with a dict lookup, and date ranges
+    with a bisect over per-date prefix sums, instead of a COUNT(*) on Content.
+    Built from the two covering indexes at startup. After the content version
+    moves, the rebuild runs on a background thread (read_pool connection) while
+    lookups keep using the previous snapshot; a miss on that stale snapshot is
+    confirmed with an indexed COUNT(*), so new months and dates are never rejected.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._snapshot = None  # (version, month -> rows, sorted dates, prefix sums)
+        self._building = False
+        self._pid = os.getpid()
+        self.builds = 0
+        self.build_seconds = None
+        self.stale_checks = 0
+
+    def _build(self, conn, version):
+        started = time.monotonic()
+        with span('calendar_index'):
+            months = {month: n for month, n in conn.execute(
+                "SELECT year_month, COUNT(*) FROM Content GROUP BY year_month") if isinstance(month, str)}
+            # NULL / numeric / BLOB dates never match a 'YYYY-MM-DD' text comparison
+            days = sorted((day, n) for day, n in conn.execute(
+                "SELECT publish_date_approx, COUNT(*) FROM Content GROUP BY publish_date_approx")
+                if isinstance(day, str))
+        dates, prefix = [], [0]
+        for day, n in days:
+            dates.append(day)
+            prefix.append(prefix[-1] + n)
+        self.builds += 1
+        self.build_seconds = round(time.monotonic() - started, 3)
+        return version, months, dates, prefix
+
+    def _start_build(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # forked worker: the parent's builder thread does not exist here
+                self._pid, self._building = os.getpid(), False
+            if self._building:
+                return
+            self._building = True
+        threading.Thread(target=self.rebuild, name='calendar-index', daemon=True).start()
+
+    def rebuild(self):
+        """Build a snapshot on the calling thread (lookups start one in the background)."""
+        conn = None
+        try:
+            conn = self.pool.acquire()
+            conn.execute("BEGIN")
+            try:
+                snap = self._build(conn, read_data_version(conn, CONTENT_VERSION))
+            finally:
+                conn.rollback()
+            self._snapshot = snap
+        except Exception as e:
+            print(f"Calendar index rebuild failed: {e}")
+        finally:
+            if conn is not None:
+                self.pool.release(conn)
+            with self._lock:
+                self._building = False
+
+    def snapshot(self, conn):
+        """(snapshot, current): the previous snapshot is returned while a newer one is built."""
+        # Version first: rows written meanwhile only make the snapshot newer than its label
+        version = read_data_version(conn, CONTENT_VERSION)
+        snap = self._snapshot
+        if snap is not None and snap[0] == version:
+            return snap, True
+        if conn.in_transaction:
+            # uncommitted writes may still roll back: don't keep a snapshot of them
+            return self._build(conn, version), True
+        if snap is None:
+            with self._lock:
+                snap = self._snapshot
+                if snap is None:
+                    snap = self._snapshot = self._build(conn, version)
+            return snap, snap[0] == version
+        self._start_build()
+        return snap, False
+
+    def refresh(self, conn):
+        snap = self._snapshot
+        version = read_data_version(conn, CONTENT_VERSION)
+        if snap is None or snap[0] != version:
+            self._snapshot = self._build(conn, version)
+
+    def _confirm(self, conn, sql, params):
+        self.stale_checks += 1
+        return conn.execute(sql, params).fetchone()[0]
+
+    def month_rows(self, conn, year_month):
+        snap, current = self.snapshot(conn)
+        rows = snap[1].get(year_month, 0)
+        if rows or current:
+            return rows
+        return self._confirm(conn, "SELECT COUNT(*) FROM Content WHERE year_month = ?", (year_month,))
+
+    def date_rows(self, conn, date_str):
+        return self.range_rows(conn, date_str, date_str)
+
+    def range_rows(self, conn, start_date, end_date):
+        """Rows with start_date <= publish_date_approx <= end_date."""
+        if start_date > end_date:
+            return 0
+        (_, _, dates, prefix), current = self.snapshot(conn)
+        rows = prefix[bisect_right(dates, end_date)] - prefix[bisect_left(dates, start_date)]
+        if rows or current:
+            return rows
+        return self._confirm(conn, "SELECT COUNT(*) FROM Content WHERE publish_date_approx BETWEEN ? AND ?",
+                             (start_date, end_date))
+
+    def stats(self):
+        snap = self._snapshot
+        return {
+            "version": snap[0] if snap else None,
+            "months": len(snap[1]) if snap else 0,
+            "dates": len(snap[2]) if snap else 0,
+            "builds": self.builds,
+            "build_seconds": self.build_seconds,
+            "building": self._building,
+            "stale_checks": self.stale_checks,
+        }
+
+
+calendar_index = CalendarIndex(read_pool)
+
+### 维度查找缓存（dimension cache）
+# Stored country checks answered from the cache while their SQL is still this text
+DIMENSION_QUERIES = {
+    "hashtag_country_check": ("SELECT country_id FROM Country WHERE country_code = ?", lambda row: (row[0],)),
+    "trend_country_check": ("SELECT country_id FROM Country WHERE country_code = ?", lambda row: (row[0],)),
+    "pd_country_check": ("SELECT country_id, country_name FROM Country WHERE country_code = ?", lambda row: row),
+}
+
+
+def _text_key(value):
+    # TEXT columns compare an integer parameter as its decimal text
+    return str(int(value)) if isinstance(value, int) else value
+
+
+class DimensionCache:
+    """Country and Author lookups held in memory: code -> id, name -> code, region -> ids, handle -> id.
+
+    Both tables are loaded in full and reloaded on the next lookup after the
+    `dimensions` counter moves; ensure_country / ensure_author and the reseed
+    script bump it in the transaction that writes the rows.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self.loads = 0
+        self.hits = 0
+
+    def _load(self, conn, version):
+        countries, names, regions = {}, {}, {}
+        for country_id, code, name, region in conn.execute(
+                "SELECT country_id, country_code, country_name, region FROM Country ORDER BY country_id"):
+            # NULL codes / names / regions never match an `= ?` filter
+            if code is not None:
+                countries[code] = (country_id, name)
+            if name is not None:
+                names.setdefault(name, (country_id, code))
+            if region is not None:
+                regions.setdefault(region, []).append(country_id)
+        authors = dict(conn.execute("SELECT author_handle, author_id FROM Author WHERE author_handle IS NOT NULL"))
+        self.loads += 1
+        return {"version": version, "countries": countries, "names": names,
+                "regions": {region: tuple(ids) for region, ids in regions.items()}, "authors": authors}
+
+    def snapshot(self, conn):
+        version = read_data_version(conn, DIMENSIONS_VERSION)
+        snap = self._snapshot
+        if snap is not None and snap["version"] == version is not None:
+            self.hits += 1
+            return snap
+        if version is None or conn.in_transaction:
+            # No counter to detect writes with, or uncommitted writes that may still roll back: read fresh
+            return self._load(conn, version)
+        with self._lock:
+            snap = self._snapshot
+            if snap is None or snap["version"] != version:
+                snap = self._snapshot = self._load(conn, version)
+        return snap
+
+    def refresh(self, conn):
+        self.snapshot(conn)
+
+    def country(self, conn, country_code):
+        """(country_id, country_name) for a code, or None."""
+        return self.snapshot(conn)["countries"].get(_text_key(country_code))
+
+    def country_id(self, conn, country_code):
+        entry = self.country(conn, country_code)
+        return entry[0] if entry else None
+
+    def country_code(self, conn, country):
+        """Code of the first country (by id) whose name or code is `country`."""
+        snap = self.snapshot(conn)
+        country = _text_key(country)
+        matches = []
+        if country in snap["names"]:
+            matches.append(snap["names"][country])
+        if country in snap["countries"]:
+            matches.append((snap["countries"][country][0], country))
+        return min(matches)[1] if matches else None
+
+    def region_country_ids(self, conn, region):
+        return self.snapshot(conn)["regions"].get(_text_key(region), ())
+
+    def author_id(self, conn, author_handle):
+        return self.snapshot(conn)["authors"].get(_text_key(author_handle))
+
+    def lookup(self, conn, slug, sql, params, fetch='one'):
+        """Row for a DIMENSION_QUERIES slug, or NOT_ANSWERED to run the SQL instead."""
+        entry = DIMENSION_QUERIES.get(slug)
+        if entry is None or fetch != 'one' or len(params) != 1 or normalize_sql(sql) != normalize_sql(entry[0]):
+            return NOT_ANSWERED
+        row = self.country(conn, params[0])
+        return entry[1](row) if row else None
+
+    def stats(self):
+        snap = self._snapshot
+        return {
+            "version": snap["version"] if snap else None,
+            "countries": len(snap["countries"]) if snap else 0,
+            "authors": len(snap["authors"]) if snap else 0,
+            "loads": self.loads,
+            "hits": self.hits,
+        }
+
+
+dimension_cache = DimensionCache()
+
 ### 报告模板：表初始化与种子、渲染工具
 def init_report_template_table(conn):
     with conn:
@@ -55,23 +975,93 @@ def init_report_queries_table(conn):
         """)
 
 
+class QueryRegistry:
+    """In-process copy of report_queries keyed by slug.
+
+    All rows are loaded in one pass; the cache is dropped when upsert_report_query
+    writes locally, or when the `report_queries` counter in data_versions moves
+    (checked at most every `check_interval` seconds).
+    """
+
+    def __init__(self, check_interval=2.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._sql = None
+        self._variants = {}
+        self._version = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._sql = None
+            self._variants = {}
+
+    def _snapshot(self, conn):
+        """(slug -> SQL, formatted variants) of one report_queries version, taken under the lock."""
+        now = time.monotonic()
+        with self._lock:
+            if self._sql is None or now - self._checked_at >= self.check_interval:
+                version = read_data_version(conn, "report_queries")
+                if self._sql is None or version is None or version != self._version:
+                    rows = conn.execute("SELECT slug, sql_text FROM report_queries").fetchall()
+                    self._sql = {row[0]: row[1] for row in rows}
+                    self._variants = {}
+                    self._version = version
+                self._checked_at = now
+            return self._sql, self._variants
+
+    def get(self, conn, slug):
+        sql_map, _ = self._snapshot(conn)
+        sql = sql_map.get(slug)
+        if sql is None:
+            raise ValueError(f"SQL not found for slug: {slug}")
+        return sql
+
+    def has(self, conn, slug):
+        sql_map, _ = self._snapshot(conn)
+        return slug in sql_map
+
+    def get_variant(self, conn, slug, **fmt):
+        """SQL text with str.format placeholders filled, e.g. {tier_placeholders}."""
+        sql_map, variants = self._snapshot(conn)
+        sql_tpl = sql_map.get(slug)
+        if sql_tpl is None:
+            raise ValueError(f"SQL not found for slug: {slug}")
+        key = (slug, tuple(sorted(fmt.items())))
+        sql = variants.get(key)
+        if sql is None:
+            # an invalidate() meanwhile swaps in a new dict, so this never leaks into the next version
+            sql = variants[key] = sql_tpl.format(**fmt)
+        return sql
+
+
+query_registry = QueryRegistry(check_interval=float(os.environ.get('QUERY_CACHE_CHECK_SECS', 2.0)))
+
 def get_sql(conn, slug):
-    row = conn.execute("SELECT sql_text FROM report_queries WHERE slug=?", (slug,)).fetchone()
-    if not row:
-        raise ValueError(f"SQL not found for slug: {slug}")
-    return row[0]
+    return query_registry.get(conn, slug)
+
+def get_sql_variant(conn, slug, **fmt):
+    return query_registry.get_variant(conn, slug, **fmt)
+
+def get_analysis_sql(conn, slug, **fmt):
+    """SQL for an analysis query, preferring its `<slug>_rollup` variant while the rollups are current."""
+    if rollups_current(conn) and query_registry.has(conn, slug + ROLLUP_SUFFIX):
+        slug = slug + ROLLUP_SUFFIX
+    return get_sql_variant(conn, slug, **fmt) if fmt else get_sql(conn, slug)
 
 def upsert_report_query(conn, slug, sql_text, description):
     conn.execute(
         "INSERT OR REPLACE INTO report_queries (slug, sql_text, description) VALUES (?,?,?)",
         (slug, sql_text, description)
     )
+    query_registry.invalidate()
 
 def upsert_report_template(conn, slug, name, fmt, content, metadata_dict):
     conn.execute(
         "INSERT OR REPLACE INTO report_templates (slug, name, format, content, metadata) VALUES (?,?,?,?,?)",
         (slug, name, fmt, content, json.dumps(metadata_dict))
     )
+    template_store.invalidate()
 
 def _format_comma(value):
     try:
@@ -79,15 +1069,107 @@ def _format_comma(value):
     except Exception:
         return str(value)
 
-def _render_template_text(content, context):
+def _parse_template_fields(metadata):
+    if not metadata:
+        return []
+    try:
+        meta = json.loads(metadata)
+        fields = meta.get("fields", [])
+        return fields if isinstance(fields, list) else []
+    except Exception:
+        return []
+
+
+class ReportTemplateLoader(BaseLoader):
+    """Jinja loader serving report_templates rows held by ReportTemplateStore."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def get_source(self, environment, slug):
+        entry = self.store.entries.get(slug)
+        if entry is None:
+            raise TemplateNotFound(slug)
+        stamp = entry["stamp"]
+        # Jinja keeps the compiled template until the row's updated_at/content changes
+        return entry["content"], f"report_templates:{slug}", lambda: self.store.stamp_of(slug) == stamp
+
+
+class ReportTemplateStore:
+    """Shared Jinja Environment plus per-slug format and metadata.fields.
+
+    Rows are reloaded when upsert_report_template writes locally or when the
+    `report_templates` counter in data_versions moves; compiled templates are
+    only rebuilt for slugs whose (updated_at, content) changed.
+    """
+
+    def __init__(self, check_interval=2.0):
+        self.check_interval = check_interval
+        self.entries = {}
+        self._loaded = False
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        # 支持管道过滤器用法：{{ value | format_comma }}
+        self.env = Environment(
+            loader=ReportTemplateLoader(self),
+            autoescape=False, trim_blocks=True, lstrip_blocks=True,
+            auto_reload=True, cache_size=400,
+        )
+        self.env.filters['format_comma'] = _format_comma
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+
+    def stamp_of(self, slug):
+        entry = self.entries.get(slug)
+        return entry["stamp"] if entry else None
+
+    def _ensure_fresh(self, conn):
+        """slug -> entry of one report_templates version; checked and swapped under the lock."""
+        now = time.monotonic()
+        with self._lock:
+            if not self._loaded or now - self._checked_at >= self.check_interval:
+                version = read_data_version(conn, "report_templates")
+                if not self._loaded or version is None or version != self._version:
+                    rows = conn.execute(
+                        "SELECT slug, format, content, metadata, updated_at FROM report_templates"
+                    ).fetchall()
+                    # fully built before the single assignment that publishes it
+                    self.entries = {
+                        row[0]: {
+                            "format": row[1],
+                            "content": row[2],
+                            "fields": _parse_template_fields(row[3]),
+                            "stamp": (row[4], row[2]),
+                        }
+                        for row in rows
+                    }
+                    self._loaded = True
+                    self._version = version
+                self._checked_at = now
+            return self.entries
+
+    def get(self, conn, slug):
+        return self._ensure_fresh(conn).get(slug)
+
+    def get_template(self, conn, slug):
+        self._ensure_fresh(conn)
+        return self.env.get_template(slug)
+
+
+template_store = ReportTemplateStore(check_interval=float(os.environ.get('QUERY_CACHE_CHECK_SECS', 2.0)))
+
+def _render_compiled(template, context):
     # 将常用过滤器以变量形式注入模板上下文
     context = dict(context or {})
     context.setdefault('format_comma', _format_comma)
-    # 支持管道过滤器用法：{{ value | format_comma }}
-    env = Environment(autoescape=False, trim_blocks=True, lstrip_blocks=True)
-    env.filters['format_comma'] = _format_comma
-    template = env.from_string(content)
-    return template.render(**context)
+    with span('template'):
+        return template.render(**context)
+
+def _render_template_text(content, context):
+    return _render_compiled(template_store.env.from_string(content), context)
 
 
 
@@ -102,15 +1184,8 @@ def _is_missing(value):
     return False
 
 def get_required_fields_from_db(conn, slug):
-    row = conn.execute("SELECT metadata FROM report_templates WHERE slug=?", (slug,)).fetchone()
-    if not row or not row[0]:
-        return []
-    try:
-        meta = json.loads(row[0])
-        fields = meta.get("fields", [])
-        return fields if isinstance(fields, list) else []
-    except Exception:
-        return []
+    entry = template_store.get(conn, slug)
+    return entry["fields"] if entry else []
 
 def validate_context_fields_by_db(conn, slug, context):
     required = get_required_fields_from_db(conn, slug)
@@ -119,16 +1194,16 @@ def validate_context_fields_by_db(conn, slug, context):
         return f"Missing values for: {', '.join(missing)}. Please check your inputs and try again."
     return None
 def render_report_from_db(conn, slug, context):
-    row = conn.execute("SELECT format, content FROM report_templates WHERE slug=?", (slug,)).fetchone()
-    if not row:
+    entry = template_store.get(conn, slug)
+    if not entry:
         return {
             "text": "Template not found.",
             "markdown": None,
             "html": "<p>Template not found.</p>"
         }
-    fmt, content = row[0], row[1]
+    fmt = entry["format"]
 
-    base_text = _render_template_text(content, context)
+    base_text = _render_compiled(template_store.get_template(conn, slug), context)
     
     # 直接使用渲染后的文本
     processed_text = base_text
@@ -154,7 +1229,8 @@ def render_report_from_db(conn, slug, context):
         if markdown:
             # 先转换 markdown（将 **text** 转换为 <strong>text</strong>）
             # 使用extensions=['nl2br']来保留HTML标签，不转义
-            temp_html = markdown.markdown(processed_text, extensions=['nl2br'])
+            with span('markdown'):
+                temp_html = markdown.markdown(processed_text, extensions=['nl2br'])
             # 然后将所有 <strong> 标签转换为 <span class="highlight-data">
             html_out = convert_strong_to_span(temp_html)
         else:
@@ -181,7 +1257,8 @@ def render_report_from_db(conn, slug, context):
         if markdown:
             # 先转换 markdown（将 **text** 转换为 <strong>text</strong>）
             # 使用extensions=['nl2br']来保留HTML标签，不转义
-            temp_html = markdown.markdown(processed_text, extensions=['nl2br'])
+            with span('markdown'):
+                temp_html = markdown.markdown(processed_text, extensions=['nl2br'])
             # 然后将所有 <strong> 标签转换为 <span class="highlight-data">
             html_out = convert_strong_to_span(temp_html)
         else:
@@ -262,30 +1339,26 @@ def list_all_year_months(conn):
 
 def generate_global_analysis(conn, platform, year_month):
     with conn:
-        cursor = conn.cursor()
-        sql = get_sql(conn, "global_summary")
-        cursor.execute(sql, (platform, year_month))
-        total_content, total_views, total_likes, avg_engagement = cursor.fetchone()
+        # the four queries are independent: run them concurrently
+        params = (platform, year_month)
+        summary, top_countries, hashtag_result, category_results = query_fanout.run(conn, [
+            ("global_summary", get_analysis_sql(conn, "global_summary"), params, 'one'),
+            ("global_top_countries", get_analysis_sql(conn, "global_top_countries"), params, 'all'),
+            ("global_top_hashtag", get_analysis_sql(conn, "global_top_hashtag"), params, 'one'),
+            ("global_category_dist", get_analysis_sql(conn, "global_category_dist"), params, 'all'),
+        ])
+        total_content, total_views, total_likes, avg_engagement = summary
         if not total_content:
             return {"error": f"No data found for {platform} in {year_month}"}
         # None-safe aggregation values
         total_views = nz(total_views, 0)
         total_likes = nz(total_likes, 0)
         avg_engagement = 0.0 if avg_engagement is None else float(avg_engagement)
-        sql = get_sql(conn, "global_top_countries")
-        cursor.execute(sql, (platform, year_month))
-        top_countries = cursor.fetchall()
         country_names = [row[0] for row in top_countries]
         country_views = [nz(row[1], 0) for row in top_countries]
-        sql = get_sql(conn, "global_top_hashtag")
-        cursor.execute(sql, (platform, year_month))
-        hashtag_result = cursor.fetchone()
         top_hashtag = hashtag_result[0] if hashtag_result else "N/A"
         
         # Category distribution data for right chart
-        sql = get_sql(conn, "global_category_dist")
-        cursor.execute(sql, (platform, year_month))
-        category_results = cursor.fetchall()
         category_names = [row[0] for row in category_results]
         category_views = [nz(row[1], 0) for row in category_results]
         
@@ -351,17 +1424,14 @@ def generate_hashtag_report(conn, platform, country_code, min_views):
     """Generate hashtag report"""
     try:
         with conn:
-            cur = conn.cursor()
             sql = get_sql(conn, "hashtag_country_check")
-            cur.execute(sql, (country_code,))
-            country_result = cur.fetchone()
+            country_result = run_query(conn, "hashtag_country_check", sql, (country_code,), 'one')
             if not country_result:
                 return {"error": f"Error: No data found for country code '{country_code}'"}
             country_id = country_result[0]
 
-            sql = get_sql(conn, "hashtag_main")
-            cur.execute(sql, (platform, country_id, min_views))
-            results = cur.fetchall()
+            sql = get_analysis_sql(conn, "hashtag_main")
+            results = run_query(conn, "hashtag_main", sql, (platform, country_id, min_views))
 
             if not results:
                 return {"error": f"No hashtags found on {platform} in {country_code} with total views exceeding {min_views}"}
@@ -412,17 +1482,14 @@ def generate_trend_report(conn, platform, country_code, start_date, end_date):
     """Generate trend type view distribution report"""
     try:
         with conn:
-            cur = conn.cursor()
             sql = get_sql(conn, "trend_country_check")
-            cur.execute(sql, (country_code,))
-            country_data = cur.fetchone()
+            country_data = run_query(conn, "trend_country_check", sql, (country_code,), 'one')
             if not country_data:
                 return {"error": f"Error: No records found for country code '{country_code}'"}
             country_id = country_data[0]
 
             sql = get_sql(conn, "trend_main")
-            cur.execute(sql, (platform, country_id, start_date, end_date))
-            results = cur.fetchall()
+            results = run_query(conn, "trend_main", sql, (platform, country_id, start_date, end_date))
 
             if not results:
                 return {"error": f"No trend data found on {platform} in {country_code} between {start_date} and {end_date}"}
@@ -484,19 +1551,26 @@ def median_of(values):
         return data[mid]
     return (data[mid - 1] + data[mid]) / 2
 
+def indexed_median(conn, metric, country_id, platform, n):
+    """Median of the n non-null values via ORDER BY/LIMIT/OFFSET; same result as median_of()."""
+    if not n:
+        return 0
+    slug = "pd_median_" + metric
+    sql = get_sql(conn, slug)
+    middle = [r[0] for r in run_query(conn, slug, sql, (country_id, platform, 2 - n % 2, (n - 1) // 2))]
+    if len(middle) != 2 - n % 2:
+        # n came from the rollups or an earlier read and rows were deleted since:
+        # take the median of every current value instead
+        return median_of(r[0] for r in run_query(conn, slug, sql, (country_id, platform, -1, 0)))
+    return middle[0] if n % 2 == 1 else (middle[0] + middle[1]) / 2
+
 def validate_year_month_exists(conn, year_month):
     """Check if year_month exists in the database"""
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM Content WHERE year_month = ?", (year_month,))
-    count = cursor.fetchone()[0]
-    return count > 0
+    return calendar_index.month_rows(conn, year_month) > 0
 
 def validate_date_exists(conn, date_str):
     """Check if a date (YYYY-MM-DD) exists in the database"""
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM Content WHERE publish_date_approx = ?", (date_str,))
-    count = cursor.fetchone()[0]
-    return count > 0
+    return calendar_index.date_rows(conn, date_str) > 0
 
 def validate_year_month(conn, year_month):
     """Validate single year_month: format and existence in DB"""
@@ -554,21 +1628,14 @@ def validate_date_range_full(conn, start_date, end_date):
         return "start_date must be earlier than end_date"
     
     # Validate dates exist in database (check if any content exists in the date range)
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM Content WHERE publish_date_approx >= ? AND publish_date_approx <= ?", 
-                   (start_date, end_date))
-    count = cursor.fetchone()[0]
-    if count == 0:
+    if calendar_index.range_rows(conn, start_date, end_date) == 0:
         return f"No data found between '{start_date}' and '{end_date}' in the database"
     
     return None  # All validations passed
 
 def generate_creator_performance(conn, platform, creator_scope, start_month, end_month):
     with conn:
-        cursor = conn.cursor()
-        # total views
-        sql_total = get_sql(conn, "creator_total_views")
-        total_views = cursor.execute(sql_total, (platform, start_month, end_month)).fetchone()[0] or 0
+        sql_total = get_analysis_sql(conn, "creator_total_views")
         time_frame = f"{start_month} to {end_month}"
         tier_map = {
             "All (all tiers)": ["Micro", "Mid", "Macro", "Star"],
@@ -579,18 +1646,23 @@ def generate_creator_performance(conn, platform, creator_scope, start_month, end
         }
         target_tiers = tier_map.get(creator_scope, ["Micro", "Mid", "Macro", "Star"])
         placeholders = ", ".join(["?"] * len(target_tiers))
-        sql_tpl = get_sql(conn, "creator_tier_agg")
-        sql = sql_tpl.format(tier_placeholders=placeholders)
+        sql = get_analysis_sql(conn, "creator_tier_agg", tier_placeholders=placeholders)
         params = [platform] + target_tiers + [start_month, end_month]
-        rows = cursor.execute(sql, params).fetchall()
+        queries = [
+            ("creator_total_views", sql_total, (platform, start_month, end_month), 'one'),
+            ("creator_tier_agg", sql, params, 'all'),
+        ]
+        if len(target_tiers) == 1:
+            # For single tier, also query the monthly breakdown
+            sql_monthly = get_analysis_sql(conn, "creator_single_tier_monthly")
+            queries.append(("creator_single_tier_monthly", sql_monthly, (platform, target_tiers[0], start_month, end_month), 'all'))
+        results = query_fanout.run(conn, queries)
+        total_views = results[0][0] or 0
+        rows = results[1]
         
-        # For single tier, query monthly trend
         monthly_data = []
         if len(target_tiers) == 1:
-            # Query monthly breakdown for the single tier
-            sql_monthly = get_sql(conn, "creator_single_tier_monthly")
-            monthly_rows = cursor.execute(sql_monthly, (platform, target_tiers[0], start_month, end_month)).fetchall()
-            monthly_data = [{"month": r[0], "views": int(r[1] or 0), "count": int(r[2] or 0)} for r in monthly_rows]
+            monthly_data = [{"month": r[0], "views": int(r[1] or 0), "count": int(r[2] or 0)} for r in results[2]]
         
         # Build tier details as raw data list (only data, template has sentence structure)
         tiers = []
@@ -647,11 +1719,19 @@ def generate_creator_performance(conn, platform, creator_scope, start_month, end
             "error": ""
         }
 
+# Default region_engagement_main texts: both join Country on the region, so a region
+# with no countries has no rows and the dimension cache can answer that without SQL
+REGION_DEFAULT_SQL = {
+    normalize_sql(COLUMNAR_QUERIES["region_engagement_main"][0]),
+    normalize_sql(ROLLUP_QUERIES["region_engagement_main"]),
+}
+
 def generate_region_ad_recommendation(conn, region):
     with conn:
-        cursor = conn.cursor()
-        sql = get_sql(conn, "region_engagement_main")
-        rows = cursor.execute(sql, (region,)).fetchall()
+        sql = get_analysis_sql(conn, "region_engagement_main")
+        if normalize_sql(sql) in REGION_DEFAULT_SQL and not dimension_cache.region_country_ids(conn, region):
+            return {"error": f"No data found for {region} region"}
+        rows = run_query(conn, "region_engagement_main", sql, (region,))
         if not rows:
             return {"error": f"No data found for {region} region"}
         # split by platform
@@ -733,22 +1813,21 @@ def generate_region_ad_recommendation(conn, region):
 
 def generate_platform_dominance_extended(conn, country_code):
     with conn:
-        cursor = conn.cursor()
         # country check
         sql = get_sql(conn, "pd_country_check")
-        row = cursor.execute(sql, (country_code,)).fetchone()
+        row = run_query(conn, "pd_country_check", sql, (country_code,), 'one')
         if not row:
             return {"error": f"Error: No data found for country code '{country_code}'"}
         country_id, country_name = row[0], row[1]
         # agg
-        sql = get_sql(conn, "pd_agg_by_country")
-        platform_data = cursor.execute(sql, (country_id,)).fetchall()
+        sql = get_analysis_sql(conn, "pd_agg_by_country")
+        platform_data = run_query(conn, "pd_agg_by_country", sql, (country_id,))
         if len(platform_data) < 2:
             available = [r[0] for r in platform_data]
             return {"error": f"Error: Only found data for {available} in {country_name}, need both platforms for comparison"}
-        # details
-        sql = get_sql(conn, "pd_details_by_country")
-        detail_rows = cursor.execute(sql, (country_id,)).fetchall()
+        # non-null counts per platform; the medians are then read off the index
+        sql = get_analysis_sql(conn, "pd_median_counts")
+        median_counts = {r[0]: r[1:] for r in run_query(conn, "pd_median_counts", sql, (country_id,))}
         # build dicts
         data = {}
         for r in platform_data:
@@ -766,26 +1845,11 @@ def generate_platform_dominance_extended(conn, country_code):
                 "median_engagement_per_1k": 0.0,
                 "median_completion_rate": 0.0
             }
-        # medians
-        tik_er = []
-        tik_e1k = []
-        tik_comp = []
-        yt_er = []
-        yt_e1k = []
-        yt_comp = []
-        for plat, er, e1k, likes, comments, shares, comp in detail_rows:
-            if plat == "TikTok":
-                tik_er.append(er); tik_e1k.append(e1k); tik_comp.append(comp)
-            elif plat == "YouTube":
-                yt_er.append(er); yt_e1k.append(e1k); yt_comp.append(comp)
-        if "TikTok" in data:
-            data["TikTok"]["median_engagement_rate"] = median_of(tik_er)
-            data["TikTok"]["median_engagement_per_1k"] = median_of(tik_e1k)
-            data["TikTok"]["median_completion_rate"] = median_of(tik_comp)
-        if "YouTube" in data:
-            data["YouTube"]["median_engagement_rate"] = median_of(yt_er)
-            data["YouTube"]["median_engagement_per_1k"] = median_of(yt_e1k)
-            data["YouTube"]["median_completion_rate"] = median_of(yt_comp)
+        for platform in ("TikTok", "YouTube"):
+            if platform in data:
+                counts = median_counts.get(platform, (0,) * len(MEDIAN_METRICS))
+                for metric, n in zip(MEDIAN_METRICS, counts):
+                    data[platform]["median_" + metric] = indexed_median(conn, metric, country_id, platform, n)
         # extract
         t = data.get("TikTok", {})
         y = data.get("YouTube", {})
@@ -854,61 +1918,135 @@ def generate_platform_dominance_extended(conn, country_code):
             "error": ""
         }
 
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+def generate_percentiles(conn, platform, start_month, end_month, country_code=None, quantiles=DEFAULT_QUANTILES):
+    """Percentiles of engagement_rate / completion_rate / engagement_per_1k for a platform, month range and optional country.
+
+    Merges the stored per-month sketches (one row per month and country) instead of scanning Content;
+    while the sketches are stale the same sketch is built from the matching Content rows.
+    """
+    country_id = None
+    if country_code:
+        row = run_query(conn, "pd_country_check", get_sql(conn, "pd_country_check"), (country_code,), 'one')
+        if not row:
+            return {"error": f"Error: No data found for country code '{country_code}'"}
+        country_id = row[0]
+    params = (platform, country_id, country_id, start_month, end_month)
+    if rollups_current(conn):
+        count, sketches = merge_sketches(run_query(conn, "percentile_sketches", get_sql(conn, "percentile_sketches"), params))
+        source = "sketch"
+    else:
+        count, sketches = sketch_values(run_query(conn, "percentile_values", get_sql(conn, "percentile_values"), params))
+        source = "content"
+    if count == 0:
+        return {"error": f"Error: No data for {platform} between {start_month} and {end_month}"}
+    return {
+        "platform": platform,
+        "country_code": country_code,
+        "start_month": start_month,
+        "end_month": end_month,
+        "count": count,
+        "percentiles": {
+            metric: {f"p{q * 100:g}": sketch.quantile(q) for q in quantiles}
+            for metric, sketch in sketches.items()
+        },
+        "relative_accuracy": RELATIVE_ACCURACY,
+        "source": source,
+        "error": ""
+    }
+
 def get_country_code(conn, country):
     """Get country code by name, fall back to checking if input is already a code."""
-    cur = conn.cursor()
-    # Try by name or code
-    cur.execute("SELECT country_code FROM Country WHERE country_name = ? OR country_code = ?", (country, country))
-    row = cur.fetchone()
-    return row[0] if row else None
+    return dimension_cache.country_code(conn, country)
 
 
-def generate_publish_timing_analysis(conn, platform, time_analysis='Hourly', period='All Time', start_month=None, end_month=None):
+PUBLISH_TIMING_MODES = ('Hourly', 'Day Parts', 'Week Analysis', 'Heatmap')
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+DAY_PARTS = ('Morning', 'Afternoon', 'Evening', 'Night')
 
-    cursor = conn.cursor()
+def in_canonical_order(values, order):
+    """`values` in the order of `order`, then any unknown ones alphabetically."""
+    rank = {value: i for i, value in enumerate(order)}
+    return sorted(values, key=lambda v: (rank.get(v, len(order)), v))
+
+def generate_publish_timing_analysis(conn, platform, time_analysis='Hourly', period='All Time', start_month=None, end_month=None,
+                                     time_slots=DEFAULT_TIME_SLOTS):
+    """Every mode folds the same publish-timing cube: one rollup read (or one Content scan while stale)."""
     period_display = "All Time"
     
     # Build date filter
-    date_filter = ""
-    params = [platform]
+    months = (None, None)
     # If start_month and end_month are provided, use them regardless of period parameter
     if start_month and end_month:
-        date_filter = " AND c.year_month BETWEEN ? AND ?"
-        params.extend([start_month, end_month])
+        months = (start_month, end_month)
         period_display = f"{start_month} to {end_month}"
     elif period == 'Custom':
         # If period is Custom but dates are missing, this is an error case
         pass
     
-    # Process based on time_analysis dimension
-    if time_analysis == 'Hourly':
-        return _process_hourly_analysis(cursor, conn, platform, period_display, date_filter, params)
-    elif time_analysis == 'Day Parts':
-        return _process_dayparts_analysis(cursor, conn, platform, period_display, date_filter, params)
-    elif time_analysis == 'Week Analysis':
-        return _process_week_analysis(cursor, conn, platform, period_display, date_filter, params)
-    else:
-        return {"error": f"Invalid time_analysis: {time_analysis}. Must be 'Hourly', 'Day Parts', or 'Week Analysis'"}
-
+    if time_analysis not in PUBLISH_TIMING_MODES:
+        return {"error": f"Invalid time_analysis: {time_analysis}. Must be 'Hourly', 'Day Parts', 'Week Analysis' or 'Heatmap'"}
 
-def _process_hourly_analysis(cursor, conn, platform, period_display, date_filter, params):
-    """Process hourly analysis"""
-    # Get SQL query from database
     try:
-        sql = get_sql(conn, 'publish_timing_hourly')
-        # Add date filter if needed
-        if date_filter:
-            sql = sql.replace('WHERE c.platform = ?', 
-                            f'WHERE c.platform = ?{date_filter}')
+        sql = get_analysis_sql(conn, 'publish_timing_cube')
     except ValueError as e:
         return {"error": f"SQL query not found: {e}"}
-
     try:
-        cursor.execute(sql, tuple(params))
-        rows = cursor.fetchall()
+        cells = run_query(conn, 'publish_timing_cube', sql, (platform, months[0], months[0], months[1]))
     except Error as e:
         return {"error": f"Database query error: {e}"}
 
+    # Process based on time_analysis dimension
+    if time_analysis == 'Hourly':
+        return _process_hourly_analysis(conn, platform, period_display, fold_timing_cube(cells, 0), time_slots)
+    elif time_analysis == 'Day Parts':
+        rows = {row[0]: row for row in fold_timing_cube(cells, 1)}
+        rows = [rows[part] for part in in_canonical_order(rows, DAY_PARTS)]
+        return _process_dayparts_analysis(conn, platform, period_display, rows)
+    elif time_analysis == 'Week Analysis':
+        rows = {row[0]: row for row in fold_timing_cube(cells, 2)}
+        rows = [rows[day] for day in in_canonical_order(rows, WEEKDAYS)]
+        return _process_week_analysis(conn, platform, period_display, rows)
+    return _process_heatmap_analysis(conn, platform, period_display, fold_timing_cube(cells, 0, 2))
+
+
+def fold_timing_cube(cells, *dims):
+    """Sum publish_timing_cube cells over everything but `dims` (0 hour, 1 period, 2 weekday).
+
+    Returns one (key..., count, views, avg engagement, max engagement, min engagement,
+    avg completion) row per key in key order. Cells with a NULL key are left out,
+    like the IS NOT NULL filters and the Device join of the per-mode queries.
+    """
+    groups = {}
+    for cell in cells:
+        key = tuple(cell[d] for d in dims)
+        if None in key:
+            continue
+        n, views, eng_sum, eng_n, eng_max, eng_min, comp_sum, comp_n = cell[3:]
+        g = groups.get(key)
+        if g is None:
+            groups[key] = [n, views, eng_sum, eng_n, eng_max, eng_min, comp_sum, comp_n]
+            continue
+        g[0] += n
+        g[1] += views
+        g[2] += eng_sum
+        g[3] += eng_n
+        g[4] = eng_max if g[4] is None else g[4] if eng_max is None else max(g[4], eng_max)
+        g[5] = eng_min if g[5] is None else g[5] if eng_min is None else min(g[5], eng_min)
+        g[6] += comp_sum
+        g[7] += comp_n
+    rows = []
+    # numbers sort before text, as in SQLite
+    for key in sorted(groups, key=lambda k: [(isinstance(v, str), v) for v in k]):
+        n, views, eng_sum, eng_n, eng_max, eng_min, comp_sum, comp_n = groups[key]
+        rows.append(key + (n, views, eng_sum / eng_n if eng_n else None, eng_max, eng_min,
+                           comp_sum / comp_n if comp_n else None))
+    return rows
+
+
+def _process_hourly_analysis(conn, platform, period_display, rows, time_slots=DEFAULT_TIME_SLOTS):
+    """Process hourly analysis"""
     if not rows:
         return {
             "platform": platform,
@@ -929,7 +2067,7 @@ def _process_hourly_analysis(cursor, conn, platform, period_display, date_filter
     eng_diff_pct = []
 
     for row in rows:
-        hour, engagement, max_eng, min_eng, views, completion, count = row
+        hour, count, views, engagement, max_eng, min_eng, completion = row
         if hour is not None and 0 <= hour <= 23:
             hours.append(int(hour))
             eng_pct = round((engagement * 100) if engagement else 0, 2)
@@ -951,59 +2089,17 @@ def _process_hourly_analysis(cursor, conn, platform, period_display, date_filter
         }
     
     # Calculate metrics
-    avg_eng_total = round(sum(engagement_rates) / len(engagement_rates), 2)
-    eng_diff_pct = [round((eng - avg_eng_total) / avg_eng_total * 100, 1) if avg_eng_total > 0 else 0 for eng in engagement_rates]
-    peak_idx = eng_diff_pct.index(max(eng_diff_pct))
-    valley_idx = eng_diff_pct.index(min(eng_diff_pct))
-    max_diff = max(abs(d) for d in eng_diff_pct)
+    stats = bucket_stats(engagement_rates)
+    avg_eng_total, eng_diff_pct = stats.average, stats.diff_pct
+    peak_idx, valley_idx = stats.peak, stats.valley
 
     # Time segment analysis
-    time_slots = ['Late Night (0-4)', 'Early Morning (5-8)', 'Morning (9-11)',
-                 'Afternoon (12-16)', 'Evening (17-20)', 'Night (21-23)']
-    slot_diff = []
-    slot_eng = []
-    slot_counts = []
-
-    for i, slot in enumerate(time_slots):
-        if i == 0:
-            slot_hours = [h for h in hours if 0 <= h <= 4]
-        elif i == 1:
-            slot_hours = [h for h in hours if 5 <= h <= 8]
-        elif i == 2:
-            slot_hours = [h for h in hours if 9 <= h <= 11]
-        elif i == 3:
-            slot_hours = [h for h in hours if 12 <= h <= 16]
-        elif i == 4:
-            slot_hours = [h for h in hours if 17 <= h <= 20]
-        else:
-            slot_hours = [h for h in hours if 21 <= h <= 23]
-
-        if slot_hours:
-            slot_diff_val = sum(eng_diff_pct[hours.index(h)] for h in slot_hours) / len(slot_hours)
-            slot_eng_val = sum(engagement_rates[hours.index(h)] for h in slot_hours) / len(slot_hours)
-            slot_count_val = sum(content_counts[hours.index(h)] for h in slot_hours)
-        else:
-            slot_diff_val = 0
-            slot_eng_val = 0
-            slot_count_val = 0
-
-        slot_diff.append(round(slot_diff_val, 1))
-        slot_eng.append(round(slot_eng_val, 2))
-        slot_counts.append(slot_count_val)
-
-    best_segment_idx = slot_diff.index(max(slot_diff)) if slot_diff else 0
-    best_segment = time_slots[best_segment_idx].split(' (')[0] if slot_diff else ""
+    slots = slot_stats(hours, engagement_rates, eng_diff_pct, content_counts, time_slots)
+    best_slot = max(slots, key=lambda s: s.diff)
+    best_segment = best_slot.slot.label
     
     # Prepare segment data for template
-    segment_data = []
-    for i in range(len(time_slots)):
-        if slot_counts[i] > 0:
-            segment_name = time_slots[i].split(' (')[0]
-            segment_data.append({
-                "name": segment_name,
-                "diff": slot_diff[i],
-                "eng": slot_eng[i]
-            })
+    segment_data = [{"name": s.slot.label, "diff": s.diff, "eng": s.eng} for s in slots if s.count > 0]
     
     # Pass raw data to template instead of pre-generated text
     context = {
@@ -1018,7 +2114,7 @@ def _process_hourly_analysis(cursor, conn, platform, period_display, date_filter
         "valley_eng_rate": engagement_rates[valley_idx] if engagement_rates else 0,
         "valley_diff_pct": eng_diff_pct[valley_idx] if eng_diff_pct else 0,
         "best_segment": best_segment,
-        "best_segment_diff": slot_diff[best_segment_idx] if slot_diff else 0,
+        "best_segment_diff": best_slot.diff,
         "segment_data": segment_data
     }
     
@@ -1051,30 +2147,19 @@ def _process_hourly_analysis(cursor, conn, platform, period_display, date_filter
             "eng_diff_pct": eng_diff_pct,
             "content_counts": content_counts,
             "peak_hour": hours[peak_idx] if hours else None,
-            "valley_hour": hours[valley_idx] if hours else None
+            "valley_hour": hours[valley_idx] if hours else None,
+            "time_slots": [
+                {"name": s.slot.label, "start": s.slot.start, "end": s.slot.end,
+                 "eng": s.eng, "diff": s.diff, "content_count": s.count}
+                for s in slots
+            ]
         },
         "error": ""
     }
 
 
-def _process_dayparts_analysis(cursor, conn, platform, period_display, date_filter, params):
+def _process_dayparts_analysis(conn, platform, period_display, rows):
     """Process day parts analysis"""
-    # Get SQL query from database
-    try:
-        sql = get_sql(conn, 'publish_timing_dayparts')
-        # Add date filter if needed
-        if date_filter:
-            sql = sql.replace('WHERE c.platform = ? AND c.publish_period IS NOT NULL',
-                            f'WHERE c.platform = ? AND c.publish_period IS NOT NULL{date_filter}')
-    except ValueError as e:
-        return {"error": f"SQL query not found: {e}"}
-    
-    try:
-        cursor.execute(sql, tuple(params))
-        rows = cursor.fetchall()
-    except Error as e:
-        return {"error": f"Database query error: {e}"}
-    
     if not rows:
         return {
             "platform": platform,
@@ -1093,7 +2178,7 @@ def _process_dayparts_analysis(cursor, conn, platform, period_display, date_filt
     content_counts = []
     
     for row in rows:
-        period, engagement, count = row
+        period, count, _, engagement = row[:4]
         if period:
             periods.append(period)
             eng_pct = round((engagement * 100) if engagement else 0, 2)
@@ -1113,15 +2198,13 @@ def _process_dayparts_analysis(cursor, conn, platform, period_display, date_filt
         }
     
     # Calculate metrics
-    avg_eng_total = round(sum(engagement_rates) / len(engagement_rates), 2)
-    eng_diff_pct = [round((eng - avg_eng_total) / avg_eng_total * 100, 1) if avg_eng_total > 0 else 0 for eng in engagement_rates]
-    max_diff = max(abs(d) for d in eng_diff_pct)
+    stats = bucket_stats(engagement_rates)
+    avg_eng_total, eng_diff_pct = stats.average, stats.diff_pct
     
     # Get top 3 and best/worst
-    sorted_indices = sorted(range(len(eng_diff_pct)), key=lambda i: eng_diff_pct[i], reverse=True)
-    top3_indices = sorted_indices[:3]
-    best_idx = sorted_indices[0]
-    worst_idx = sorted_indices[-1]
+    top3_indices = stats.ranking[:3]
+    best_idx = stats.ranking[0]
+    worst_idx = stats.ranking[-1]
     
     best_period_name = periods[best_idx]
     best_period_diff = eng_diff_pct[best_idx]
@@ -1184,24 +2267,8 @@ def _process_dayparts_analysis(cursor, conn, platform, period_display, date_filt
     }
 
 
-def _process_week_analysis(cursor, conn, platform, period_display, date_filter, params):
+def _process_week_analysis(conn, platform, period_display, rows):
     """Process week analysis"""
-    # Get SQL query from database
-    try:
-        sql = get_sql(conn, 'publish_timing_week')
-        # Add date filter if needed
-        if date_filter:
-            sql = sql.replace('WHERE c.platform = ? AND c.publish_dayofweek IS NOT NULL',
-                            f'WHERE c.platform = ? AND c.publish_dayofweek IS NOT NULL{date_filter}')
-    except ValueError as e:
-        return {"error": f"SQL query not found: {e}"}
-    
-    try:
-        cursor.execute(sql, tuple(params))
-        rows = cursor.fetchall()
-    except Error as e:
-        return {"error": f"Database query error: {e}"}
-    
     if not rows:
         return {
             "platform": platform,
@@ -1220,7 +2287,7 @@ def _process_week_analysis(cursor, conn, platform, period_display, date_filter,
     content_counts = []
     
     for row in rows:
-        day, engagement, count = row
+        day, count, _, engagement = row[:4]
         if day:
             days.append(day)
             eng_pct = round((engagement * 100) if engagement else 0, 2)
@@ -1240,15 +2307,13 @@ def _process_week_analysis(cursor, conn, platform, period_display, date_filter,
         }
     
     # Calculate metrics
-    avg_eng_total = round(sum(engagement_rates) / len(engagement_rates), 2)
-    eng_diff_pct = [round((eng - avg_eng_total) / avg_eng_total * 100, 1) if avg_eng_total > 0 else 0 for eng in engagement_rates]
-    max_diff = max(abs(d) for d in eng_diff_pct)
+    stats = bucket_stats(engagement_rates)
+    avg_eng_total, eng_diff_pct = stats.average, stats.diff_pct
     
     # Get top 3 and best/worst
-    sorted_indices = sorted(range(len(eng_diff_pct)), key=lambda i: eng_diff_pct[i], reverse=True)
-    top3_indices = sorted_indices[:3]
-    best_idx = sorted_indices[0]
-    worst_idx = sorted_indices[-1]
+    top3_indices = stats.ranking[:3]
+    best_idx = stats.ranking[0]
+    worst_idx = stats.ranking[-1]
     
     best_day_name = days[best_idx]
     best_day_diff = eng_diff_pct[best_idx]
@@ -1324,7 +2389,208 @@ def _process_week_analysis(cursor, conn, platform, period_display, date_filter,
         "error": ""
     }
 
+def _process_heatmap_analysis(conn, platform, period_display, rows):
+    """Process hour x day-of-week heatmap (API only: data matrix and peak / valley, no report text)"""
+    grid = {}
+    for row in rows:
+        hour, day, count, _, engagement = row[:5]
+        if day and 0 <= hour <= 23:
+            grid[(int(hour), day)] = (round((engagement * 100) if engagement else 0, 2), int(count or 0))
+
+    if not grid:
+        return {
+            "platform": platform,
+            "time_analysis": "Heatmap",
+            "period_display": period_display,
+            "report": "",
+            "report_markdown": None,
+            "report_html": None,
+            "data": None,
+            "error": "No data available for the selected criteria."
+        }
+
+    hours = sorted({hour for hour, _ in grid})
+    days = in_canonical_order({day for _, day in grid}, WEEKDAYS)
+    # rows are days, columns are hours; None where no content was published
+    engagement_rates = [[grid[(hour, day)][0] if (hour, day) in grid else None for hour in hours] for day in days]
+    content_counts = [[grid[(hour, day)][1] if (hour, day) in grid else 0 for hour in hours] for day in days]
+
+    # Calculate metrics
+    cells = list(grid)
+    stats = bucket_stats([grid[cell][0] for cell in cells])
+    peak_hour, peak_day = cells[stats.peak]
+    valley_hour, valley_day = cells[stats.valley]
+
+    # API-only mode: the report templates and charts cover the other three modes
+    return {
+        "platform": platform,
+        "time_analysis": "Heatmap",
+        "period_display": period_display,
+        "report": "",
+        "report_markdown": None,
+        "report_html": None,
+        "data": {
+            "hours": hours,
+            "days": days,
+            "engagement_rates": engagement_rates,
+            "content_counts": content_counts,
+            "avg_eng_total": stats.average,
+            "peak_hour": peak_hour,
+            "peak_day": peak_day,
+            "peak_diff_pct": stats.diff_pct[stats.peak],
+            "valley_hour": valley_hour,
+            "valley_day": valley_day,
+            "valley_diff_pct": stats.diff_pct[stats.valley]
+        },
+        "error": ""
+    }
+
+### 分析结果缓存
+class ResponseCache:
+    """LRU cache of serialized API responses bounded by entry count, bytes and TTL.
+
+    Each entry remembers the data_versions snapshot it was built from; a lookup
+    made under a different snapshot is a miss and drops the stale entry.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=32 * 1024 * 1024, ttl=300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (body, versions, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def _drop(self, key):
+        body, _, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def get(self, key, versions):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                body, entry_versions, expires_at = entry
+                if entry_versions == versions and expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return body
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, versions, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (body, versions, time.monotonic() + self.ttl)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 512)),
+    max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024)),
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', 300)),
+)
+
+class CountCache:
+    """Small LRU of COUNT(*) results, each valid only for the content version it was counted at."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (version, total)
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version, total):
+        with self._lock:
+            self._entries[key] = (version, total)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+content_count_cache = CountCache()
+
+def _normalize_params(value):
+    # Key order and explicit nulls never change a route's output (data.get() treats them alike)
+    if isinstance(value, dict):
+        return {str(k): _normalize_params(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_normalize_params(v) for v in value]
+    return value
+
+def response_cache_key(endpoint, body):
+    params = _normalize_params(body if isinstance(body, dict) else {})
+    return endpoint + "|" + json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+
+def cached_response(view):
+    """Serve a POST analysis route from response_cache, keyed by endpoint + normalized body."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not response_cache.enabled:
+            return view(*args, **kwargs)
+        key = response_cache_key(request.path, request.get_json(silent=True))
+        versions = tuple(sorted(read_data_versions(get_db()).items()))
+        body = response_cache.get(key, versions)
+        response_cache_lookups.inc((request.path, 'miss' if body is None else 'hit'))
+        if body is not None:
+            resp = app.response_class(body, mimetype=app.json.mimetype)
+            resp.headers['X-Cache'] = 'HIT'
+            return resp
+        resp = app.make_response(view(*args, **kwargs))
+        # never cache the error body of a query aborted by a disconnect
+        if resp.status_code == 200 and resp.mimetype == app.json.mimetype and not queries_cancelled():
+            response_cache.put(key, versions, resp.get_data())
+        resp.headers['X-Cache'] = 'MISS'
+        return resp
+    return wrapper
+
+
 ### Flask routes
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint (per worker process)"""
+    return app.response_class(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/')
 def index():
     """Frontend main page - Login page"""
@@ -1333,28 +2599,26 @@ def index():
 @app.route('/api/platforms', methods=['GET'])
 def get_platforms():
     """API: Get all platforms"""
-    conn = create_connection()
+    conn = get_db()
     data = list_all_platforms(conn)
-    conn.close()
     return jsonify(data)
 
 @app.route('/api/countries', methods=['GET'])
 def get_countries():
     """API: Get all countries"""
-    conn = create_connection()
+    conn = get_db()
     data = list_all_countries(conn)
-    conn.close()
     return jsonify(data)
 
 @app.route('/api/year-months', methods=['GET'])
 def get_year_months():
     """API: Get all available year-month combinations"""
-    conn = create_connection()
+    conn = get_db()
     data = list_all_year_months(conn)
-    conn.close()
     return jsonify(data)
 
 @app.route('/api/global-analysis', methods=['POST'])
+@cached_response
 def global_analysis():
     """API: Global analysis report"""
     data = request.json
@@ -1368,21 +2632,19 @@ def global_analysis():
     if not year_month:
         return jsonify({"error": "Please provide year_month in format 'YYYY-MM'"})
     
-    conn = create_connection()
-    try:
-        # Validate year_month (format and existence)
-        validation_error = validate_year_month(conn, year_month)
-        if validation_error:
-            return jsonify({"error": validation_error})
-        
-        result = generate_global_analysis(conn, platform, year_month)
-        return jsonify(result)
-    finally:
-        conn.close()
+    conn = get_db()
+    # Validate year_month (format and existence)
+    validation_error = validate_year_month(conn, year_month)
+    if validation_error:
+        return jsonify({"error": validation_error})
+    
+    result = generate_global_analysis(conn, platform, year_month)
+    return jsonify(result)
 
 # removed /api/platform-dominance endpoint per request
 
 @app.route('/api/hashtag-report', methods=['POST'])
+@cached_response
 def hashtag_report():
     """API: Hashtag report"""
     data = request.json
@@ -1398,12 +2660,12 @@ def hashtag_report():
     except ValueError:
         return jsonify({"error": "Minimum views must be an integer"})
     
-    conn = create_connection()
+    conn = get_db()
     result = generate_hashtag_report(conn, platform, country_code, min_views)
-    conn.close()
     return jsonify(result)
 
 @app.route('/api/trend-report', methods=['POST'])
+@cached_response
 def trend_report():
     """API: Trend type analysis report"""
     data = request.json
@@ -1416,17 +2678,14 @@ def trend_report():
     if not all([platform, country_code, start_date, end_date]):
         return jsonify({"error": "Please provide platform, country code, start date and end date"})
     
-    conn = create_connection()
-    try:
-        # Validate date range (format, existence, and start < end)
-        validation_error = validate_date_range_full(conn, start_date, end_date)
-        if validation_error:
-            return jsonify({"error": validation_error})
-        
-        result = generate_trend_report(conn, platform, country_code, start_date, end_date)
-        return jsonify(result)
-    finally:
-        conn.close()
+    conn = get_db()
+    # Validate date range (format, existence, and start < end)
+    validation_error = validate_date_range_full(conn, start_date, end_date)
+    if validation_error:
+        return jsonify({"error": validation_error})
+    
+    result = generate_trend_report(conn, platform, country_code, start_date, end_date)
+    return jsonify(result)
 
 @app.route('/api/publish-timing-analysis', methods=['POST'])
 def publish_timing_analysis():
@@ -1436,10 +2695,12 @@ def publish_timing_analysis():
     Request body:
     {
         "platform": "TikTok" or "YouTube",
-        "time_analysis": "Hourly", "Day Parts", or "Week Analysis" (optional, default: "Hourly"),
+        "time_analysis": "Hourly", "Day Parts", "Week Analysis" or "Heatmap" (optional, default: "Hourly"),
         "period": "All Time" or "Custom" (optional, default: "All Time"),
         "start_month": "YYYY-MM" (required if period="Custom"),
-        "end_month": "YYYY-MM" (required if period="Custom")
+        "end_month": "YYYY-MM" (required if period="Custom"),
+        "time_slots": [{"name": "Morning", "start": 6, "end": 11}, ...] (optional, Hourly only;
+                      default: the six standard slots)
     }
     """
     data = request.json
@@ -1454,28 +2715,31 @@ def publish_timing_analysis():
         return jsonify({"error": "Please provide platform"})
     
     # Validate time_analysis
-    if time_analysis not in ['Hourly', 'Day Parts', 'Week Analysis']:
-        return jsonify({"error": "Invalid time_analysis. Must be 'Hourly', 'Day Parts', or 'Week Analysis'"})
+    if time_analysis not in PUBLISH_TIMING_MODES:
+        return jsonify({"error": "Invalid time_analysis. Must be 'Hourly', 'Day Parts', 'Week Analysis' or 'Heatmap'"})
     
-    # Validate custom period parameters
-    conn = create_connection()
+    # Validate custom time slots
     try:
-        if period == 'Custom':
-            if not all([start_month, end_month]):
-                return jsonify({"error": "For custom period, please provide both start_month and end_month in format 'YYYY-MM'"})
-            
-            # Validate date range (format, existence, and start < end)
-            validation_error = validate_date_range(conn, start_month, end_month)
-            if validation_error:
-                return jsonify({"error": validation_error})
+        time_slots = parse_time_slots(data.get('time_slots'))
+    except ValueError as e:
+        return jsonify({"error": str(e)})
+    
+    # Validate custom period parameters
+    conn = get_db()
+    if period == 'Custom':
+        if not all([start_month, end_month]):
+            return jsonify({"error": "For custom period, please provide both start_month and end_month in format 'YYYY-MM'"})
         
-        result = generate_publish_timing_analysis(conn, platform, time_analysis, period, start_month, end_month)
-        return jsonify(result)
-    finally:
-        conn.close()
+        # Validate date range (format, existence, and start < end)
+        validation_error = validate_date_range(conn, start_month, end_month)
+        if validation_error:
+            return jsonify({"error": validation_error})
+    
+    result = generate_publish_timing_analysis(conn, platform, time_analysis, period, start_month, end_month, time_slots)
+    return jsonify(result)
 
 # ====================== User Database and Login ======================
-USER_DB_PATH = 'user.db'
+USER_DB_PATH = os.environ.get('USER_DB_PATH', 'user.db')
 
 def init_user_db():
     """Initialize user database"""
@@ -1550,6 +2814,28 @@ def admin_page():
         return redirect('/login')
     return render_template('index_admin.html')
 
+def ensure_country(conn, country_code):
+    """country_id for a code, inserting a bare Country row the first time it is seen."""
+    country_id = dimension_cache.country_id(conn, country_code)
+    if country_id is None:
+        inserted = conn.execute("INSERT OR IGNORE INTO Country (country_code, country_name) VALUES (?, ?)",
+                                (country_code, country_code)).rowcount
+        if inserted:
+            bump_data_version(conn, DIMENSIONS_VERSION)
+        country_id = conn.execute("SELECT country_id FROM Country WHERE country_code = ?", (country_code,)).fetchone()[0]
+    return country_id
+
+def ensure_author(conn, author_handle, creator_tier):
+    """author_id for a handle, inserting the Author the first time it is seen."""
+    author_id = dimension_cache.author_id(conn, author_handle)
+    if author_id is None:
+        inserted = conn.execute("INSERT OR IGNORE INTO Author (author_handle, creator_tier) VALUES (?, ?)",
+                                (author_handle, creator_tier)).rowcount
+        if inserted:
+            bump_data_version(conn, DIMENSIONS_VERSION)
+        author_id = conn.execute("SELECT author_id FROM Author WHERE author_handle = ?", (author_handle,)).fetchone()[0]
+    return author_id
+
 @app.route('/api/admin/add-content', methods=['POST'])
 def admin_add_content():
     """Admin: Add content"""
@@ -1557,20 +2843,14 @@ def admin_add_content():
         return jsonify({"error": "Unauthorized"}), 403
     
     data = request.json
-    conn = create_connection()
+    conn = get_db()
     try:
         cursor = conn.cursor()
-        # Ensure country exists
-        cursor.execute("INSERT OR IGNORE INTO Country (country_code, country_name) VALUES (?, ?)",
-                     (data.get('country_code'), data.get('country_code')))
-        cursor.execute("SELECT country_id FROM Country WHERE country_code = ?", (data.get('country_code'),))
-        country_id = cursor.fetchone()[0]
-        
-        # Ensure author exists
-        cursor.execute("INSERT OR IGNORE INTO Author (author_handle, creator_tier) VALUES (?, ?)",
-                     (data.get('author_handle'), data.get('creator_tier', 'Mid')))
-        cursor.execute("SELECT author_id FROM Author WHERE author_handle = ?", (data.get('author_handle'),))
-        author_id = cursor.fetchone()[0]
+        # INSERT OR REPLACE may overwrite an existing row: take it out of the rollups first
+        rollups_live = retract_content(conn, [data.get('content_id')])
+        # Ensure country and author exist
+        country_id = ensure_country(conn, data.get('country_code'))
+        author_id = ensure_author(conn, data.get('author_handle'), data.get('creator_tier', 'Mid'))
         
         # Insert content
         cursor.execute("""
@@ -1583,13 +2863,12 @@ def admin_add_content():
             data.get('views'), data.get('likes'), country_id, author_id,
             data.get('publish_date'), data.get('publish_date', '')[:7]
         ))
+        record_content_change(conn, [data.get('content_id')], rollups_live)
         conn.commit()
         return jsonify({"success": True, "message": "Content added successfully"})
     except Exception as e:
         conn.rollback()
         return jsonify({"error": str(e)}), 400
-    finally:
-        conn.close()
 
 @app.route('/api/admin/delete-content', methods=['POST'])
 def admin_delete_content():
@@ -1599,10 +2878,13 @@ def admin_delete_content():
     
     data = request.json
     content_id = data.get('content_id')
-    conn = create_connection()
+    conn = get_db()
     try:
         cursor = conn.cursor()
+        rollups_live = retract_content(conn, [content_id])
         cursor.execute("DELETE FROM Content WHERE content_id = ?", (content_id,))
+        if cursor.rowcount > 0:
+            record_content_change(conn, [], rollups_live)
         conn.commit()
         if cursor.rowcount > 0:
             return jsonify({"success": True, "message": "Content deleted successfully"})
@@ -1610,8 +2892,6 @@ def admin_delete_content():
             return jsonify({"error": "Content not found"}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 400
-    finally:
-        conn.close()
 
 @app.route('/api/admin/update-content', methods=['POST'])
 def admin_update_content():
@@ -1621,7 +2901,7 @@ def admin_update_content():
     
     data = request.json
     content_id = data.get('content_id')
-    conn = create_connection()
+    conn = get_db()
     try:
         cursor = conn.cursor()
         
@@ -1633,18 +2913,12 @@ def admin_update_content():
         # Handle country update if provided
         country_id = None
         if data.get('country_code'):
-            cursor.execute("INSERT OR IGNORE INTO Country (country_code, country_name) VALUES (?, ?)",
-                         (data.get('country_code'), data.get('country_code')))
-            cursor.execute("SELECT country_id FROM Country WHERE country_code = ?", (data.get('country_code'),))
-            country_id = cursor.fetchone()[0]
+            country_id = ensure_country(conn, data.get('country_code'))
         
         # Handle author update if provided
         author_id = None
         if data.get('author_handle'):
-            cursor.execute("INSERT OR IGNORE INTO Author (author_handle, creator_tier) VALUES (?, ?)",
-                         (data.get('author_handle'), data.get('creator_tier', 'Mid')))
-            cursor.execute("SELECT author_id FROM Author WHERE author_handle = ?", (data.get('author_handle'),))
-            author_id = cursor.fetchone()[0]
+            author_id = ensure_author(conn, data.get('author_handle'), data.get('creator_tier', 'Mid'))
         
         # Build update query
         updates = []
@@ -1684,7 +2958,10 @@ def admin_update_content():
             return jsonify({"error": "No fields to update"}), 400
         
         values.append(content_id)
+        rollups_live = retract_content(conn, [content_id])
         cursor.execute(f"UPDATE Content SET {', '.join(updates)} WHERE content_id = ?", values)
+        if cursor.rowcount > 0:
+            record_content_change(conn, [content_id], rollups_live)
         conn.commit()
         
         if cursor.rowcount > 0:
@@ -1694,51 +2971,185 @@ def admin_update_content():
     except Exception as e:
         conn.rollback()
         return jsonify({"error": str(e)}), 400
-    finally:
-        conn.close()
+
+ADMIN_LIST_MAX_PER_PAGE = 200
+
+def encode_list_cursor(values):
+    """Opaque `after` token holding the sort key of the last row on a page"""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_list_cursor(token, size):
+    """Sort key from an `after` token, or None if the token is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != size or type(values[-1]) is not int:
+        return None
+    # [publish date, rowid]: a non-string date can't be bound as a query parameter
+    if size == 2 and not isinstance(values[0], str):
+        return None
+    return values
+
+def _admin_content_filters(prefix, platform, country_id, start_date, end_date):
+    where, params = [], []
+    if platform:
+        where.append(f"{prefix}platform = ?")
+        params.append(platform)
+    if country_id is not None:
+        where.append(f"{prefix}country_id = ?")
+        params.append(country_id)
+    if start_date:
+        where.append(f"{prefix}publish_date_approx >= ?")
+        params.append(start_date)
+    if end_date:
+        where.append(f"{prefix}publish_date_approx <= ?")
+        params.append(end_date)
+    return where, params
+
+def admin_content_total(conn, platform, country_id, start_date, end_date):
+    """Row count for the admin list filters without a full COUNT(*) per page.
+
+    Platform/country totals are summed from the monthly rollup cells, which the
+    admin write routes keep current row by row. Date-range totals are counted
+    once and cached until the content version changes.
+    """
+    if not (start_date or end_date) and rollups_current(conn):
+        where, params = _admin_content_filters('', platform, country_id, None, None)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        return conn.execute(f"SELECT COALESCE(SUM(n), 0) FROM content_rollup_monthly{clause}", params).fetchone()[0]
+    key = (platform, country_id, start_date, end_date)
+    version = read_data_version(conn, CONTENT_VERSION)
+    total = content_count_cache.get(key, version)
+    if total is None:
+        where, params = _admin_content_filters('', platform, country_id, start_date, end_date)
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        total = conn.execute(f"SELECT COUNT(*) FROM Content{clause}", params).fetchone()[0]
+        content_count_cache.put(key, version, total)
+    return total
 
 @app.route('/api/admin/list-content', methods=['GET'])
 def admin_list_content():
-    """Admin: List content with pagination"""
+    """Admin: List content newest first with keyset pagination
+
+    Pass the previous page's `next_after` as `after`; every page then starts with
+    an index seek instead of skipping OFFSET rows. `page` still works for old
+    clients. Optional filters: platform, country_code, start_date/end_date
+    (YYYY-MM-DD). With a date filter rows are ordered by publish date.
+    """
     if session.get('user_type') != 'admin':
         return jsonify({"error": "Unauthorized"}), 403
     
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
-    conn = create_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT c.content_id, c.platform, c.category, c.views, c.likes, 
-                   co.country_code, a.author_handle, c.publish_date_approx
-            FROM Content c
-            LEFT JOIN Country co ON c.country_id = co.country_id
-            LEFT JOIN Author a ON c.author_id = a.author_id
-            ORDER BY c.rowid DESC
-            LIMIT ? OFFSET ?
-        """, (per_page, (page - 1) * per_page))
-        results = cursor.fetchall()
-        cursor.execute("SELECT COUNT(*) FROM Content")
-        total = cursor.fetchone()[0]
-        return jsonify({
-            "content": [{
-                "content_id": r[0],
-                "platform": r[1],
-                "category": r[2],
-                "views": r[3],
-                "likes": r[4],
-                "country_code": r[5],
-                "author_handle": r[6],
-                "publish_date": r[7]
-            } for r in results],
-            "total": total,
-            "page": page,
-            "per_page": per_page
-        })
-    finally:
-        conn.close()
+    from datetime import datetime
+    page = max(1, request.args.get('page', 1, type=int))
+    per_page = max(1, min(request.args.get('per_page', 20, type=int), ADMIN_LIST_MAX_PER_PAGE))
+    after = request.args.get('after') or None
+    platform = request.args.get('platform') or None
+    country_code = request.args.get('country_code') or None
+    start_date = request.args.get('start_date') or None
+    end_date = request.args.get('end_date') or None
+    for value in (start_date, end_date):
+        if value is not None:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({"error": "Invalid date format. Please use 'YYYY-MM-DD' format (e.g., '2025-01-15')"}), 400
+    by_date = bool(start_date or end_date)
+    cursor_values = None
+    if after:
+        cursor_values = decode_list_cursor(after, 2 if by_date else 1)
+        if cursor_values is None:
+            return jsonify({"error": "Invalid after token"}), 400
+    
+    conn = get_db()
+    empty = {"content": [], "total": 0, "page": page, "per_page": per_page, "next_after": None, "has_more": False}
+    country_id = None
+    if country_code:
+        country_id = dimension_cache.country_id(conn, country_code)
+        if country_id is None:
+            return jsonify(empty)
+    
+    where, params = _admin_content_filters('c.', platform, country_id, start_date, end_date)
+    if cursor_values is not None:
+        where.append("(c.publish_date_approx, c.rowid) < (?, ?)" if by_date else "c.rowid < ?")
+        params.extend(cursor_values)
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    order = "c.publish_date_approx DESC, c.rowid DESC" if by_date else "c.rowid DESC"
+    offset = 0 if after else (page - 1) * per_page
+    # one extra row tells whether another page follows
+    results = conn.execute(f"""
+        SELECT c.content_id, c.platform, c.category, c.views, c.likes, 
+               co.country_code, a.author_handle, c.publish_date_approx, c.rowid
+        FROM Content c
+        LEFT JOIN Country co ON c.country_id = co.country_id
+        LEFT JOIN Author a ON c.author_id = a.author_id
+        {clause}
+        ORDER BY {order}
+        LIMIT ? OFFSET ?
+    """, params + [per_page + 1, offset]).fetchall()
+    has_more = len(results) > per_page
+    results = results[:per_page]
+    next_after = None
+    if has_more:
+        last = results[-1]
+        next_after = encode_list_cursor([last[7], last[8]] if by_date else [last[8]])
+    return jsonify({
+        "content": [{
+            "content_id": r[0],
+            "platform": r[1],
+            "category": r[2],
+            "views": r[3],
+            "likes": r[4],
+            "country_code": r[5],
+            "author_handle": r[6],
+            "publish_date": r[7]
+        } for r in results],
+        "total": admin_content_total(conn, platform, country_id, start_date, end_date),
+        "page": page,
+        "per_page": per_page,
+        "next_after": next_after,
+        "has_more": has_more
+    })
+
+SLOW_QUERY_SORT_KEYS = ('max_ms', 'total_ms', 'avg_ms', 'count', 'timeouts')
+
+@app.route('/api/admin/slow-queries', methods=['GET'])
+def admin_slow_queries():
+    """Admin: worst report_queries slugs from the slow-query log over the last `minutes`"""
+    if session.get('user_type') != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+    minutes = request.args.get('minutes', 60, type=float)
+    limit = request.args.get('limit', 20, type=int)
+    sort = request.args.get('sort', 'max_ms')
+    if sort not in SLOW_QUERY_SORT_KEYS:
+        return jsonify({"error": f"sort must be one of {', '.join(SLOW_QUERY_SORT_KEYS)}"}), 400
+    return jsonify({
+        "threshold_ms": slow_query_log.threshold_ms,
+        "minutes": minutes,
+        "sort": sort,
+        "queries": slow_query_log.worst(time.time() - minutes * 60, limit, sort),
+        "error": ""
+    })
+
+@app.route('/api/admin/cache-stats', methods=['GET'])
+def admin_cache_stats():
+    """Admin: Response cache hit/miss statistics"""
+    if session.get('user_type') != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+    return jsonify({
+        "response_cache": response_cache.stats(),
+        "data_versions": read_data_versions(get_db()),
+        "db_pool": db_pool.stats(),
+        "read_pool": read_pool.stats(),
+        "query_guard": query_guard.stats(),
+        "columnar": columnar_engine.stats(),
+        "calendar_index": calendar_index.stats(),
+        "dimensions": dimension_cache.stats()
+    })
 
 @app.route('/api/creator-performance', methods=['POST'])
+@cached_response
 def api_creator_performance():
     data = request.json
     platform = data.get('platform')
@@ -1753,43 +3164,137 @@ def api_creator_performance():
     if not start_month or not end_month:
         return jsonify({"error": "Please provide both start_month and end_month in format 'YYYY-MM'"})
     
-    conn = create_connection()
-    try:
-        # Validate date range (format, existence, and start < end)
-        validation_error = validate_date_range(conn, start_month, end_month)
-        if validation_error:
-            return jsonify({"error": validation_error})
-        
-        result = generate_creator_performance(conn, platform, creator_scope, start_month, end_month)
-        return jsonify(result)
-    finally:
-        conn.close()
+    conn = get_db()
+    # Validate date range (format, existence, and start < end)
+    validation_error = validate_date_range(conn, start_month, end_month)
+    if validation_error:
+        return jsonify({"error": validation_error})
+    
+    result = generate_creator_performance(conn, platform, creator_scope, start_month, end_month)
+    return jsonify(result)
 
 @app.route('/api/region-ad-reco', methods=['POST'])
+@cached_response
 def api_region_ad_reco():
     data = request.json
     region = data.get('region')
     if not region:
         return jsonify({"error": "Please provide region"})
-    conn = create_connection()
-    try:
-        result = generate_region_ad_recommendation(conn, region)
-        return jsonify(result)
-    finally:
-        conn.close()
+    conn = get_db()
+    result = generate_region_ad_recommendation(conn, region)
+    return jsonify(result)
 
 @app.route('/api/platform-dominance-extended', methods=['POST'])
+@cached_response
 def api_platform_dominance_extended():
     data = request.json
     country_code = data.get('country_code')
     if not country_code:
         return jsonify({"error": "Please provide country_code"})
-    conn = create_connection()
-    try:
-        result = generate_platform_dominance_extended(conn, country_code)
-        return jsonify(result)
-    finally:
-        conn.close()
+    conn = get_db()
+    result = generate_platform_dominance_extended(conn, country_code)
+    return jsonify(result)
+
+@app.route('/api/percentiles', methods=['POST'])
+@cached_response
+def api_percentiles():
+    """API: p50/p90/p99 of engagement metrics from the monthly quantile sketches"""
+    data = request.json
+    platform = data.get('platform')
+    start_month = data.get('start_month')
+    end_month = data.get('end_month') or start_month
+    country_code = data.get('country_code') or None
+    quantiles = data.get('quantiles') or list(DEFAULT_QUANTILES)
+
+    if not platform or not start_month:
+        return jsonify({"error": "Please provide platform and start_month in format 'YYYY-MM'"})
+    if not isinstance(quantiles, list) or not all(
+        isinstance(q, (int, float)) and not isinstance(q, bool) and 0 <= q <= 1 for q in quantiles
+    ):
+        return jsonify({"error": "quantiles must be a list of numbers between 0 and 1"})
+
+    conn = get_db()
+    for month in (start_month, end_month):
+        validation_error = validate_year_month(conn, month)
+        if validation_error:
+            return jsonify({"error": validation_error})
+    if start_month > end_month:
+        return jsonify({"error": "start_month must not be later than end_month"})
+
+    result = generate_percentiles(conn, platform, start_month, end_month, country_code, quantiles)
+    return jsonify(result)
+
+### Batch API
+# Read-only analysis endpoints that /api/batch may dispatch to, with their HTTP method
+BATCH_ENDPOINTS = {
+    '/api/platforms': 'GET',
+    '/api/countries': 'GET',
+    '/api/year-months': 'GET',
+    '/api/global-analysis': 'POST',
+    '/api/hashtag-report': 'POST',
+    '/api/trend-report': 'POST',
+    '/api/publish-timing-analysis': 'POST',
+    '/api/creator-performance': 'POST',
+    '/api/region-ad-reco': 'POST',
+    '/api/platform-dominance-extended': 'POST',
+    '/api/percentiles': 'POST',
+}
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 20))
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 4))
+
+def _run_batch_item(item, cookie):
+    """Dispatch one {endpoint, params} entry through the normal routing, validation and response cache."""
+    if not isinstance(item, dict):
+        return {"endpoint": None, "status": 400, "body": {"error": "Each request must be an object with endpoint and params"}}
+    endpoint = str(item.get('endpoint') or '')
+    path = '/api/' + endpoint.strip('/').removeprefix('api/')
+    method = BATCH_ENDPOINTS.get(path)
+    if method is None:
+        return {"endpoint": endpoint, "status": 404, "body": {"error": f"Unsupported endpoint '{endpoint}'"}}
+    params = item.get('params') or {}
+    request_args = {'json': params} if method == 'POST' else {'query_string': params}
+    # Nested request context: reuses this app context (and its g.db_conn) when run inline,
+    # or gets its own app context and pooled connection when run on a worker thread.
+    with app.test_request_context(path, method=method, headers={'Cookie': cookie}, **request_args):
+        try:
+            resp = app.full_dispatch_request()
+        except Exception as e:
+            # an unhandled error fails this entry only; the rest of the batch still returns
+            app.log_exception(sys.exc_info())
+            return {"endpoint": endpoint, "status": 500, "body": {"error": f"Internal error: {e}"}}
+    return {
+        "endpoint": endpoint,
+        "status": resp.status_code,
+        "cache": resp.headers.get('X-Cache'),
+        "body": resp.get_json(silent=True),
+    }
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    """API: run several analysis requests in one round-trip; results come back in request order"""
+    data = request.get_json(silent=True) or {}
+    items = data.get('requests')
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Please provide requests as a list of {endpoint, params}"})
+    if len(items) > BATCH_MAX_REQUESTS:
+        return jsonify({"error": f"At most {BATCH_MAX_REQUESTS} requests per batch"})
+
+    cookie = request.headers.get('Cookie', '')
+    # Each worker holds its own pooled connection, and this request already holds one
+    workers = min(len(items), BATCH_MAX_WORKERS, db_pool.max_size - 1)
+    if data.get('parallel') and workers > 1:
+        cancel_event = current_cancel_event()
+
+        def run_item(item):
+            with cancellable_queries(cancel_event):
+                return _run_batch_item(item, cookie)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run_item, items))
+    else:
+        get_db()
+        results = [_run_batch_item(item, cookie) for item in items]
+    return jsonify({"results": results, "error": ""})
 
 # Initialize user database on startup
 init_user_db()
@@ -1800,6 +3305,23 @@ try:
     if _conn:
         init_report_template_table(_conn) 
         init_report_queries_table(_conn) 
+        init_data_versions_table(_conn)
+        init_dimensions_version(_conn)
+        with _conn:
+            create_rollup_tables(_conn)
+        seed_rollup_queries(_conn)
+        seed_median_queries(_conn)
+        seed_sketch_queries(_conn)
+        seed_timing_queries(_conn)
+        # Off by default: every worker imports this module, and on a large database the
+        # CREATE INDEX / ANALYZE pass would block startup and take the write lock in each one
+        if os.environ.get('DB_AUTO_INDEX', '0') == '1':
+            with _conn:
+                _created = ensure_indexes(_conn)
+            if _created:
+                print(f"Created indexes: {', '.join(_created)}")
+        calendar_index.refresh(_conn)
+        dimension_cache.refresh(_conn)
         _conn.close()
 except Exception as _e:
     print(f"Report template init warning: {_e}")
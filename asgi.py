@@ -0,0 +1,290 @@
+"""ASGI entry point for the analysis API.
+
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+
+Requests are accepted on an asyncio event loop, and the Flask app (with its
+SQLite work) runs on bounded thread pools. The heavy analysis endpoints get
+their own pool and per-endpoint concurrency limits, so slow
+/api/platform-dominance-extended calls cannot take the threads that cheap
+lookups like /api/platforms need.
+
+When a request times out or the client disconnects, its cancel event is set.
+The sqlite3 progress handler installed by app.get_db then aborts the running
+statement instead of letting it finish for nobody.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from app import app as flask_app, cancellable_queries, db_pool, metrics, read_pool
+
+# Threads for the analysis endpoints / for everything else. Together they should
+# not exceed DB_POOL_SIZE, since each running request holds one pooled connection.
+ASGI_HEAVY_WORKERS = int(os.environ.get('ASGI_HEAVY_WORKERS', max(1, db_pool.max_size // 2)))
+ASGI_LIGHT_WORKERS = int(os.environ.get('ASGI_LIGHT_WORKERS', max(1, db_pool.max_size - ASGI_HEAVY_WORKERS)))
+ASGI_REQUEST_TIMEOUT = float(os.environ.get('ASGI_REQUEST_TIMEOUT', 30))
+MAX_BODY_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class EndpointLimit:
+    """Concurrency cap and timeout (seconds, queueing included) for one heavy endpoint."""
+    concurrency: int
+    timeout: float = ASGI_REQUEST_TIMEOUT
+
+
+# Per-endpoint caps are derived from the heavy pool so they stay below it: no
+# single endpoint can take every heavy thread, and the slowest ones get half.
+HEAVY_SHARE = max(1, ASGI_HEAVY_WORKERS - 1)
+SLOW_SHARE = max(1, ASGI_HEAVY_WORKERS // 2)
+
+# Analysis endpoints that run on the heavy pool. Other paths use the light pool
+# with the default timeout.
+ENDPOINT_LIMITS: Dict[str, EndpointLimit] = {
+    '/api/platform-dominance-extended': EndpointLimit(SLOW_SHARE, 60),
+    '/api/global-analysis': EndpointLimit(HEAVY_SHARE),
+    '/api/hashtag-report': EndpointLimit(HEAVY_SHARE),
+    '/api/trend-report': EndpointLimit(HEAVY_SHARE),
+    '/api/publish-timing-analysis': EndpointLimit(HEAVY_SHARE),
+    '/api/creator-performance': EndpointLimit(HEAVY_SHARE),
+    '/api/region-ad-reco': EndpointLimit(HEAVY_SHARE),
+    '/api/percentiles': EndpointLimit(HEAVY_SHARE),
+    '/api/batch': EndpointLimit(SLOW_SHARE, 60),
+}
+DEFAULT_LIMIT = EndpointLimit(concurrency=0)  # 0 = bounded by the light pool only
+
+# Heavy endpoints are labelled by path; light ones share 'other' to keep the label set bounded
+asgi_requests = metrics.counter(
+    'asgi_requests', 'ASGI requests by outcome (completed / timed_out / disconnected / failed).',
+    ('endpoint', 'outcome'))
+
+
+@dataclass
+class EndpointStats:
+    completed: int = 0
+    timed_out: int = 0
+    disconnected: int = 0
+    failed: int = 0
+    in_flight: int = 0
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+@dataclass
+class _LoopState:
+    """Semaphores belong to one event loop; rebuilt if the server starts a new one."""
+    loop: asyncio.AbstractEventLoop
+    semaphores: Dict[str, asyncio.Semaphore] = field(default_factory=dict)
+
+
+class AsgiAdapter:
+    """Serve a WSGI app over ASGI with two bounded thread pools, per-endpoint limits and timeouts."""
+
+    def __init__(self, wsgi_app, limits=None, heavy_workers=ASGI_HEAVY_WORKERS, light_workers=ASGI_LIGHT_WORKERS):
+        self.wsgi_app = wsgi_app
+        self.limits = dict(ENDPOINT_LIMITS if limits is None else limits)
+        self.heavy_workers = heavy_workers
+        self.light_workers = light_workers
+        self._executors = None
+        self._executors_lock = threading.Lock()
+        self._state: Optional[_LoopState] = None
+        self.stats: Dict[str, EndpointStats] = {}
+
+    # -- plumbing ----------------------------------------------------------
+    def _executor(self, heavy):
+        with self._executors_lock:
+            if self._executors is None:
+                self._executors = (
+                    ThreadPoolExecutor(self.heavy_workers, thread_name_prefix='asgi-heavy'),
+                    ThreadPoolExecutor(self.light_workers, thread_name_prefix='asgi-light'),
+                )
+            return self._executors[0 if heavy else 1]
+
+    def _semaphore(self, path, limit):
+        loop = asyncio.get_running_loop()
+        if self._state is None or self._state.loop is not loop:
+            self._state = _LoopState(loop)
+        sem = self._state.semaphores.get(path)
+        if sem is None:
+            sem = self._state.semaphores[path] = asyncio.Semaphore(limit.concurrency)
+        return sem
+
+    def _record(self, path, stats, outcome):
+        setattr(stats, outcome, getattr(stats, outcome) + 1)
+        asgi_requests.inc((path if path in self.limits else 'other', outcome))
+
+    def shutdown(self):
+        with self._executors_lock:
+            executors, self._executors = self._executors, None
+        for executor in executors or ():
+            executor.shutdown(wait=False, cancel_futures=True)
+        db_pool.close_all()
+        read_pool.close_all()
+
+    # -- ASGI --------------------------------------------------------------
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if len(body) > MAX_BODY_BYTES:
+                await _send_json(send, 413, {"error": "Request body too large"})
+                return
+            if not message.get('more_body'):
+                break
+
+        path = scope['path']
+        limit = self.limits.get(path, DEFAULT_LIMIT)
+        stats = self.stats.setdefault(path, EndpointStats())
+        cancel = threading.Event()
+        environ = build_environ(scope, bytes(body))
+
+        stats.in_flight += 1
+        task = asyncio.ensure_future(self._dispatch(path, limit, environ, cancel))
+        watcher = asyncio.ensure_future(_wait_for_disconnect(receive))
+        try:
+            done, _ = await asyncio.wait({task, watcher}, timeout=limit.timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stats.in_flight -= 1
+            watcher.cancel()
+        if task not in done:
+            # Stop the statement still running on the worker thread
+            cancel.set()
+            task.cancel()
+            if watcher in done:
+                self._record(path, stats, 'disconnected')
+                return
+            self._record(path, stats, 'timed_out')
+            await _send_json(send, 504, {"error": f"Request timed out after {limit.timeout:g}s"})
+            return
+        try:
+            status, headers, chunks = task.result()
+        except Exception as e:
+            self._record(path, stats, 'failed')
+            print(f"ASGI dispatch error on {path}: {e}", file=sys.stderr)
+            await _send_json(send, 500, {"error": "Internal server error"})
+            return
+        self._record(path, stats, 'completed')
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+
+    async def _dispatch(self, path, limit, environ, cancel):
+        loop = asyncio.get_running_loop()
+        heavy = path in self.limits
+        if not limit.concurrency:
+            return await asyncio.shield(loop.run_in_executor(self._executor(heavy), self._call_wsgi, environ, cancel))
+        sem = self._semaphore(path, limit)
+        await sem.acquire()
+        future = loop.run_in_executor(self._executor(heavy), self._call_wsgi, environ, cancel)
+        # Hold the endpoint slot until the worker thread has really stopped,
+        # not just until this coroutine is cancelled
+        future.add_done_callback(lambda _: sem.release())
+        return await asyncio.shield(future)
+
+    def _call_wsgi(self, environ, cancel):
+        """Run the WSGI app on a worker thread; returns (status, headers, body chunks)."""
+        if cancel.is_set():
+            return 499, [], []
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+            return chunks.append
+
+        chunks = []
+        with cancellable_queries(cancel):
+            result = self.wsgi_app(environ, start_response)
+            try:
+                chunks.extend(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        return response['status'], response['headers'], chunks
+
+
+def build_environ(scope, body):
+    """Translate an ASGI http scope into a PEP 3333 environ."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = 'HTTP_' + name
+        if key in environ:
+            value = environ[key] + ('; ' if key == 'HTTP_COOKIE' else ',') + value
+        environ[key] = value
+    return environ
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def _send_json(send, status, payload):
+    body = json.dumps(payload).encode('utf-8')
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+app = AsgiAdapter(flask_app.wsgi_app)
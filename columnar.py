@@ -0,0 +1,609 @@
+"""Optional in-memory columnar copy of Content for the analysis queries.
+
+Content joined with Country / Author / Trend / Device is loaded once per worker
+into NumPy arrays. Text and id dimensions are dictionary-encoded against sorted
+dictionaries, so `=`, `IN` and `BETWEEN` filters become integer comparisons on
+codes and GROUP BY becomes a bincount over them. Every supported report_queries
+slug is re-implemented here with masks and grouped reductions. It returns the
+same rows as its SQL: same groups, same NULL handling, same Python types, and
+same order, with ties kept in GROUP BY key order. Rows are kept sorted by
+(platform, year_month), so those two filters, which almost every query has, are
+binary searches that yield zero-copy slices. Only the remaining predicates are
+evaluated as masks, and only over that slice.
+
+A slug is only answered while its stored SQL is still the text implemented here,
+so an edited query silently goes back to SQLite. Anything outside the supported
+shapes (unexpected parameter types, mixed-type columns) also falls back, by
+returning NOT_ANSWERED. Needs numpy; without it COLUMNAR_AVAILABLE is False.
+"""
+
+from __future__ import annotations
+
+import itertools
+import re
+import sqlite3
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # the SQL path needs nothing from here
+    np = None
+
+COLUMNAR_AVAILABLE = np is not None
+
+NOT_ANSWERED = object()
+
+# Content columns by kind: dictionary-encoded dimension, INTEGER measure, REAL
+# measure, or foreign key (joined in memory against the dimension tables below)
+_CONTENT_COLUMNS = (
+    ("platform", "dim"), ("category", "dim"), ("hashtag", "dim"), ("year_month", "dim"),
+    ("publish_date_approx", "dim"), ("publish_period", "dim"), ("publish_dayofweek", "dim"), ("country_id", "dim"),
+    ("views", "int"), ("likes", "int"), ("comments", "int"), ("shares", "int"),
+    ("engagement_rate", "real"), ("completion_rate", "real"),
+    ("author_id", "key"), ("trend_id", "key"), ("device_id", "key"),
+)
+# foreign key -> (table, attributes, flag set where an inner JOIN would match)
+_JOINS = {
+    "country_id": ("Country", ("country_name", "region"), "has_country"),
+    "author_id": ("Author", ("creator_tier",), "has_author"),
+    "trend_id": ("Trend", ("trend_type",), "has_trend"),
+    "device_id": ("Device", ("upload_hour",), "has_device"),
+}
+_LOAD_BATCH = 100_000
+# GROUP BY uses a dense bincount while there are at most this many possible groups per row (plus a floor)
+_DENSE_GROUPS_PER_ROW = 4
+_DENSE_GROUPS_MIN = 4096
+_EXACT_FLOAT_INT = 2 ** 53
+
+
+class Unsupported(Exception):
+    """The data or the parameters fall outside what the engine reproduces exactly."""
+
+
+def _value_kind(distinct) -> type:
+    kinds = {type(v) for v in distinct}
+    if len(kinds) > 1 or kinds - {str, int}:
+        # SQLite orders mixed storage classes differently from Python
+        raise Unsupported(f"mixed or unsupported value types {sorted(k.__name__ for k in kinds)}")
+    return kinds.pop() if kinds else str
+
+
+class Dimension:
+    """Sorted dictionary plus int32 codes per row; NULL is code -1."""
+
+    def __init__(self, values: Sequence) -> None:
+        distinct = set(values)
+        distinct.discard(None)
+        self.kind = _value_kind(distinct)
+        self.values = sorted(distinct)
+        self._lookup = {v: i for i, v in enumerate(self.values)}
+        codes = dict(self._lookup)
+        codes[None] = -1
+        self.codes = np.array(list(map(codes.__getitem__, values)), dtype=np.int32)
+
+    @classmethod
+    def encoded(cls, kind: type, values: List, codes) -> "Dimension":
+        """Dimension over an already sorted dictionary and its int32 codes."""
+        dim = object.__new__(cls)
+        dim.kind, dim.values, dim.codes = kind, values, codes
+        dim._lookup = {v: i for i, v in enumerate(values)}
+        return dim
+
+    def view(self, codes) -> "Dimension":
+        """Same dictionary over other (reordered or sliced) codes."""
+        dim = object.__new__(Dimension)
+        dim.kind, dim.values, dim._lookup, dim.codes = self.kind, self.values, self._lookup, codes
+        return dim
+
+    def code(self, value) -> Optional[int]:
+        """Code equal to value; None when nothing matches (`= NULL` never does)."""
+        if value is None:
+            return None
+        self._check(value)
+        return self._lookup.get(value)
+
+    def code_range(self, low, high) -> Tuple[int, int]:
+        """[start, stop) of the codes whose values lie BETWEEN low AND high."""
+        if low is None or high is None:
+            return 0, 0
+        self._check(low)
+        self._check(high)
+        return bisect_left(self.values, low), bisect_right(self.values, high)
+
+    def _check(self, value) -> None:
+        if type(value) is not self.kind:
+            raise Unsupported(f"parameter {value!r} does not match a {self.kind.__name__} column")
+
+    def eq(self, value):
+        code = self.code(value)
+        return np.zeros(len(self.codes), dtype=bool) if code is None else self.codes == code
+
+    def isin(self, values: Sequence):
+        wanted = np.zeros(len(self.values) + 1, dtype=bool)  # indexed by code + 1
+        for value in values:
+            code = self.code(value)
+            if code is not None:
+                wanted[code + 1] = True
+        return wanted[self.codes + 1]
+
+    def between(self, low, high):
+        start, stop = self.code_range(low, high)
+        return (self.codes >= start) & (self.codes < stop)
+
+    def not_null(self):
+        return self.codes >= 0
+
+    def label(self, group: int):
+        """Value for a group index (code + 1, so NULL is group 0)."""
+        return None if group == 0 else self.values[group - 1]
+
+
+def _rows(array, mask):
+    """array restricted to mask; mask None means every row."""
+    return array if mask is None else array[mask]
+
+
+class ContentColumns:
+    """One immutable snapshot of Content, tagged with the content version it was read at.
+
+    Measures are (values, valid) pairs with NULL stored as 0, so sums and averages
+    are plain weighted bincounts and `valid` counts the non-NULL rows.
+    """
+
+    def __init__(self, dims: Dict[str, Dimension], measures: Dict[str, Tuple[object, object]],
+                 flags: Dict[str, object], version: Optional[int]) -> None:
+        self.version = version
+        self.dims, self.measures, self.flags = dims, measures, flags
+        # SUM(c.likes + c.comments + c.shares): NULL when any term is NULL
+        terms = [measures[m] for m in ("likes", "comments", "shares")]
+        valid = terms[0][1] & terms[1][1] & terms[2][1]
+        measures["engagement"] = (np.where(valid, terms[0][0] + terms[1][0] + terms[2][0], 0), valid)
+        # Largest |value| of each INTEGER measure, to bound partial sums in Grouped.sum
+        self.magnitude = {
+            name: int(np.abs(values).max()) if len(values) else 0
+            for name, (values, _) in measures.items() if values.dtype == np.int64
+        }
+        # Rows are grouped by key, so their order only matters for range lookups
+        order = np.lexsort((dims["year_month"].codes, dims["platform"].codes))
+        self._take(lambda a: a[order])
+
+    def _take(self, pick: Callable) -> None:
+        self.dims = {k: d.view(pick(d.codes)) for k, d in self.dims.items()}
+        self.measures = {k: (pick(values), pick(valid)) for k, (values, valid) in self.measures.items()}
+        self.flags = {k: pick(a) for k, a in self.flags.items()}
+        self.n = len(self.dims["platform"].codes)
+
+    def part(self, platform, *months) -> "ContentColumns":
+        """Rows with this platform (and year_month BETWEEN months[0] AND months[1]) as zero-copy views."""
+        platforms = self.dims["platform"].codes
+        code = self.dims["platform"].code(platform)
+        if code is None:
+            start = stop = 0
+        else:
+            start, stop = np.searchsorted(platforms, np.array([code, code + 1], dtype=platforms.dtype)).tolist()
+        if months:
+            first, last = self.dims["year_month"].code_range(*months)
+            codes = self.dims["year_month"].codes[start:stop]
+            bounds = np.searchsorted(codes, np.array([first, last], dtype=codes.dtype)).tolist()
+            start, stop = start + bounds[0], start + bounds[1]
+        part = object.__new__(ContentColumns)
+        part.version, part.magnitude = self.version, self.magnitude
+        part.dims, part.measures, part.flags = self.dims, self.measures, self.flags
+        part._take(lambda a: a[start:max(start, stop)])
+        return part
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [d.codes for d in self.dims.values()] + list(self.flags.values())
+        arrays += [a for pair in self.measures.values() for a in pair]
+        return int(sum(a.nbytes for a in arrays))
+
+    # -- reductions (mask None = every row) ---------------------------------
+    def group(self, mask, keys: Sequence[str]) -> "Grouped":
+        return Grouped(self, mask, keys)
+
+    def total_sum(self, mask, measure: str) -> Optional[int]:
+        values, valid = self.measures[measure]
+        return int(_rows(values, mask).sum()) if _rows(valid, mask).any() else None
+
+    def total_avg(self, mask, measure: str) -> Optional[float]:
+        values, valid = self.measures[measure]
+        n = int(np.count_nonzero(_rows(valid, mask)))
+        return float(_rows(values, mask).sum() / n) if n else None
+
+
+class Grouped:
+    """GROUP BY over dictionary codes; groups come out in SQLite's key order (NULL first).
+
+    Rows are bucketed by bincount over the dense space of code combinations when
+    that space is small next to the row count, otherwise by sorting (np.unique).
+    """
+
+    def __init__(self, cols: ContentColumns, mask, keys: Sequence[str]) -> None:
+        self.cols = cols
+        self.dims = [cols.dims[k] for k in keys]
+        self.mask = mask
+        group_ids = None
+        space = 1
+        for dim in self.dims:
+            codes = _rows(dim.codes, mask).astype(np.int64) + 1
+            group_ids = codes if group_ids is None else group_ids * (len(dim.values) + 1) + codes
+            space *= len(dim.values) + 1
+        if space <= _DENSE_GROUPS_PER_ROW * len(group_ids) + _DENSE_GROUPS_MIN:
+            self.index, self.size = group_ids, space
+            self.present = np.flatnonzero(np.bincount(group_ids, minlength=space))
+            self._pick = self.present
+        else:
+            self.present, self.index = np.unique(group_ids, return_inverse=True)
+            self.size = len(self.present)
+            self._pick = slice(None)
+
+    def _per_group(self, index, weights=None):
+        return np.bincount(index, weights=weights, minlength=self.size)[self._pick]
+
+    def _measure(self, measure: str):
+        values, valid = self.cols.measures[measure]
+        return _rows(values, self.mask), _rows(valid, self.mask)
+
+    def keys(self) -> List[tuple]:
+        out = []
+        for gid in self.present.tolist():
+            parts = []
+            for dim in reversed(self.dims):
+                gid, part = divmod(gid, len(dim.values) + 1)
+                parts.append(dim.label(part))
+            out.append(tuple(reversed(parts)))
+        return out
+
+    def count(self) -> List[int]:
+        return self._per_group(self.index).tolist()
+
+    def count_valid(self, measure: str) -> List[int]:
+        """COUNT(measure): non-NULL values per group."""
+        _, valid = self._measure(measure)
+        return self._per_group(self.index, valid).astype(np.int64).tolist()
+
+    def sum(self, measure: str) -> List:
+        """SUM(measure) per group: int for INTEGER measures, float for REAL ones, None without values."""
+        values, valid = self._measure(measure)
+        seen = self._per_group(self.index, valid)
+        if values.dtype != np.int64:
+            totals = self._per_group(self.index, values)
+        elif self.cols.magnitude[measure] * len(values) < _EXACT_FLOAT_INT:
+            # every partial sum is an integer below 2**53, so float64 adds them exactly
+            totals = self._per_group(self.index, values).astype(np.int64)
+        else:
+            totals = np.zeros(self.size, dtype=np.int64)
+            np.add.at(totals, self.index, values)
+            totals = totals[self._pick]
+        return [t if n else None for t, n in zip(totals.tolist(), seen.tolist())]
+
+    def avg(self, measure: str) -> List[Optional[float]]:
+        values, valid = self._measure(measure)
+        totals = self._per_group(self.index, values)
+        seen = self._per_group(self.index, valid)
+        return [t / n if n else None for t, n in zip(totals.tolist(), seen.tolist())]
+
+    def extreme(self, measure: str, largest: bool) -> List[Optional[float]]:
+        values, valid = self._measure(measure)
+        out = np.full(self.size, -np.inf if largest else np.inf)
+        (np.maximum if largest else np.minimum).at(out, self.index[valid], values[valid])
+        seen = self._per_group(self.index, valid)
+        return [v if n else None for v, n in zip(out[self._pick].tolist(), seen.tolist())]
+
+
+def _order_desc(rows: List[tuple], col: int, limit: Optional[int] = None) -> List[tuple]:
+    """ORDER BY rows[col] DESC (NULLs last), ties kept in GROUP BY order."""
+    ranked = sorted(rows, key=lambda r: (r[col] is None, -(r[col] or 0)))
+    return ranked if limit is None else ranked[:limit]
+
+
+# -- supported report_queries slugs --------------------------------------------
+# Each entry: the stored SQL it reproduces, and fn(cols, params) -> rows.
+
+def _global_part(cols, params):
+    platform, year_month = params
+    return cols.part(platform, year_month, year_month)
+
+
+def _global_summary(cols, params):
+    part = _global_part(cols, params)
+    mask = None
+    return [(part.n, part.total_sum(mask, "views"), part.total_sum(mask, "likes"),
+             part.total_avg(mask, "engagement_rate"))]
+
+
+def _sum_views_by(cols, mask, key, limit=None):
+    g = cols.group(mask, [key])
+    rows = [(k[0], v) for k, v in zip(g.keys(), g.sum("views"))]
+    return _order_desc(rows, 1, limit)
+
+
+def _global_top_countries(cols, params):
+    part = _global_part(cols, params)
+    return _sum_views_by(part, part.flags["has_country"], "country_name", 10)
+
+
+def _global_top_hashtag(cols, params):
+    part = _global_part(cols, params)
+    return _sum_views_by(part, None, "hashtag", 1)
+
+
+def _global_category_dist(cols, params):
+    part = _global_part(cols, params)
+    return _sum_views_by(part, None, "category")
+
+
+def _hashtag_main(cols, params):
+    platform, country_id, min_views = params
+    if type(min_views) not in (int, float):
+        raise Unsupported("min_views must be numeric")
+    part = cols.part(platform)
+    rows = _sum_views_by(part, part.dims["country_id"].eq(country_id), "hashtag")
+    return [r for r in rows if r[1] is not None and r[1] > min_views]
+
+
+def _trend_main(cols, params):
+    platform, country_id, start_date, end_date = params
+    part = cols.part(platform)
+    mask = (part.dims["country_id"].eq(country_id) & part.dims["publish_date_approx"].between(start_date, end_date)
+            & part.flags["has_trend"])
+    return _sum_views_by(part, mask, "trend_type")
+
+
+def _creator_total_views(cols, params):
+    platform, start_month, end_month = params
+    part = cols.part(platform, start_month, end_month)
+    return [(part.total_sum(None, "views"),)]
+
+
+def _creator_tier_agg(cols, params):
+    platform, tiers, (start_month, end_month) = params[0], params[1:-2], params[-2:]
+    part = cols.part(platform, start_month, end_month)
+    g = part.group(part.dims["creator_tier"].isin(tiers) & part.flags["has_author"], ["creator_tier"])
+    rows = [(k[0], v, n) for k, v, n in zip(g.keys(), g.sum("views"), g.count())]
+    return _order_desc(rows, 1)
+
+
+def _creator_single_tier_monthly(cols, params):
+    platform, tier, start_month, end_month = params
+    part = cols.part(platform, start_month, end_month)
+    g = part.group(part.dims["creator_tier"].eq(tier) & part.flags["has_author"], ["year_month"])
+    return [(k[0], v, n) for k, v, n in zip(g.keys(), g.sum("views"), g.count())]
+
+
+def _region_engagement_main(cols, params):
+    (region,) = params
+    mask = cols.dims["region"].eq(region) & cols.flags["has_country"]
+    g = cols.group(mask, ["platform", "category"])
+    rows = [(k[0], k[1], e) for k, e in zip(g.keys(), g.sum("engagement"))]
+    return _order_desc(rows, 2)
+
+
+def _publish_timing_cube(cols, params):
+    platform, start, first, last = params
+    # (? IS NULL OR c.year_month BETWEEN ? AND ?)
+    part = cols.part(platform) if start is None else cols.part(platform, first, last)
+    g = part.group(None, ["upload_hour", "publish_period", "publish_dayofweek"])
+    # COALESCE(SUM(x), 0) is the integer 0 for a group without values
+    views, eng, comp = ([0 if t is None else t for t in g.sum(m)] for m in ("views", "engagement_rate", "completion_rate"))
+    return [
+        (*k, n, v, e, e_n, hi, lo, c, c_n)
+        for k, n, v, e, e_n, hi, lo, c, c_n in zip(
+            g.keys(), g.count(), views, eng, g.count_valid("engagement_rate"),
+            g.extreme("engagement_rate", True), g.extreme("engagement_rate", False),
+            comp, g.count_valid("completion_rate"))
+    ]
+
+
+SUPPORTED_QUERIES: Dict[str, Tuple[str, Callable]] = {
+    "global_summary": (
+        "SELECT COUNT(*), SUM(c.views), SUM(c.likes), AVG(c.engagement_rate) FROM Content c "
+        "WHERE c.platform = ? AND c.year_month = ?",
+        _global_summary,
+    ),
+    "global_top_countries": (
+        "SELECT co.country_name, SUM(c.views) AS v FROM Content c JOIN Country co ON c.country_id = co.country_id "
+        "WHERE c.platform = ? AND c.year_month = ? GROUP BY co.country_name ORDER BY v DESC LIMIT 10",
+        _global_top_countries,
+    ),
+    "global_top_hashtag": (
+        "SELECT c.hashtag, SUM(c.views) AS v FROM Content c WHERE c.platform = ? AND c.year_month = ? "
+        "GROUP BY c.hashtag ORDER BY v DESC LIMIT 1",
+        _global_top_hashtag,
+    ),
+    "global_category_dist": (
+        "SELECT c.category, SUM(c.views) AS v FROM Content c WHERE c.platform = ? AND c.year_month = ? "
+        "GROUP BY c.category ORDER BY v DESC",
+        _global_category_dist,
+    ),
+    "hashtag_main": (
+        "SELECT c.hashtag, SUM(c.views) AS v FROM Content c WHERE c.platform = ? AND c.country_id = ? "
+        "GROUP BY c.hashtag HAVING SUM(c.views) > ? ORDER BY v DESC",
+        _hashtag_main,
+    ),
+    "trend_main": (
+        "SELECT t.trend_type, SUM(c.views) AS v FROM Content c JOIN Trend t ON c.trend_id = t.trend_id "
+        "WHERE c.platform = ? AND c.country_id = ? AND c.publish_date_approx BETWEEN ? AND ? "
+        "GROUP BY t.trend_type ORDER BY v DESC",
+        _trend_main,
+    ),
+    "creator_total_views": (
+        "SELECT SUM(c.views) FROM Content c WHERE c.platform = ? AND c.year_month BETWEEN ? AND ?",
+        _creator_total_views,
+    ),
+    "creator_tier_agg": (
+        "SELECT a.creator_tier, SUM(c.views) AS v, COUNT(*) FROM Content c JOIN Author a ON c.author_id = a.author_id "
+        "WHERE c.platform = ? AND a.creator_tier IN ({tier_placeholders}) AND c.year_month BETWEEN ? AND ? "
+        "GROUP BY a.creator_tier ORDER BY v DESC",
+        _creator_tier_agg,
+    ),
+    "creator_single_tier_monthly": (
+        "SELECT c.year_month, SUM(c.views), COUNT(*) FROM Content c JOIN Author a ON c.author_id = a.author_id "
+        "WHERE c.platform = ? AND a.creator_tier = ? AND c.year_month BETWEEN ? AND ? "
+        "GROUP BY c.year_month ORDER BY c.year_month",
+        _creator_single_tier_monthly,
+    ),
+    "region_engagement_main": (
+        "SELECT c.platform, c.category, SUM(c.likes + c.comments + c.shares) AS e FROM Content c "
+        "JOIN Country co ON c.country_id = co.country_id WHERE co.region = ? "
+        "GROUP BY c.platform, c.category ORDER BY e DESC",
+        _region_engagement_main,
+    ),
+    "publish_timing_cube": (
+        "SELECT d.upload_hour, c.publish_period, c.publish_dayofweek, COUNT(*), COALESCE(SUM(c.views), 0), "
+        "COALESCE(SUM(c.engagement_rate), 0), COUNT(c.engagement_rate), MAX(c.engagement_rate), "
+        "MIN(c.engagement_rate), COALESCE(SUM(c.completion_rate), 0), COUNT(c.completion_rate) "
+        "FROM Content c LEFT JOIN Device d ON c.device_id = d.device_id "
+        "WHERE c.platform = ? AND (? IS NULL OR c.year_month BETWEEN ? AND ?) "
+        "GROUP BY d.upload_hour, c.publish_period, c.publish_dayofweek",
+        _publish_timing_cube,
+    ),
+}
+
+
+def normalize_sql(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip().rstrip(";").strip()
+
+
+def sql_supported(slug: str, stored_sql: str) -> bool:
+    """True when slug is implemented here and its stored SQL is the implemented text."""
+    entry = SUPPORTED_QUERIES.get(slug)
+    return entry is not None and normalize_sql(stored_sql) == normalize_sql(entry[0])
+
+
+def _int_batch(name: str, values: Sequence) -> Tuple[object, object]:
+    if set(map(type, values)) - {int, type(None)}:
+        raise Unsupported(f"{name}: non-integer values")
+    objects = np.array(values, dtype=object)
+    valid = np.not_equal(objects, None)
+    return np.where(valid, objects, 0).astype(np.int64), valid
+
+
+def _real_batch(name: str, values: Sequence) -> Tuple[object, object]:
+    if set(map(type, values)) - {int, float, type(None)}:
+        raise Unsupported(f"{name}: non-numeric values")
+    data = np.array(values, dtype=np.float64)  # None becomes NaN (SQLite itself never returns NaN)
+    valid = ~np.isnan(data)
+    return np.where(valid, data, 0.0), valid
+
+
+class _DimensionEncoder:
+    """Dictionary-encodes one Content column batch by batch into preallocated codes.
+
+    Codes are handed out in first-seen order while reading and renumbered to the
+    sorted dictionary order once every value is known.
+    """
+
+    def __init__(self, n: int) -> None:
+        self._seen: Dict[object, int] = {None: -1}
+        self.codes = np.empty(n, dtype=np.int32)
+
+    def add(self, start: int, values: Sequence) -> None:
+        seen = self._seen
+        for value in set(values).difference(seen):
+            seen[value] = len(seen) - 1
+        self.codes[start:start + len(values)] = np.fromiter(map(seen.__getitem__, values), dtype=np.int32,
+                                                            count=len(values))
+
+    def finish(self, n: int) -> Dimension:
+        distinct = list(self._seen)[1:]  # in code order, None (-1) first
+        kind = _value_kind(distinct)
+        order = sorted(range(len(distinct)), key=distinct.__getitem__)
+        renumber = np.empty(len(distinct) + 1, dtype=np.int32)  # indexed by first-seen code + 1
+        renumber[0] = -1
+        renumber[np.array(order, dtype=np.int64) + 1] = np.arange(len(order), dtype=np.int32)
+        return Dimension.encoded(kind, [distinct[i] for i in order], renumber[self.codes[:n] + 1])
+
+
+def _read_columns(conn: sqlite3.Connection, sql: str, width: int) -> List[list]:
+    """Columns of a (small) dimension table as Python lists."""
+    columns: List[list] = [[] for _ in range(width)]
+    for row in conn.execute(sql):
+        for column, value in zip(columns, row):
+            column.append(value)
+    return columns
+
+
+def load_columns(conn: sqlite3.Connection, version: Optional[int]) -> ContentColumns:
+    """Read Content and its dimension tables into a ContentColumns snapshot.
+
+    Run it inside a read transaction together with reading `version`, so the
+    snapshot and its version tag describe the same data. Content is fetched in
+    batches that are converted straight into preallocated arrays, so besides the
+    snapshot only one batch of Python objects is alive at a time.
+    """
+    if np is None:
+        raise Unsupported("numpy is not installed")
+    tables = {
+        key: _read_columns(conn, f"SELECT {key}, {', '.join(attributes)} FROM {table}", 1 + len(attributes))
+        for key, (table, attributes, _) in _JOINS.items()
+    }
+    positions = {key: {k: i for i, k in enumerate(columns[0])} for key, columns in tables.items()}
+    (n,) = conn.execute("SELECT COUNT(*) FROM Content").fetchone()
+    encoders: Dict[str, _DimensionEncoder] = {}
+    measures: Dict[str, Tuple[object, object]] = {}
+    # Row of the dimension table each Content row joins to, -1 when none does
+    join_rows = {key: np.empty(n, dtype=np.int32) for key in _JOINS}
+    for name, kind in _CONTENT_COLUMNS:
+        if kind == "dim":
+            encoders[name] = _DimensionEncoder(n)
+        elif kind != "key":
+            measures[name] = (np.empty(n, dtype=np.int64 if kind == "int" else np.float64), np.empty(n, dtype=bool))
+
+    names = [name for name, _ in _CONTENT_COLUMNS]
+    cursor = conn.execute(f"SELECT {', '.join(names)} FROM Content")
+    start = 0
+    while True:
+        batch = cursor.fetchmany(_LOAD_BATCH)
+        if not batch:
+            break
+        stop = start + len(batch)
+        if stop > n:
+            raise Unsupported("Content grew while loading; read it inside one transaction")
+        for (name, kind), values in zip(_CONTENT_COLUMNS, zip(*batch)):
+            if kind == "dim":
+                encoders[name].add(start, values)
+            elif kind != "key":
+                column, valid = measures[name]
+                column[start:stop], valid[start:stop] = (_int_batch if kind == "int" else _real_batch)(name, values)
+            if name in join_rows:
+                join_rows[name][start:stop] = np.fromiter(
+                    map(positions[name].get, values, itertools.repeat(-1)), dtype=np.int32, count=len(values))
+        start = stop
+    n = start
+
+    dims: Dict[str, Dimension] = {}
+    for name, encoder in encoders.items():
+        try:
+            dims[name] = encoder.finish(n)
+        except Unsupported as e:
+            raise Unsupported(f"{name}: {e}") from None
+    measures = {name: (values[:n], valid[:n]) for name, (values, valid) in measures.items()}
+    flags: Dict[str, object] = {}
+    for key, (table, attributes, flag) in _JOINS.items():
+        rows = join_rows[key][:n]
+        flags[flag] = rows >= 0
+        for attribute, values in zip(attributes, tables[key][1:]):
+            try:
+                table_dim = Dimension(values)
+            except Unsupported as e:
+                raise Unsupported(f"{table}.{attribute}: {e}") from None
+            # the appended -1 is what row -1 (no match) picks up
+            dims[attribute] = table_dim.view(np.append(table_dim.codes, np.int32(-1))[rows])
+    return ContentColumns(dims, measures, flags, version)
+
+
+def answer(cols: ContentColumns, slug: str, params: Sequence, fetch: str = "all"):
+    """Rows of a supported slug (fetchone() semantics for fetch='one'), or NOT_ANSWERED."""
+    entry = SUPPORTED_QUERIES.get(slug)
+    if entry is None:
+        return NOT_ANSWERED
+    try:
+        rows = entry[1](cols, tuple(params))
+    except (Unsupported, ValueError, TypeError):
+        return NOT_ANSWERED
+    if fetch == "one":
+        return rows[0] if rows else None
+    return rows
@@ -0,0 +1,120 @@
+"""Mergeable quantile sketch stored as a BLOB next to the monthly rollups.
+
+DDSketch-style: values are counted in logarithmic buckets, so any quantile comes
+back within RELATIVE_ACCURACY of a true value of that rank. Sketches of different
+months / countries merge by adding bucket counts, and a value can be removed again
+by adding it with count=-1, which lets the admin routes keep them current exactly
+like the rollups. Standard library only.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+from typing import Dict, Iterable, Optional
+
+RELATIVE_ACCURACY = 0.01
+# Magnitudes below this land in the zero bucket (rates are often exactly 0)
+MIN_INDEXABLE = 1e-9
+
+_HEADER = struct.Struct("<BdqII")
+_BIN = struct.Struct("<iq")
+_FORMAT_VERSION = 1
+
+
+class QuantileSketch:
+    """Log-bucket quantile sketch with a fixed relative accuracy."""
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY) -> None:
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _key(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def add(self, value: Optional[float], count: int = 1) -> None:
+        """Count `value` `count` times; a negative count removes earlier additions."""
+        if value is None:
+            return
+        value = float(value)
+        if math.isnan(value):
+            return
+        if abs(value) < MIN_INDEXABLE:
+            self.zero_count += count
+            return
+        store = self.positive if value > 0 else self.negative
+        key = self._key(abs(value))
+        remaining = store.get(key, 0) + count
+        if remaining:
+            store[key] = remaining
+        else:
+            store.pop(key, None)
+
+    def update(self, values: Iterable[Optional[float]], count: int = 1) -> None:
+        for value in values:
+            self.add(value, count)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.zero_count += other.zero_count
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                remaining = store.get(key, 0) + count
+                if remaining:
+                    store[key] = remaining
+                else:
+                    store.pop(key, None)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1), or None for an empty sketch."""
+        total = self.count
+        if total <= 0:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(_FORMAT_VERSION, self.relative_accuracy, self.zero_count,
+                              len(self.positive), len(self.negative))]
+        for store in (self.positive, self.negative):
+            parts.extend(_BIN.pack(key, count) for key, count in sorted(store.items()))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "QuantileSketch":
+        version, accuracy, zero_count, n_pos, n_neg = _HEADER.unpack_from(blob, 0)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported sketch format version {version}")
+        sketch = cls(accuracy)
+        sketch.zero_count = zero_count
+        offset = _HEADER.size
+        for store, n in ((sketch.positive, n_pos), (sketch.negative, n_neg)):
+            for _ in range(n):
+                key, count = _BIN.unpack_from(blob, offset)
+                store[key] = count
+                offset += _BIN.size
+        return sketch
@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""Benchmark every generate_* function and analysis route against synthetic data.
+
+    python scripts/benchmark.py generate --rows 1m --out bench/bench_1m.db
+    python scripts/benchmark.py run --db bench/bench_1m.db --output bench/1m.json
+    python scripts/benchmark.py run --db bench/bench_1m.db --compare bench/1m.json
+
+`generate` copies the table definitions, report_queries and report_templates from
+an existing database (the repo does not carry the DDL), fills Content and its
+dimension tables with seeded random rows, then builds the curated indexes and the
+rollups the way a reseed does. `run` points app.py at that database, drives each
+case through a pooled connection (functions) or Flask's test client (routes), and
+writes throughput, p50/p95/p99 latency and peak memory to JSON. With --compare it
+exits non-zero when a case's p95 regressed beyond --threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import os
+import platform as platform_module
+import random
+import sqlite3
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from analytics_db import ensure_indexes, init_data_versions_table, rebuild_rollups  # noqa: E402
+
+DB_PATH = PROJECT_ROOT / "Tiktok_youtube.db"
+SIZE_PRESETS = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+BATCH_SIZE = 50_000
+
+# Tables copied from the schema source; the rollups, sketches and data_versions are rebuilt
+BASE_TABLES = ("Country", "Author", "Device", "Trend", "Content", "Content_Tags", "Content_Comments")
+COPIED_TABLES = ("report_queries", "report_templates")
+
+PLATFORMS = ("TikTok", "YouTube")
+CATEGORIES = ("Music", "Gaming", "Food", "Travel", "Tech", "Beauty", "Sports", "Education", "Comedy", "Lifestyle")
+TIERS = ("Micro", "Mid", "Macro", "Star")
+PERIODS = ("Morning", "Afternoon", "Evening", "Night")
+TREND_TYPES = ("Viral", "Seasonal", "Evergreen", "Challenge", "Meme")
+SEASONS = ("Winter", "Spring", "Summer", "Autumn")
+EVENTS = ("None", "Holiday", "Back To School", "Summer Break")
+DEVICE_TYPES = ("Android", "iOS", "Desktop")
+DEVICE_BRANDS = ("Samsung", "Apple", "Xiaomi", "Google", "Other")
+TRAFFIC_SOURCES = ("ForYou", "Search", "Following", "External")
+COUNTRIES = (
+    ("US", "United States", "North America", "en"), ("CA", "Canada", "North America", "en"),
+    ("MX", "Mexico", "North America", "es"), ("BR", "Brazil", "South America", "pt"),
+    ("AR", "Argentina", "South America", "es"), ("GB", "United Kingdom", "Europe", "en"),
+    ("DE", "Germany", "Europe", "de"), ("FR", "France", "Europe", "fr"), ("ES", "Spain", "Europe", "es"),
+    ("IT", "Italy", "Europe", "it"), ("JP", "Japan", "Asia", "ja"), ("KR", "South Korea", "Asia", "ko"),
+    ("IN", "India", "Asia", "hi"), ("ID", "Indonesia", "Asia", "id"), ("AU", "Australia", "Oceania", "en"),
+    ("ZA", "South Africa", "Africa", "en"), ("NG", "Nigeria", "Africa", "en"), ("EG", "Egypt", "Africa", "ar"),
+)
+FIRST_DAY = dt.date(2024, 1, 1)
+DAYS = 730
+
+
+def parse_rows(value: str) -> int:
+    value = value.lower().replace("_", "")
+    if value in SIZE_PRESETS:
+        return SIZE_PRESETS[value]
+    return int(value)
+
+
+def peak_rss_mib() -> float | None:
+    """Peak resident set size of this process so far, in MiB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# ---------------------------------------------------------------------------
+# generate
+# ---------------------------------------------------------------------------
+def copy_schema(source: sqlite3.Connection, target: sqlite3.Connection) -> List[str]:
+    """Create the base tables in `target` and copy the stored queries/templates; returns the index DDL."""
+    tables = BASE_TABLES + COPIED_TABLES
+    placeholders = ", ".join("?" for _ in tables)
+    rows = source.execute(
+        f"SELECT type, name, sql FROM sqlite_master WHERE tbl_name IN ({placeholders}) AND sql IS NOT NULL",
+        tables,
+    ).fetchall()
+    missing = set(tables) - {name for kind, name, _ in rows if kind == "table"}
+    if missing:
+        raise ValueError(f"Schema source lacks tables: {', '.join(sorted(missing))}")
+    for kind, _, sql in rows:
+        if kind == "table":
+            target.execute(sql)
+    for table in COPIED_TABLES:
+        columns = [row[1] for row in source.execute(f"PRAGMA table_info({table})")]
+        column_list = ", ".join(columns)
+        target.executemany(
+            f"INSERT INTO {table} ({column_list}) VALUES ({', '.join('?' for _ in columns)})",
+            source.execute(f"SELECT {column_list} FROM {table}"),
+        )
+    return [sql for kind, _, sql in rows if kind == "index"]
+
+
+def seed_dimensions(conn: sqlite3.Connection, rnd: random.Random, rows: int) -> Dict[str, int]:
+    conn.executemany("INSERT INTO Country (country_code, country_name, region, language) VALUES (?, ?, ?, ?)", COUNTRIES)
+    authors = max(rows // 50, 100)
+    conn.executemany(
+        "INSERT INTO Author (author_handle, creator_avg_views, creator_tier) VALUES (?, ?, ?)",
+        ((f"@creator{i}", round(rnd.lognormvariate(9, 1.5), 1), rnd.choices(TIERS, (55, 28, 12, 5))[0])
+         for i in range(authors)),
+    )
+    conn.executemany(
+        "INSERT INTO Device (device_type, device_brand, upload_hour, traffic_source, is_weekend) VALUES (?, ?, ?, ?, ?)",
+        ((device, brand, hour, source, weekend)
+         for device in DEVICE_TYPES for brand in DEVICE_BRANDS for hour in range(24)
+         for source in TRAFFIC_SOURCES for weekend in (0, 1)),
+    )
+    conn.executemany(
+        "INSERT INTO Trend (trend_label, trend_type, trend_duration_days, engagement_velocity, source_hint) VALUES (?, ?, ?, ?, ?)",
+        ((f"trend{i}", TREND_TYPES[i % len(TREND_TYPES)], 1 + i % 60, round(rnd.random() * 5, 3), "N/A")
+         for i in range(200)),
+    )
+    return {
+        "countries": len(COUNTRIES),
+        "authors": authors,
+        "devices": conn.execute("SELECT COUNT(*) FROM Device").fetchone()[0],
+        "trends": 200,
+    }
+
+
+def content_rows(rnd: random.Random, rows: int, dims: Dict[str, int], columns: Sequence[str]) -> Iterator[Tuple]:
+    """Content rows as tuples ordered like `columns`; values follow the cleaned-data conventions."""
+    days = [FIRST_DAY + dt.timedelta(days=i) for i in range(DAYS)]
+    day_info = [(d.isoformat(), d.isoformat()[:7], d.strftime("%A"), d.isocalendar()[1],
+                 SEASONS[(d.month % 12) // 3]) for d in days]
+    hashtags = [f"#tag{i}" for i in range(500)]
+    for i in range(rows):
+        publish_date, year_month, dayofweek, week, season = day_info[rnd.randrange(DAYS)]
+        views = int(rnd.lognormvariate(9, 2))
+        likes = int(views * rnd.random() * 0.12)
+        comments = int(likes * rnd.random() * 0.1)
+        shares = int(likes * rnd.random() * 0.05)
+        saves = int(likes * rnd.random() * 0.05)
+        dislikes = int(likes * rnd.random() * 0.02)
+        engagement_total = likes + comments + shares
+        rate = engagement_total / views if views else 0.0
+        duration = rnd.randrange(5, 600)
+        watch = round(duration * rnd.random(), 2)
+        values = {
+            "content_id": f"bench{i}",
+            "platform": PLATFORMS[rnd.random() < 0.45],
+            "category": rnd.choice(CATEGORIES),
+            "hashtag": hashtags[int(rnd.paretovariate(1.2)) % len(hashtags)],
+            "title": f"Video {i}",
+            "title_keywords": "benchmark",
+            "title_length": 8 + i % 40,
+            "has_emoji": int(rnd.random() < 0.3),
+            "duration_sec": duration,
+            "views": views,
+            "likes": likes,
+            "comments": comments,
+            "shares": shares,
+            "saves": saves,
+            "dislikes": dislikes,
+            "engagement_rate": round(rate, 4),
+            "engagement_total": engagement_total,
+            "like_rate": round(likes / views, 4) if views else 0.0,
+            "dislike_rate": round(dislikes / views, 5) if views else 0.0,
+            "engagement_per_1k": round(rate * 1000, 3),
+            "engagement_like_rate": round(likes / engagement_total, 4) if engagement_total else 0.0,
+            "engagement_comment_rate": round(comments / engagement_total, 4) if engagement_total else 0.0,
+            "engagement_share_rate": round(shares / engagement_total, 4) if engagement_total else 0.0,
+            "avg_watch_time_sec": watch,
+            "completion_rate": round(watch / duration, 4),
+            "publish_date_approx": publish_date,
+            "year_month": year_month,
+            "publish_dayofweek": dayofweek,
+            "publish_period": rnd.choice(PERIODS),
+            "event_season": rnd.choice(EVENTS),
+            "season": season,
+            "week_of_year": week,
+            "country_id": 1 + int(rnd.paretovariate(1.5) - 1) % dims["countries"],
+            "author_id": rnd.randrange(1, dims["authors"] + 1),
+            "device_id": rnd.randrange(1, dims["devices"] + 1),
+            "trend_id": rnd.randrange(1, dims["trends"] + 1),
+        }
+        yield tuple(values.get(column) for column in columns)
+
+
+def generate_database(out: Path, rows: int, schema_from: Path, seed: int) -> None:
+    if not schema_from.exists():
+        raise FileNotFoundError(f"Schema source database not found: {schema_from}")
+    if out.exists():
+        out.unlink()
+    out.parent.mkdir(parents=True, exist_ok=True)
+    rnd = random.Random(seed)
+    started = time.perf_counter()
+    source = sqlite3.connect(f"file:{schema_from}?mode=ro", uri=True)
+    conn = sqlite3.connect(out)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    try:
+        with conn:
+            index_ddl = copy_schema(source, conn)
+            dims = seed_dimensions(conn, rnd, rows)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(Content)")]
+        insert = f"INSERT INTO Content ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        done = 0
+        batch: List[Tuple] = []
+        for row in content_rows(rnd, rows, dims, columns):
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                done += _insert_batch(conn, insert, batch, rnd)
+                batch = []
+                print(f"[progress] Content: {done:,}/{rows:,} rows in {time.perf_counter() - started:.1f}s")
+        if batch:
+            done += _insert_batch(conn, insert, batch, rnd)
+        with conn:
+            for ddl in index_ddl:
+                conn.execute(ddl)
+            created = ensure_indexes(conn)
+            init_data_versions_table(conn)
+            counts = rebuild_rollups(conn)
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA journal_mode = WAL")
+    finally:
+        source.close()
+        conn.close()
+    print(f"[info] Wrote {done:,} Content rows to {out} in {time.perf_counter() - started:.1f}s")
+    print(f"[info] Indexes created: {', '.join(created) or '-'}; rollups: {counts}")
+
+
+def _insert_batch(conn: sqlite3.Connection, insert: str, batch: List[Tuple], rnd: random.Random) -> int:
+    """One Content batch plus a tag for about half and a comment for a third of its rows."""
+    with conn:
+        conn.executemany(insert, batch)
+        conn.executemany(
+            "INSERT INTO Content_Tags (content_id, tag) VALUES (?, ?)",
+            ((row[0], f"tag{rnd.randrange(200)}") for row in batch if rnd.random() < 0.5),
+        )
+        conn.executemany(
+            "INSERT INTO Content_Comments (content_id, sample_comment) VALUES (?, ?)",
+            ((row[0], "nice video") for row in batch if rnd.random() < 0.33),
+        )
+    return len(batch)
+
+
+# ---------------------------------------------------------------------------
+# run
+# ---------------------------------------------------------------------------
+@dataclass
+class Case:
+    name: str
+    kind: str  # "function" or "route"
+    call: Callable[[], Optional[str]]  # one operation; returns an error message or None
+
+
+def sample_values(conn: sqlite3.Connection) -> Dict[str, object]:
+    """Parameters taken from the data so every case hits populated rows."""
+    def one(sql: str, default: object = None) -> object:
+        row = conn.execute(sql).fetchone()
+        return row[0] if row and row[0] is not None else default
+
+    return {
+        "platform": one("SELECT platform FROM Content GROUP BY platform ORDER BY COUNT(*) DESC LIMIT 1", "TikTok"),
+        "first_month": one("SELECT MIN(year_month) FROM Content", "2025-01"),
+        "year_month": one("SELECT MAX(year_month) FROM Content", "2025-01"),
+        "first_date": one("SELECT MIN(publish_date_approx) FROM Content", "2025-01-01"),
+        "last_date": one("SELECT MAX(publish_date_approx) FROM Content", "2025-12-31"),
+        "country_code": one(
+            "SELECT co.country_code FROM Content c JOIN Country co ON co.country_id = c.country_id "
+            "GROUP BY co.country_code ORDER BY COUNT(*) DESC LIMIT 1", "US"),
+        "region": one(
+            "SELECT co.region FROM Content c JOIN Country co ON co.country_id = c.country_id "
+            "GROUP BY co.region ORDER BY COUNT(*) DESC LIMIT 1", "Europe"),
+    }
+
+
+def build_cases(webapp, v: Dict[str, object]) -> List[Case]:
+    def function_case(name: str, func: Callable, *args) -> Case:
+        def call() -> Optional[str]:
+            conn = webapp.db_pool.acquire()
+            try:
+                result = func(conn, *args)
+            finally:
+                webapp.db_pool.release(conn)
+            return (result.get("error") or None) if isinstance(result, dict) else None
+        return Case(name, "function", call)
+
+    client = webapp.app.test_client()
+
+    def route_case(method: str, path: str, payload: Optional[dict] = None, label: str = "") -> Case:
+        def call() -> Optional[str]:
+            response = client.open(path, method=method, json=payload)
+            body = response.get_json(silent=True)
+            if response.status_code != 200:
+                return f"HTTP {response.status_code}: {body}"
+            return (body.get("error") or None) if isinstance(body, dict) else None
+        return Case(f"{method} {path}{label}", "route", call)
+
+    platform, months = v["platform"], (v["first_month"], v["year_month"])
+    return [
+        function_case("list_all_platforms", webapp.list_all_platforms),
+        function_case("list_all_countries", webapp.list_all_countries),
+        function_case("list_all_year_months", webapp.list_all_year_months),
+        function_case("generate_global_analysis", webapp.generate_global_analysis, platform, v["year_month"]),
+        function_case("generate_hashtag_report", webapp.generate_hashtag_report, platform, v["country_code"], 1000),
+        function_case("generate_trend_report", webapp.generate_trend_report,
+                      platform, v["country_code"], v["first_date"], v["last_date"]),
+        function_case("generate_creator_performance", webapp.generate_creator_performance,
+                      platform, "All (all tiers)", *months),
+        function_case("generate_region_ad_recommendation", webapp.generate_region_ad_recommendation, v["region"]),
+        function_case("generate_platform_dominance_extended", webapp.generate_platform_dominance_extended,
+                      v["country_code"]),
+        function_case("generate_percentiles", webapp.generate_percentiles, platform, *months),
+        function_case("generate_publish_timing_analysis[Hourly]", webapp.generate_publish_timing_analysis,
+                      platform, "Hourly"),
+        function_case("generate_publish_timing_analysis[Day Parts]", webapp.generate_publish_timing_analysis,
+                      platform, "Day Parts"),
+        function_case("generate_publish_timing_analysis[Week Analysis]", webapp.generate_publish_timing_analysis,
+                      platform, "Week Analysis"),
+        function_case("generate_publish_timing_analysis[Heatmap]", webapp.generate_publish_timing_analysis,
+                      platform, "Heatmap"),
+        route_case("GET", "/api/platforms"),
+        route_case("GET", "/api/countries"),
+        route_case("GET", "/api/year-months"),
+        route_case("POST", "/api/global-analysis", {"platform": platform, "year_month": v["year_month"]}),
+        route_case("POST", "/api/hashtag-report",
+                   {"platform": platform, "country_code": v["country_code"], "min_views": 1000}),
+        route_case("POST", "/api/trend-report", {"platform": platform, "country_code": v["country_code"],
+                                                 "start_date": v["first_date"], "end_date": v["last_date"]}),
+        route_case("POST", "/api/publish-timing-analysis", {"platform": platform, "time_analysis": "Hourly"}),
+        route_case("POST", "/api/creator-performance", {"platform": platform, "creator_scope": "All (all tiers)",
+                                                        "start_month": months[0], "end_month": months[1]}),
+        route_case("POST", "/api/region-ad-reco", {"region": v["region"]}),
+        route_case("POST", "/api/platform-dominance-extended", {"country_code": v["country_code"]}),
+        route_case("POST", "/api/percentiles", {"platform": platform, "start_month": months[0], "end_month": months[1]}),
+        route_case("POST", "/api/batch", {"requests": [
+            {"endpoint": "platforms"}, {"endpoint": "countries"}, {"endpoint": "year-months"}]}),
+    ]
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_case(case: Case, iterations: int, warmup: int, concurrency: int) -> Dict[str, object]:
+    errors: List[str] = []
+
+    def timed() -> float:
+        started = time.perf_counter()
+        error = case.call()
+        elapsed = time.perf_counter() - started
+        if error:
+            errors.append(str(error))
+        return elapsed
+
+    for _ in range(warmup):
+        case.call()
+    wall_started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(lambda _: timed(), range(iterations)))
+    else:
+        latencies = [timed() for _ in range(iterations)]
+    wall = time.perf_counter() - wall_started
+
+    # One extra, untimed call under tracemalloc for the Python-side allocation peak
+    tracemalloc.start()
+    try:
+        case.call()
+        _, peak_alloc = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    ms = [value * 1000 for value in latencies]
+    return {
+        "name": case.name,
+        "kind": case.kind,
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / wall, 2) if wall > 0 else None,
+        "latency_ms": {
+            "p50": round(percentile(ms, 0.50), 3),
+            "p95": round(percentile(ms, 0.95), 3),
+            "p99": round(percentile(ms, 0.99), 3),
+            "mean": round(sum(ms) / len(ms), 3),
+            "min": round(ms[0], 3),
+            "max": round(ms[-1], 3),
+        },
+        "peak_alloc_kib": round(peak_alloc / 1024, 1),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def load_app(db: Path, response_cache: bool, columnar: bool):
+    """Import app.py against `db`; must run before anything else imports it."""
+    os.environ["DB_PATH"] = str(db)
+    os.environ.setdefault("USER_DB_PATH", str(db.with_name("bench_user.db")))
+    os.environ.setdefault("SLOW_QUERY_MS", "0")
+    if not response_cache:
+        os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+    os.environ["COLUMNAR_ENGINE"] = "1" if columnar else "0"
+    import app as webapp
+    if columnar:
+        if not webapp.columnar_engine.enabled:
+            raise RuntimeError("--columnar needs numpy installed")
+        # load up front so the first timed calls don't fall back to SQLite
+        webapp.columnar_engine.load()
+        stats = webapp.columnar_engine.stats()
+        if stats["last_error"]:
+            raise RuntimeError(f"Columnar engine could not load: {stats['last_error']}")
+        print(f"[info] Columnar snapshot: {stats['rows']:,} rows, {stats['bytes'] / 2**20:.1f} MiB "
+              f"in {stats['load_seconds']}s")
+    return webapp
+
+
+def run_benchmarks(args: argparse.Namespace) -> Dict[str, object]:
+    if not args.db.exists():
+        raise FileNotFoundError(f"Database file not found: {args.db}")
+    webapp = load_app(args.db.resolve(), args.response_cache, args.columnar)
+    conn = sqlite3.connect(args.db)
+    try:
+        values = sample_values(conn)
+        rows = conn.execute("SELECT COUNT(*) FROM Content").fetchone()[0]
+    finally:
+        conn.close()
+
+    results = []
+    for case in build_cases(webapp, values):
+        if args.filter and args.filter not in case.name:
+            continue
+        result = run_case(case, args.iterations, args.warmup, args.concurrency)
+        lat = result["latency_ms"]
+        flag = f"  [{result['errors']} errors: {result['first_error']}]" if result["errors"] else ""
+        print(f"{case.name:<52} p50 {lat['p50']:>9.2f} ms  p95 {lat['p95']:>9.2f} ms  "
+              f"p99 {lat['p99']:>9.2f} ms  {result['ops_per_sec']:>9} ops/s{flag}")
+        results.append(result)
+    return {
+        "meta": {
+            "created_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+            "db": str(args.db),
+            "rows": rows,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "response_cache": args.response_cache,
+            "columnar": args.columnar,
+            "params": values,
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform_module.platform(),
+        },
+        "results": results,
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+
+def compare_runs(baseline: Dict[str, object], current: Dict[str, object], threshold: float) -> List[str]:
+    """Print p50/p95 changes per case; returns the names whose p95 grew by more than `threshold`."""
+    before = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    print(f"==== compared with {baseline['meta'].get('created_at')} ({baseline['meta'].get('rows'):,} rows) ====")
+    for key in ("rows", "concurrency", "response_cache", "columnar"):
+        if baseline["meta"].get(key) != current["meta"].get(key):
+            print(f"[warn] {key} differs: {baseline['meta'].get(key)} -> {current['meta'].get(key)}")
+    for result in current["results"]:
+        old = before.get(result["name"])
+        if old is None:
+            print(f"{result['name']:<52} (new)")
+            continue
+        changes = []
+        for key in ("p50", "p95"):
+            was, now = old["latency_ms"][key], result["latency_ms"][key]
+            change = (now - was) / was if was else 0.0
+            changes.append(f"{key} {was:.2f} -> {now:.2f} ms ({change:+.0%})")
+            if key == "p95" and change > threshold:
+                regressions.append(result["name"])
+        print(f"{result['name']:<52} {'  '.join(changes)}")
+    return regressions
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="Write a synthetic database")
+    gen.add_argument("--rows", type=parse_rows, default=SIZE_PRESETS["10k"],
+                     help="Content rows: 10k, 1m, 10m or any integer (default 10k)")
+    gen.add_argument("--out", type=Path, required=True, help="Database file to create (overwritten)")
+    gen.add_argument("--schema-from", type=Path, default=DB_PATH,
+                     help="Database providing the table DDL, report_queries and report_templates")
+    gen.add_argument("--seed", type=int, default=42, help="Random seed; the same seed gives the same rows")
+
+    run = commands.add_parser("run", help="Benchmark the functions and routes against a database")
+    run.add_argument("--db", type=Path, required=True, help="Database to benchmark (e.g. from `generate`)")
+    run.add_argument("--iterations", type=int, default=20, help="Timed calls per case")
+    run.add_argument("--warmup", type=int, default=2, help="Untimed calls per case first")
+    run.add_argument("--concurrency", type=int, default=1, help="Threads issuing the timed calls")
+    run.add_argument("--response-cache", action="store_true",
+                     help="Keep the response cache on (default off, so routes measure the real work)")
+    run.add_argument("--columnar", action="store_true",
+                     help="Answer the supported queries from the in-memory columnar engine (needs numpy)")
+    run.add_argument("--filter", default="", help="Only cases whose name contains this text")
+    run.add_argument("--output", type=Path, help="Write the results as JSON")
+    run.add_argument("--compare", type=Path, help="Earlier JSON results to compare against")
+    run.add_argument("--threshold", type=float, default=0.2,
+                     help="Allowed relative p95 increase before --compare fails (default 0.2)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    if args.command == "generate":
+        generate_database(args.out, args.rows, args.schema_from, args.seed)
+        return
+
+    report = run_benchmarks(args)
+    peak = report["peak_rss_mib"]
+    print(f"[info] Peak RSS: {f'{peak:.1f} MiB' if peak is not None else 'n/a'}")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"[info] Results written to {args.output}")
+    if args.compare:
+        regressions = compare_runs(json.loads(args.compare.read_text(encoding="utf-8")), report, args.threshold)
+        if regressions:
+            print(f"[error] p95 regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,42 @@
 
 from __future__ import annotations
 
+import argparse
 import re
 import shutil
 import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Sequence, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, TypeVar
 
+import numpy as np
 import pandas as pd
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from analytics_db import (  # noqa: E402  (needs PROJECT_ROOT on sys.path)
+    DIMENSIONS_VERSION,
+    ROLLUPS_VERSION,
+    apply_rollup_delta,
+    bump_data_version,
+    drop_indexes,
+    ensure_indexes,
+    mark_version_synced,
+    rebuild_rollups,
+    rollups_current,
+)
+
+T = TypeVar("T")
+
 DB_PATH = PROJECT_ROOT / "Tiktok_youtube.db"
 CSV_PATH = PROJECT_ROOT / "youtube_shorts_tiktok_trends_2025.csv"
 
@@ -56,6 +83,58 @@ PLATFORM_NORMALIZER = {
     "youtube shorts": "YouTube",
 }
 
+DEFAULT_BATCH_SIZE = 50_000
+
+# Explicit read_csv dtypes: low-cardinality text as categoricals, free text as str,
+# so every chunk parses the same way; numeric columns are coerced after reading.
+CATEGORICAL_COLUMNS = [
+    "platform", "category", "creator_tier", "country", "region", "language",
+    "publish_dayofweek", "publish_period", "event_season", "season",
+    "trend_label", "trend_type", "device_type", "device_brand", "traffic_source",
+    "has_emoji", "is_weekend",
+]
+TEXT_COLUMNS = [
+    "row_id", "hashtag", "title", "title_keywords", "author_handle", "source_hint",
+    "publish_date_approx", "tags", "sample_comments",
+]
+CSV_DTYPES: Dict[str, str] = {
+    **{col: "category" for col in CATEGORICAL_COLUMNS},
+    **{col: "str" for col in TEXT_COLUMNS},
+}
+
+DEVICE_KEY = ["device_type", "device_brand", "upload_hour", "traffic_source", "is_weekend"]
+TREND_KEY = ["trend_label", "trend_type", "trend_duration_days"]
+
+# Content columns in insert order; content_id comes from row_id, the last four are looked up
+CONTENT_COLUMNS = [
+    "content_id", "platform", "category", "hashtag", "title", "title_keywords", "title_length",
+    "has_emoji", "duration_sec", "views", "likes", "comments", "shares", "saves", "dislikes",
+    "engagement_rate", "engagement_total", "like_rate", "dislike_rate", "engagement_per_1k",
+    "engagement_like_rate", "engagement_comment_rate", "engagement_share_rate",
+    "avg_watch_time_sec", "completion_rate", "publish_date_approx", "year_month",
+    "publish_dayofweek", "publish_period", "event_season", "season", "week_of_year",
+    "country_id", "author_id", "device_id", "trend_id",
+]
+
+# --workers splits a whole-file load into this many shards per worker to even out the load
+SHARDS_PER_WORKER = 4
+
+# Above this many touched rows an incremental run rebuilds the rollups instead of patching them
+ROLLUP_DELTA_LIMIT = 20_000
+
+# Per-row fingerprints of the cleaned CSV rows and the ingest high-water mark, used by
+# --incremental to tell new/changed row_ids from ones that are already loaded.
+INGEST_TABLES_DDL = """
+CREATE TABLE IF NOT EXISTS ingest_fingerprints (
+    content_id TEXT PRIMARY KEY,
+    fingerprint INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ingest_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
 CREATOR_TIER_MAP = {
     "mega": "Mega",
     "macro": "Macro",
@@ -113,50 +192,135 @@ def normalize_creator_tier(value: str) -> str:
     return CREATOR_TIER_MAP.get(key, "Mid")
 
 
-def load_and_clean_dataframe(csv_path: Path) -> pd.DataFrame:
+def map_distinct(series: pd.Series, func: Callable[[str], object]) -> pd.Series:
+    """Apply a scalar text cleaner once per distinct value instead of once per row.
+
+    Values are stringified exactly like ``series.astype(str)`` (missing -> "nan").
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        uniques = [str(value) for value in series.cat.categories] + ["nan"]
+        codes = series.cat.codes.to_numpy()
+        codes = np.where(codes < 0, len(uniques) - 1, codes)
+    else:
+        codes, uniques = pd.factorize(series.astype(str))
+    cleaned = np.empty(len(uniques), dtype=object)
+    for i, value in enumerate(uniques):
+        cleaned[i] = func(value)
+    return pd.Series(cleaned[codes], index=series.index)
+
+
+def _title_or(default: str) -> Callable[[str], str]:
+    return lambda value: value.strip().title() or default
+
+
+def _spaces_or(default: str) -> Callable[[str], str]:
+    return lambda value: normalize_spaces(value) or default
+
+
+def _prepare_row_ids(df: pd.DataFrame) -> pd.DataFrame:
+    df["row_id"] = df["row_id"].astype(str).str.strip()
+    return df[df["row_id"] != ""]
+
+
+def load_and_clean_dataframe(csv_path: Path, workers: int = 1) -> pd.DataFrame:
     if not csv_path.exists():
         raise FileNotFoundError(f"CSV file not found: {csv_path}")
 
-    df = pd.read_csv(csv_path)
-    df["row_id"] = df["row_id"].astype(str).str.strip()
-    df = df[df["row_id"] != ""]
+    df = _prepare_row_ids(pd.read_csv(csv_path, dtype=CSV_DTYPES))
     df = df.drop_duplicates(subset=["row_id"]).reset_index(drop=True)
+    if workers <= 1 or df.empty:
+        return clean_dataframe(df)
+    # Dedup already happened on the whole file, so shards are independent; they keep
+    # their original index labels and are concatenated back in file order.
+    shard_size = -(-len(df) // (workers * SHARDS_PER_WORKER)) or 1
+    shards = (df.iloc[start:start + shard_size] for start in range(0, len(df), shard_size))
+    return pd.concat(list(clean_in_pool(shards, workers)))
+
+
+def clean_in_pool(frames: Iterable[pd.DataFrame], workers: int) -> Iterator[pd.DataFrame]:
+    """Run clean_dataframe over `frames` in a process pool, yielding results in input order.
+
+    At most 2 * workers frames are in flight, so streaming input stays memory-bounded.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: deque[Future] = deque()
+        for frame in frames:
+            pending.append(pool.submit(clean_dataframe, frame))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class RowIdFilter:
+    """Remembers row_ids across chunks as 64-bit hashes (8 bytes each, not the strings)."""
+
+    def __init__(self) -> None:
+        self._seen: set[int] = set()
+        self.duplicates = 0
+
+    def first_seen(self, row_ids: pd.Series) -> pd.Series:
+        hashes = pd.util.hash_pandas_object(row_ids, index=False)
+        fresh = ~hashes.duplicated() & ~hashes.isin(self._seen)
+        self._seen.update(hashes[fresh].tolist())
+        self.duplicates += int((~fresh).sum())
+        return fresh
+
+
+def iter_clean_chunks(
+    csv_path: Path,
+    chunk_size: int,
+    row_filter: RowIdFilter | None = None,
+    workers: int = 1,
+) -> Iterator[pd.DataFrame]:
+    """Read the CSV `chunk_size` rows at a time and yield each chunk cleaned.
+
+    A row_id is kept the first time it appears in the file, as in load_and_clean_dataframe.
+    Dedup runs in this process before chunks are handed to workers, so it sees the whole file.
+    """
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV file not found: {csv_path}")
+
+    row_filter = row_filter if row_filter is not None else RowIdFilter()
+
+    def raw_chunks() -> Iterator[pd.DataFrame]:
+        with pd.read_csv(csv_path, dtype=CSV_DTYPES, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                chunk = _prepare_row_ids(chunk)
+                yield chunk[row_filter.first_seen(chunk["row_id"])].reset_index(drop=True)
 
+    if workers > 1:
+        yield from clean_in_pool(raw_chunks(), workers)
+    else:
+        yield from map(clean_dataframe, raw_chunks())
+
+
+def clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     # Basic text normalisation
-    df["platform"] = df["platform"].astype(str).apply(normalize_platform)
+    df["platform"] = map_distinct(df["platform"], normalize_platform)
     df = df[df["platform"] != ""]
-    df["category"] = (
-        df["category"]
-        .astype(str)
-        .apply(normalize_spaces)
-        .replace("", "Misc")
-        .str.title()
-    )
-    df["hashtag"] = df["hashtag"].astype(str).apply(clean_hashtag)
-    df["title"] = df["title"].astype(str).apply(normalize_spaces).replace("", "Untitled")
-    df["title_keywords"] = df["title_keywords"].astype(str).apply(normalize_spaces)
+    df["category"] = map_distinct(df["category"], lambda value: (normalize_spaces(value) or "Misc").title())
+    df["hashtag"] = map_distinct(df["hashtag"], clean_hashtag)
+    df["title"] = map_distinct(df["title"], _spaces_or("Untitled"))
+    df["title_keywords"] = map_distinct(df["title_keywords"], normalize_spaces)
     df["title_length"] = df["title"].str.len()
-    df["author_handle"] = df["author_handle"].astype(str).apply(normalize_spaces)
+    df["author_handle"] = map_distinct(df["author_handle"], normalize_spaces)
     df = df[df["author_handle"] != ""]
-    df["creator_tier"] = df["creator_tier"].astype(str).apply(normalize_creator_tier)
-    df["country_code"] = df["country"].astype(str).str.strip().str.upper()
+    df["creator_tier"] = map_distinct(df["creator_tier"], normalize_creator_tier)
+    df["country_code"] = map_distinct(df["country"], lambda value: value.strip().upper())
     df = df[df["country_code"] != ""]
     df["country_name"] = df["country_code"].map(COUNTRY_NAME_MAP).fillna(df["country_code"])
-    df["region"] = df["region"].astype(str).apply(normalize_spaces).str.title().replace("", "Unknown")
-    df["language"] = df["language"].astype(str).str.strip().str.lower().replace("", "en")
+    df["region"] = map_distinct(df["region"], lambda value: normalize_spaces(value).title() or "Unknown")
+    df["language"] = map_distinct(df["language"], lambda value: value.strip().lower() or "en")
 
-    df["publish_dayofweek"] = df["publish_dayofweek"].astype(str).str.strip().str.title()
-    df["publish_period"] = df["publish_period"].astype(str).str.strip().str.title()
-    df["event_season"] = df["event_season"].astype(str).str.strip().str.title()
-    df["season"] = df["season"].astype(str).str.strip().str.title()
+    df["publish_dayofweek"] = map_distinct(df["publish_dayofweek"], _title_or(""))
+    df["publish_period"] = map_distinct(df["publish_period"], _title_or(""))
+    df["event_season"] = map_distinct(df["event_season"], _title_or(""))
+    df["season"] = map_distinct(df["season"], _title_or(""))
 
-    df["trend_label"] = (
-        df["trend_label"].astype(str).str.strip().str.title().replace("", "General")
-    )
-    df["trend_type"] = (
-        df["trend_type"].astype(str).str.strip().str.title().replace("", "General")
-    )
-    df["source_hint"] = df["source_hint"].astype(str).apply(normalize_spaces).replace("", "N/A")
+    df["trend_label"] = map_distinct(df["trend_label"], _title_or("General"))
+    df["trend_type"] = map_distinct(df["trend_type"], _title_or("General"))
+    df["source_hint"] = map_distinct(df["source_hint"], _spaces_or("N/A"))
 
     # Numeric coercion
     int_columns = [
@@ -208,12 +372,12 @@ def load_and_clean_dataframe(csv_path: Path) -> pd.DataFrame:
     df["year_month"] = df["publish_date_approx"].str.slice(0, 7)
 
     df["tags_list"] = df["tags"].astype(str).apply(split_tags)
-    df["sample_comment_clean"] = df["sample_comments"].astype(str).str.strip()
+    df["sample_comment_clean"] = map_distinct(df["sample_comments"], str.strip)
 
     # Ensure device fields are clean
-    df["device_type"] = df["device_type"].astype(str).apply(normalize_spaces).replace("", "Unknown")
-    df["device_brand"] = df["device_brand"].astype(str).apply(normalize_spaces).replace("", "Unknown")
-    df["traffic_source"] = df["traffic_source"].astype(str).apply(normalize_spaces).replace("", "Unknown")
+    df["device_type"] = map_distinct(df["device_type"], _spaces_or("Unknown"))
+    df["device_brand"] = map_distinct(df["device_brand"], _spaces_or("Unknown"))
+    df["traffic_source"] = map_distinct(df["traffic_source"], _spaces_or("Unknown"))
 
     needed_columns = [
         "row_id",
@@ -279,6 +443,7 @@ def backup_database(db_path: Path) -> Path:
 
 def clear_existing_tables(conn: sqlite3.Connection) -> None:
     tables = [
+        "ingest_fingerprints",
         "Content_Tags",
         "Content_Comments",
         "Content",
@@ -295,61 +460,100 @@ def clear_existing_tables(conn: sqlite3.Connection) -> None:
     cur.execute(f"DELETE FROM sqlite_sequence WHERE name IN ({placeholders})", seq_tables)
 
 
-def seed_countries(conn: sqlite3.Connection, df: pd.DataFrame) -> Dict[str, int]:
-    rows = []
-    seen = set()
-    for _, record in df[["country_code", "country_name", "region", "language"]].iterrows():
-        if record["country_code"] in seen:
-            continue
-        seen.add(record["country_code"])
-        rows.append(
-            (
-                record["country_code"],
-                record["country_name"],
-                record["region"],
-                record["language"],
-            )
-        )
-    conn.executemany(
-        "INSERT INTO Country (country_code, country_name, region, language) VALUES (?, ?, ?, ?)",
-        rows,
-    )
+class ProgressReporter:
+    """Periodic row-count / throughput lines for long inserts."""
+
+    def __init__(self, label: str, total: int | None = None, every: float = 5.0) -> None:
+        self.label = label
+        self.total = total
+        self.every = every
+        self.count = 0
+        self.started = time.perf_counter()
+        self._last = self.started
+
+    def advance(self, rows: int) -> None:
+        self.count += rows
+        now = time.perf_counter()
+        if now - self._last >= self.every:
+            self._last = now
+            print(f"[progress] {self._describe(now)}")
+
+    def finish(self) -> None:
+        print(f"[info] {self._describe(time.perf_counter())}")
+
+    def _describe(self, now: float) -> str:
+        elapsed = max(now - self.started, 1e-9)
+        done = f"{self.count:,}"
+        if self.total:
+            done += f"/{self.total:,} ({self.count / self.total:.0%})"
+        return f"{self.label}: {done} rows in {elapsed:.1f}s ({self.count / elapsed:,.0f} rows/s)"
+
+
+def iter_batches(rows: Iterable[T], size: int) -> Iterator[List[T]]:
+    batch: List[T] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def executemany_batched(
+    conn: sqlite3.Connection,
+    sql: str,
+    rows: Iterable[Sequence[object]],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: ProgressReporter | None = None,
+) -> int:
+    """Stream `rows` into `executemany` in fixed-size batches; returns the row count."""
+    inserted = 0
+    for batch in iter_batches(rows, batch_size):
+        conn.executemany(sql, batch)
+        inserted += len(batch)
+        if progress is not None:
+            progress.advance(len(batch))
+    return inserted
+
+
+def frame_rows(df: pd.DataFrame, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Tuple[object, ...]]:
+    """Yield rows as tuples of plain Python scalars, one slice at a time."""
+    for start in range(0, len(df), batch_size):
+        yield from df.iloc[start:start + batch_size].itertuples(index=False, name=None)
+
+
+def _lookup_ids(df: pd.DataFrame, key: List[str], id_map: Dict[Tuple, int], id_name: str) -> pd.Series:
+    """Vectorised (hash-join) lookup of a composite-key dimension id for every row."""
+    keys = pd.DataFrame(list(id_map.keys()), columns=key).astype(df[key].dtypes.to_dict())
+    keys[id_name] = list(id_map.values())
+    merged = df[key].merge(keys, on=key, how="left")
+    return pd.Series(merged[id_name].to_numpy(), index=df.index)
+
+
+def _unseen(rows: pd.DataFrame, key: List[str], known: Dict | None) -> pd.DataFrame:
+    """Drop dimension rows whose key already has an id (streaming mode seeds chunk by chunk)."""
+    if not known:
+        return rows
+    if len(key) == 1:
+        return rows[~rows[key[0]].isin(list(known))]
+    return rows[_lookup_ids(rows, key, known, "_id").isna()]
+
+
+def country_ids(conn: sqlite3.Connection) -> Dict[str, int]:
     cur = conn.cursor()
     cur.execute("SELECT country_id, country_code FROM Country")
     return {code: country_id for country_id, code in cur.fetchall()}
 
 
-def seed_authors(conn: sqlite3.Connection, df: pd.DataFrame) -> Dict[str, int]:
-    rows = []
-    seen = set()
-    for _, record in df[["author_handle", "creator_avg_views", "creator_tier"]].iterrows():
-        key = record["author_handle"]
-        if key in seen or not key:
-            continue
-        seen.add(key)
-        rows.append((key, float(record["creator_avg_views"]), record["creator_tier"]))
-    conn.executemany(
-        "INSERT INTO Author (author_handle, creator_avg_views, creator_tier) VALUES (?, ?, ?)",
-        rows,
-    )
+def author_ids(conn: sqlite3.Connection) -> Dict[str, int]:
     cur = conn.cursor()
     cur.execute("SELECT author_id, author_handle FROM Author")
     return {handle: author_id for author_id, handle in cur.fetchall()}
 
 
-def seed_devices(conn: sqlite3.Connection, df: pd.DataFrame) -> Dict[Tuple[str, str, int, str, int], int]:
-    rows = []
-    seen = set()
-    for _, record in df[["device_type", "device_brand", "upload_hour", "traffic_source", "is_weekend"]].iterrows():
-        key = (record["device_type"], record["device_brand"], int(record["upload_hour"]), record["traffic_source"], int(record["is_weekend"]))
-        if key in seen:
-            continue
-        seen.add(key)
-        rows.append(key)
-    conn.executemany(
-        "INSERT INTO Device (device_type, device_brand, upload_hour, traffic_source, is_weekend) VALUES (?, ?, ?, ?, ?)",
-        rows,
-    )
+def device_ids(conn: sqlite3.Connection) -> Dict[Tuple[str, str, int, str, int], int]:
     cur = conn.cursor()
     cur.execute(
         "SELECT device_id, device_type, device_brand, upload_hour, traffic_source, is_weekend FROM Device"
@@ -357,24 +561,57 @@ def seed_devices(conn: sqlite3.Connection, df: pd.DataFrame) -> Dict[Tuple[str,
     return {(row[1], row[2], row[3], row[4], row[5]): row[0] for row in cur.fetchall()}
 
 
-def seed_trends(conn: sqlite3.Connection, df: pd.DataFrame) -> Dict[Tuple[str, str, int], int]:
-    rows = []
-    seen = set()
-    for _, record in df[["trend_label", "trend_type", "trend_duration_days", "engagement_velocity", "source_hint"]].iterrows():
-        key = (record["trend_label"], record["trend_type"], int(record["trend_duration_days"]))
-        if key in seen:
-            continue
-        seen.add(key)
-        rows.append(key + (float(record["engagement_velocity"]), record["source_hint"]))
-    conn.executemany(
-        "INSERT INTO Trend (trend_label, trend_type, trend_duration_days, engagement_velocity, source_hint) VALUES (?, ?, ?, ?, ?)",
-        rows,
-    )
+def trend_ids(conn: sqlite3.Connection) -> Dict[Tuple[str, str, int], int]:
     cur = conn.cursor()
     cur.execute("SELECT trend_id, trend_label, trend_type, trend_duration_days FROM Trend")
     return {(row[1], row[2], row[3]): row[0] for row in cur.fetchall()}
 
 
+def seed_countries(conn: sqlite3.Connection, df: pd.DataFrame, known: Dict[str, int] | None = None) -> Dict[str, int]:
+    rows = df[["country_code", "country_name", "region", "language"]].drop_duplicates(subset=["country_code"])
+    conn.executemany(
+        "INSERT INTO Country (country_code, country_name, region, language) VALUES (?, ?, ?, ?)",
+        frame_rows(_unseen(rows, ["country_code"], known)),
+    )
+    return country_ids(conn)
+
+
+def seed_authors(conn: sqlite3.Connection, df: pd.DataFrame, known: Dict[str, int] | None = None) -> Dict[str, int]:
+    rows = df[["author_handle", "creator_avg_views", "creator_tier"]].drop_duplicates(subset=["author_handle"])
+    rows = rows[rows["author_handle"] != ""].astype({"creator_avg_views": float})
+    conn.executemany(
+        "INSERT INTO Author (author_handle, creator_avg_views, creator_tier) VALUES (?, ?, ?)",
+        frame_rows(_unseen(rows, ["author_handle"], known)),
+    )
+    return author_ids(conn)
+
+
+def seed_devices(
+    conn: sqlite3.Connection,
+    df: pd.DataFrame,
+    known: Dict[Tuple[str, str, int, str, int], int] | None = None,
+) -> Dict[Tuple[str, str, int, str, int], int]:
+    rows = df[DEVICE_KEY].drop_duplicates()
+    conn.executemany(
+        "INSERT INTO Device (device_type, device_brand, upload_hour, traffic_source, is_weekend) VALUES (?, ?, ?, ?, ?)",
+        frame_rows(_unseen(rows, DEVICE_KEY, known)),
+    )
+    return device_ids(conn)
+
+
+def seed_trends(
+    conn: sqlite3.Connection,
+    df: pd.DataFrame,
+    known: Dict[Tuple[str, str, int], int] | None = None,
+) -> Dict[Tuple[str, str, int], int]:
+    rows = df[TREND_KEY + ["engagement_velocity", "source_hint"]].drop_duplicates(subset=TREND_KEY)
+    conn.executemany(
+        "INSERT INTO Trend (trend_label, trend_type, trend_duration_days, engagement_velocity, source_hint) VALUES (?, ?, ?, ?, ?)",
+        frame_rows(_unseen(rows, TREND_KEY, known).astype({"engagement_velocity": float})),
+    )
+    return trend_ids(conn)
+
+
 def insert_content_and_related(
     conn: sqlite3.Connection,
     df: pd.DataFrame,
@@ -382,97 +619,95 @@ def insert_content_and_related(
     author_map: Dict[str, int],
     device_map: Dict[Tuple[str, str, int, str, int], int],
     trend_map: Dict[Tuple[str, str, int], int],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: ProgressReporter | None = None,
+    replace: bool = False,
 ) -> Tuple[int, int, int]:
-    content_rows: List[Sequence[object]] = []
-    tag_rows: List[Tuple[str, str]] = []
-    comment_rows: List[Tuple[str, str]] = []
-
-    for record in df.itertuples(index=False):
-        country_id = country_map[record.country_code]
-        author_id = author_map[record.author_handle]
-        device_key = (record.device_type, record.device_brand, int(record.upload_hour), record.traffic_source, int(record.is_weekend))
-        device_id = device_map[device_key]
-        trend_key = (record.trend_label, record.trend_type, int(record.trend_duration_days))
-        trend_id = trend_map[trend_key]
-
-        content_rows.append(
-            (
-                record.row_id,
-                record.platform,
-                record.category,
-                record.hashtag,
-                record.title,
-                record.title_keywords,
-                int(record.title_length),
-                int(record.has_emoji),
-                int(record.duration_sec),
-                int(record.views),
-                int(record.likes),
-                int(record.comments),
-                int(record.shares),
-                int(record.saves),
-                int(record.dislikes),
-                float(record.engagement_rate),
-                int(record.engagement_total),
-                float(record.like_rate),
-                float(record.dislike_rate),
-                float(record.engagement_per_1k),
-                float(record.engagement_like_rate),
-                float(record.engagement_comment_rate),
-                float(record.engagement_share_rate),
-                float(record.avg_watch_time_sec),
-                float(record.completion_rate),
-                record.publish_date_approx,
-                record.year_month,
-                record.publish_dayofweek,
-                record.publish_period,
-                record.event_season,
-                record.season,
-                int(record.week_of_year),
-                country_id,
-                author_id,
-                device_id,
-                trend_id,
-            )
-        )
+    content = df[["row_id"] + CONTENT_COLUMNS[1:-4]].rename(columns={"row_id": "content_id"})
+    content["country_id"] = df["country_code"].map(country_map)
+    content["author_id"] = df["author_handle"].map(author_map)
+    content["device_id"] = _lookup_ids(df, DEVICE_KEY, device_map, "device_id")
+    content["trend_id"] = _lookup_ids(df, TREND_KEY, trend_map, "trend_id")
+
+    content_count = executemany_batched(
+        conn,
+        f"INSERT {'OR REPLACE ' if replace else ''}INTO Content ({', '.join(CONTENT_COLUMNS)}) VALUES ({', '.join('?' for _ in CONTENT_COLUMNS)})",
+        frame_rows(content, batch_size),
+        batch_size=batch_size,
+        progress=progress,
+    )
+
+    tags = df[["row_id", "tags_list"]].explode("tags_list").dropna(subset=["tags_list"])
+    tag_count = executemany_batched(
+        conn,
+        "INSERT INTO Content_Tags (content_id, tag) VALUES (?, ?)",
+        frame_rows(tags, batch_size),
+        batch_size=batch_size,
+    )
+
+    comments = df.loc[df["sample_comment_clean"] != "", ["row_id", "sample_comment_clean"]]
+    comment_count = executemany_batched(
+        conn,
+        "INSERT INTO Content_Comments (content_id, sample_comment) VALUES (?, ?)",
+        frame_rows(comments, batch_size),
+        batch_size=batch_size,
+    )
+
+    return content_count, tag_count, comment_count
+
 
-        for tag in record.tags_list:
-            tag_rows.append((record.row_id, tag))
+def frame_fingerprints(df: pd.DataFrame) -> pd.Series:
+    """64-bit hash of every cleaned row, as signed ints so SQLite can store them."""
+    hashable = df.assign(tags_list=df["tags_list"].str.join(","))
+    hashes = pd.util.hash_pandas_object(hashable, index=False).to_numpy().view(np.int64)
+    return pd.Series(hashes, index=df.index)
 
-        if record.sample_comment_clean:
-            comment_rows.append((record.row_id, record.sample_comment_clean))
 
+def stored_fingerprints(conn: sqlite3.Connection, content_ids: Iterable[str]) -> Dict[str, int]:
+    stored: Dict[str, int] = {}
+    for batch in iter_batches(content_ids, 500):
+        placeholders = ", ".join("?" for _ in batch)
+        stored.update(conn.execute(
+            f"SELECT content_id, fingerprint FROM ingest_fingerprints WHERE content_id IN ({placeholders})",
+            batch,
+        ).fetchall())
+    return stored
+
+
+def store_fingerprints(conn: sqlite3.Connection, df: pd.DataFrame, fingerprints: pd.Series) -> None:
     conn.executemany(
-        """
-        INSERT INTO Content (
-            content_id, platform, category, hashtag, title, title_keywords, title_length,
-            has_emoji, duration_sec, views, likes, comments, shares, saves, dislikes,
-            engagement_rate, engagement_total, like_rate, dislike_rate, engagement_per_1k,
-            engagement_like_rate, engagement_comment_rate, engagement_share_rate,
-            avg_watch_time_sec, completion_rate, publish_date_approx, year_month,
-            publish_dayofweek, publish_period, event_season, season, week_of_year,
-            country_id, author_id, device_id, trend_id
-        ) VALUES (
-            ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-        )
-        """,
-        content_rows,
+        "INSERT OR REPLACE INTO ingest_fingerprints (content_id, fingerprint) VALUES (?, ?)",
+        zip(df["row_id"].tolist(), fingerprints.tolist()),
     )
-    if tag_rows:
-        conn.executemany(
-            "INSERT INTO Content_Tags (content_id, tag) VALUES (?, ?)",
-            tag_rows,
-        )
-    if comment_rows:
-        conn.executemany(
-            "INSERT INTO Content_Comments (content_id, sample_comment) VALUES (?, ?)",
-            comment_rows,
-        )
 
-    return len(content_rows), len(tag_rows), len(comment_rows)
 
+def read_ingest_state(conn: sqlite3.Connection) -> Dict[str, str]:
+    return dict(conn.execute("SELECT key, value FROM ingest_state").fetchall())
+
+
+def record_high_water_mark(conn: sqlite3.Connection, mode: str, max_publish_date: str, rows_seen: int, rows_written: int) -> None:
+    state = {
+        "mode": mode,
+        "max_publish_date": max_publish_date,
+        "rows_seen": str(rows_seen),
+        "rows_written": str(rows_written),
+        "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    conn.executemany("INSERT OR REPLACE INTO ingest_state (key, value) VALUES (?, ?)", state.items())
 
-def reseed_database(df: pd.DataFrame) -> None:
+
+def peak_rss_mib() -> float | None:
+    """Peak resident set size of this process so far, in MiB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def reseed_database(frames: Iterable[pd.DataFrame], *, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    """Replace the database contents with `frames` (one cleaned frame, or a stream of chunks)."""
     if not DB_PATH.exists():
         raise FileNotFoundError(f"Database file not found: {DB_PATH}")
 
@@ -481,27 +716,52 @@ def reseed_database(df: pd.DataFrame) -> None:
 
     conn = sqlite3.connect(DB_PATH)
     try:
+        conn.executescript(INGEST_TABLES_DDL)
         conn.execute("PRAGMA foreign_keys = OFF;")
+        # Bulk insert without secondary indexes; they are rebuilt once at the end
+        drop_indexes(conn)
         clear_existing_tables(conn)
         conn.execute("PRAGMA foreign_keys = ON;")
 
-        country_map = seed_countries(conn, df)
-        print(f"[info] Inserted {len(country_map)} countries")
+        country_map: Dict[str, int] = {}
+        author_map: Dict[str, int] = {}
+        device_map: Dict[Tuple[str, str, int, str, int], int] = {}
+        trend_map: Dict[Tuple[str, str, int], int] = {}
+        content_count = tag_count = comment_count = 0
+        max_publish_date = ""
+        progress = ProgressReporter("content")
+        for df in frames:
+            store_fingerprints(conn, df, frame_fingerprints(df))
+            if len(df):
+                max_publish_date = max(max_publish_date, df["publish_date_approx"].max())
+            country_map = seed_countries(conn, df, country_map)
+            author_map = seed_authors(conn, df, author_map)
+            device_map = seed_devices(conn, df, device_map)
+            trend_map = seed_trends(conn, df, trend_map)
+            counts = insert_content_and_related(
+                conn, df, country_map, author_map, device_map, trend_map,
+                batch_size=batch_size, progress=progress,
+            )
+            content_count += counts[0]
+            tag_count += counts[1]
+            comment_count += counts[2]
+        progress.finish()
 
-        author_map = seed_authors(conn, df)
+        print(f"[info] Inserted {len(country_map)} countries")
         print(f"[info] Inserted {len(author_map)} authors")
-
-        device_map = seed_devices(conn, df)
         print(f"[info] Inserted {len(device_map)} device variants")
-
-        trend_map = seed_trends(conn, df)
         print(f"[info] Inserted {len(trend_map)} trend archetypes")
-
-        content_count, tag_count, comment_count = insert_content_and_related(
-            conn, df, country_map, author_map, device_map, trend_map
-        )
         print(f"[info] Inserted {content_count} content rows, {tag_count} tags, {comment_count} sample comments")
 
+        # Invalidates cached API responses and dimension lookups in every running worker
+        bump_data_version(conn)
+        bump_data_version(conn, DIMENSIONS_VERSION)
+        rollup_counts = rebuild_rollups(conn)
+        print(f"[info] Rebuilt rollups: {rollup_counts}")
+        created = ensure_indexes(conn)
+        print(f"[info] Rebuilt {len(created)} indexes")
+        record_high_water_mark(conn, "full", max_publish_date, content_count, content_count)
+
         conn.commit()
         print("[success] Database reseeded successfully.")
     except Exception:
@@ -512,10 +772,171 @@ def reseed_database(df: pd.DataFrame) -> None:
         conn.close()
 
 
-def main() -> None:
-    df = load_and_clean_dataframe(CSV_PATH)
-    print(f"[info] Cleaned dataframe contains {len(df):,} rows.")
-    reseed_database(df)
+def ingest_incremental(frames: Iterable[pd.DataFrame], *, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+    """Upsert only new or changed row_ids in place: no backup, no table wipe, no index rebuild.
+
+    Rows are compared by fingerprint against the previous ingest. Dimension rows are
+    inserted only when missing, and tags/comments are replaced only for touched content.
+    Rows that disappeared from the CSV are left in place.
+    """
+    if not DB_PATH.exists():
+        raise FileNotFoundError(f"Database file not found: {DB_PATH}")
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.executescript(INGEST_TABLES_DDL)
+        conn.execute("PRAGMA foreign_keys = ON;")
+        previous = read_ingest_state(conn)
+        previous_hwm = previous.get("max_publish_date", "")
+        if previous:
+            print(f"[info] Previous ingest: {previous.get('mode')} at {previous.get('finished_at')}, "
+                  f"high-water mark {previous_hwm or 'n/a'}")
+
+        country_map, author_map = country_ids(conn), author_ids(conn)
+        device_map, trend_map = device_ids(conn), trend_ids(conn)
+        dimension_counts = [len(country_map), len(author_map), len(device_map), len(trend_map)]
+        # Patch the rollups row by row while the delta is small, otherwise rebuild them once at the end
+        patch_rollups = rollups_current(conn)
+        rollups_patched = True
+
+        rows_seen = rows_written = tag_count = comment_count = beyond_hwm = 0
+        max_publish_date = previous_hwm
+        progress = ProgressReporter("upsert")
+        for df in frames:
+            rows_seen += len(df)
+            if not len(df):
+                continue
+            max_publish_date = max(max_publish_date, df["publish_date_approx"].max())
+            beyond_hwm += int((df["publish_date_approx"] > previous_hwm).sum())
+
+            fingerprints = frame_fingerprints(df)
+            row_ids = df["row_id"].tolist()
+            stored = stored_fingerprints(conn, row_ids)
+            touched = pd.Series(
+                [stored.get(cid) != fp for cid, fp in zip(row_ids, fingerprints.tolist())], index=df.index
+            )
+            if not touched.any():
+                continue
+            df, fingerprints = df[touched], fingerprints[touched]
+            ids = df["row_id"].tolist()
+
+            patch_rollups = patch_rollups and rows_written + len(ids) <= ROLLUP_DELTA_LIMIT
+            rollups_patched = rollups_patched and patch_rollups
+            if patch_rollups:
+                apply_rollup_delta(conn, ids, -1)
+            conn.executemany("DELETE FROM Content_Tags WHERE content_id = ?", ((cid,) for cid in ids))
+            conn.executemany("DELETE FROM Content_Comments WHERE content_id = ?", ((cid,) for cid in ids))
+
+            country_map = seed_countries(conn, df, country_map)
+            author_map = seed_authors(conn, df, author_map)
+            device_map = seed_devices(conn, df, device_map)
+            trend_map = seed_trends(conn, df, trend_map)
+            counts = insert_content_and_related(
+                conn, df, country_map, author_map, device_map, trend_map,
+                batch_size=batch_size, progress=progress, replace=True,
+            )
+            store_fingerprints(conn, df, fingerprints)
+            if patch_rollups:
+                apply_rollup_delta(conn, ids, 1)
+            rows_written += counts[0]
+            tag_count += counts[1]
+            comment_count += counts[2]
+        progress.finish()
+
+        new_dimensions = [
+            len(country_map) - dimension_counts[0], len(author_map) - dimension_counts[1],
+            len(device_map) - dimension_counts[2], len(trend_map) - dimension_counts[3],
+        ]
+        print(f"[info] Scanned {rows_seen:,} rows ({beyond_hwm:,} past the previous high-water mark); "
+              f"upserted {rows_written:,} new or changed, {tag_count} tags, {comment_count} sample comments")
+        print("[info] New dimension rows: {} countries, {} authors, {} device variants, {} trends".format(*new_dimensions))
+
+        if any(new_dimensions):
+            bump_data_version(conn, DIMENSIONS_VERSION)
+        if rows_written:
+            bump_data_version(conn)
+            if rollups_patched:
+                mark_version_synced(conn, ROLLUPS_VERSION)
+            else:
+                print(f"[info] Rebuilt rollups: {rebuild_rollups(conn)}")
+        created = ensure_indexes(conn)
+        if created:
+            print(f"[info] Created {len(created)} missing indexes")
+        record_high_water_mark(conn, "incremental", max_publish_date, rows_seen, rows_written)
+
+        conn.commit()
+        print("[success] Incremental ingest finished.")
+    except Exception:
+        conn.rollback()
+        print("[error] Incremental ingest failed; rolling back changes.")
+        raise
+    finally:
+        conn.close()
+
+
+def rebuild_rollups_only() -> None:
+    if not DB_PATH.exists():
+        raise FileNotFoundError(f"Database file not found: {DB_PATH}")
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rollup_counts = rebuild_rollups(conn)
+        conn.commit()
+        print(f"[success] Rebuilt rollups: {rollup_counts}")
+    finally:
+        conn.close()
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--rollups-only",
+        action="store_true",
+        help="Rebuild the monthly rollup tables from the existing Content rows and exit.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Rows per executemany batch (default: {DEFAULT_BATCH_SIZE:,}).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Upsert only new or changed row_ids into the existing database (no backup, no wipe).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Clean the CSV in this many worker processes (default: 1, no pool).",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Stream the CSV this many rows at a time instead of loading it whole.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    if args.rollups_only:
+        rebuild_rollups_only()
+        return
+    load = ingest_incremental if args.incremental else reseed_database
+    if args.chunk_size:
+        row_filter = RowIdFilter()
+        load(iter_clean_chunks(CSV_PATH, args.chunk_size, row_filter, args.workers), batch_size=args.batch_size)
+        print(f"[info] Streamed {CSV_PATH.name} in chunks of {args.chunk_size:,} rows; "
+              f"skipped {row_filter.duplicates:,} duplicate row_ids.")
+    else:
+        df = load_and_clean_dataframe(CSV_PATH, args.workers)
+        print(f"[info] Cleaned dataframe contains {len(df):,} rows.")
+        load([df], batch_size=args.batch_size)
+    peak = peak_rss_mib()
+    if peak is not None:
+        print(f"[info] Peak RSS: {peak:,.1f} MiB")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Check that the columnar engine returns the same rows as SQLite for every supported slug.
+
+Each slug in columnar.SUPPORTED_QUERIES is run over a grid of parameters taken
+from the data (every platform plus an unknown one, first / last / missing
+months, several countries, date ranges, tier lists, regions), once through the
+SQL text the engine reproduces and once through columnar.answer. Rows must
+match in count, order, NULLs and Python types; REAL values may differ by float
+summation order only. Slugs whose stored report_queries SQL was edited are
+listed, since the app sends those to SQLite. Exits non-zero on any mismatch.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from columnar import (  # noqa: E402  (needs PROJECT_ROOT on sys.path)
+    COLUMNAR_AVAILABLE,
+    NOT_ANSWERED,
+    SUPPORTED_QUERIES,
+    answer,
+    load_columns,
+    sql_supported,
+)
+
+DB_PATH = PROJECT_ROOT / "Tiktok_youtube.db"
+TIERS = ["Micro", "Mid", "Macro", "Star"]
+# Slugs read with fetchone() by the app
+FETCH_ONE = {"global_summary", "global_top_hashtag", "creator_total_views"}
+REL_TOLERANCE = 1e-9
+
+
+def _distinct(conn: sqlite3.Connection, sql: str) -> List[object]:
+    return [row[0] for row in conn.execute(sql)]
+
+
+def parameter_grid(conn: sqlite3.Connection) -> Iterator[Tuple[str, tuple]]:
+    """(slug, params) pairs covering hits, misses and empty ranges for every supported slug."""
+    platforms = _distinct(conn, "SELECT DISTINCT platform FROM Content") + ["Nope"]
+    months = _distinct(conn, "SELECT DISTINCT year_month FROM Content WHERE year_month IS NOT NULL ORDER BY 1")
+    dates = _distinct(conn, "SELECT DISTINCT publish_date_approx FROM Content "
+                            "WHERE publish_date_approx IS NOT NULL ORDER BY 1")
+    countries = _distinct(conn, "SELECT country_id FROM Country ORDER BY country_id LIMIT 6") + [-1]
+    regions = _distinct(conn, "SELECT DISTINCT region FROM Country") + ["Mars"]
+    if not months or not dates:
+        return
+    month_ranges = [(months[0], months[-1]), (months[1 % len(months)], months[len(months) // 2]),
+                    ("2099-01", "2099-12")]
+    date_ranges = [(dates[0], dates[-1]), (dates[len(dates) // 3], dates[len(dates) // 2]),
+                   ("2099-01-01", "2099-02-01")]
+    for platform in platforms:
+        for month in months[:2] + months[-2:] + ["2099-01"]:
+            for slug in ("global_summary", "global_top_countries", "global_top_hashtag", "global_category_dist"):
+                yield slug, (platform, month)
+        for country_id in countries:
+            for min_views in (0, 1000, 100000):
+                yield "hashtag_main", (platform, country_id, min_views)
+            for start, end in date_ranges:
+                yield "trend_main", (platform, country_id, start, end)
+        for start, end in month_ranges:
+            yield "creator_total_views", (platform, start, end)
+            for tiers in (TIERS, ["Mid"], ["Star", "Micro"]):
+                yield "creator_tier_agg", (platform, *tiers, start, end)
+            for tier in TIERS:
+                yield "creator_single_tier_monthly", (platform, tier, start, end)
+        yield "publish_timing_cube", (platform, None, None, None)
+        for start, end in month_ranges:
+            yield "publish_timing_cube", (platform, start, start, end)
+    for region in regions:
+        yield "region_engagement_main", (region,)
+
+
+def _same_value(expected: object, got: object) -> bool:
+    if type(expected) is not type(got):
+        return False
+    if isinstance(expected, float):
+        return math.isclose(expected, got, rel_tol=REL_TOLERANCE, abs_tol=REL_TOLERANCE)
+    return expected == got
+
+
+def _same_rows(expected: Sequence, got: Sequence) -> bool:
+    if len(expected) != len(got):
+        return False
+    for x, y in zip(expected, got):
+        if x is None or y is None:
+            if x is not y:
+                return False
+        elif len(x) != len(y) or not all(map(_same_value, x, y)):
+            return False
+    return True
+
+
+def bound_sql(slug: str, params: tuple) -> str:
+    sql = SUPPORTED_QUERIES[slug][0]
+    if slug == "creator_tier_agg":
+        sql = sql.format(tier_placeholders=", ".join("?" * (len(params) - 3)))
+    return sql
+
+
+def run_parity(conn: sqlite3.Connection, verbose: int) -> int:
+    started = time.perf_counter()
+    cols = load_columns(conn, None)
+    print(f"[info] Loaded {cols.n} rows ({cols.nbytes / 1e6:.1f} MB) in {time.perf_counter() - started:.2f}s")
+
+    stored = dict(conn.execute("SELECT slug, sql_text FROM report_queries").fetchall())
+    for slug in SUPPORTED_QUERIES:
+        if slug in stored and not sql_supported(slug, stored[slug]):
+            print(f"[warn] {slug}: stored SQL was edited; the app runs it on SQLite")
+
+    cases = mismatches = 0
+    timings: Dict[str, List[float]] = {}
+    for slug, params in parameter_grid(conn):
+        fetch = "one" if slug in FETCH_ONE else "all"
+        t0 = time.perf_counter()
+        cursor = conn.execute(bound_sql(slug, params), params)
+        expected = cursor.fetchone() if fetch == "one" else cursor.fetchall()
+        t1 = time.perf_counter()
+        got = answer(cols, slug, params, fetch)
+        t2 = time.perf_counter()
+        totals = timings.setdefault(slug, [0.0, 0.0])
+        totals[0] += t1 - t0
+        totals[1] += t2 - t1
+        cases += 1
+        if fetch == "one":
+            expected = [expected]
+            if got is not NOT_ANSWERED:
+                got = [got]
+        if got is NOT_ANSWERED or not _same_rows(expected, got):
+            mismatches += 1
+            if mismatches <= verbose:
+                print(f"[FAIL] {slug} {params}\n    sql:      {expected[:5]}\n    columnar: "
+                      f"{got if got is NOT_ANSWERED else got[:5]}")
+
+    print(f"{'slug':<30} {'sql ms':>10} {'columnar ms':>12}")
+    for slug, (sql_time, columnar_time) in timings.items():
+        print(f"{slug:<30} {sql_time * 1000:10.1f} {columnar_time * 1000:12.1f}")
+    print(f"[info] {cases} cases, {mismatches} mismatches")
+    return mismatches
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database to check")
+    parser.add_argument("--verbose", type=int, default=10, help="Mismatches to print in full")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    if not COLUMNAR_AVAILABLE:
+        raise SystemExit("numpy is not installed; the columnar engine is unavailable")
+    if not args.db.exists():
+        raise FileNotFoundError(f"Database file not found: {args.db}")
+    conn = sqlite3.connect(args.db)
+    try:
+        mismatches = run_parity(conn, args.verbose)
+    finally:
+        conn.close()
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
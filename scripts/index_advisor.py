@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Show EXPLAIN QUERY PLAN and timings for every stored report query, before/after the curated indexes."""
+
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from analytics_db import (  # noqa: E402  (needs PROJECT_ROOT on sys.path)
+    CURATED_INDEXES,
+    bind_report_sql,
+    drop_indexes,
+    ensure_indexes,
+    explain_report_queries,
+)
+
+DB_PATH = PROJECT_ROOT / "Tiktok_youtube.db"
+
+
+def sample_values(conn: sqlite3.Connection) -> Dict[str, object]:
+    """Representative parameter values taken from the data itself."""
+    def one(sql: str, default: object = None) -> object:
+        row = conn.execute(sql).fetchone()
+        return row[0] if row and row[0] is not None else default
+
+    return {
+        "platform": one("SELECT platform FROM Content GROUP BY platform ORDER BY COUNT(*) DESC LIMIT 1", "TikTok"),
+        "year_month": one("SELECT MAX(year_month) FROM Content", "2025-01"),
+        "first_month": one("SELECT MIN(year_month) FROM Content", "2025-01"),
+        "first_date": one("SELECT MIN(publish_date_approx) FROM Content", "2025-01-01"),
+        "last_date": one("SELECT MAX(publish_date_approx) FROM Content", "2025-12-31"),
+        "country_id": one("SELECT country_id FROM Content GROUP BY country_id ORDER BY COUNT(*) DESC LIMIT 1", 1),
+        "region": one("SELECT region FROM Country LIMIT 1", "Europe"),
+    }
+
+
+def sample_params(slug: str, v: Dict[str, object]) -> Optional[List[object]]:
+    """Parameters for the known analysis slugs (also their _rollup variants); None = plan only."""
+    base = slug[: -len("_rollup")] if slug.endswith("_rollup") else slug
+    tiers = ["Micro", "Mid", "Macro", "Star"]
+    months = [v["first_month"], v["year_month"]]
+    table = {
+        "global_summary": [v["platform"], v["year_month"]],
+        "global_top_countries": [v["platform"], v["year_month"]],
+        "global_top_hashtag": [v["platform"], v["year_month"]],
+        "global_category_dist": [v["platform"], v["year_month"]],
+        "hashtag_main": [v["platform"], v["country_id"], 0],
+        "trend_main": [v["platform"], v["country_id"], v["first_date"], v["last_date"]],
+        "creator_total_views": [v["platform"]] + months,
+        "creator_tier_agg": [v["platform"]] + tiers + months,
+        "creator_single_tier_monthly": [v["platform"], "Mid"] + months,
+        "region_engagement_main": [v["region"]],
+        "pd_agg_by_country": [v["country_id"]],
+        "pd_details_by_country": [v["country_id"]],
+        "pd_median_counts": [v["country_id"]],
+        "pd_median_engagement_rate": [v["country_id"], v["platform"], 2, 100],
+        "pd_median_engagement_per_1k": [v["country_id"], v["platform"], 2, 100],
+        "pd_median_completion_rate": [v["country_id"], v["platform"], 2, 100],
+        "publish_timing_cube": [v["platform"], months[0]] + months,
+    }
+    return table.get(base)
+
+
+def time_queries(conn: sqlite3.Connection, repeat: int) -> Dict[str, Optional[float]]:
+    values = sample_values(conn)
+    timings: Dict[str, Optional[float]] = {}
+    for slug, sql_text in conn.execute("SELECT slug, sql_text FROM report_queries ORDER BY slug").fetchall():
+        params = sample_params(slug, values)
+        if params is None:
+            timings[slug] = None
+            continue
+        sql = bind_report_sql(sql_text)
+        try:
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(sql, params).fetchall()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[slug] = best
+        except sqlite3.Error as e:
+            print(f"[warn] {slug}: {e}")
+            timings[slug] = None
+    return timings
+
+
+def print_plans(title: str, conn: sqlite3.Connection, timings: Dict[str, Optional[float]]) -> None:
+    print(f"==== {title} ====")
+    for entry in explain_report_queries(conn):
+        slug = entry["slug"]
+        elapsed = timings.get(slug)
+        timing = f"{elapsed * 1000:.2f} ms" if elapsed is not None else "n/a"
+        flag = "SCAN" if entry["scans"] else "ok"
+        print(f"[{flag}] {slug} ({timing})")
+        if entry["error"]:
+            print(f"    error: {entry['error']}")
+        for step in entry["plan"]:
+            print(f"    {step}")
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", type=Path, default=DB_PATH, help="SQLite database to inspect")
+    parser.add_argument("--apply", action="store_true", help="Create the curated indexes and show the plans again")
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="Drop the curated indexes first so the 'before' run shows the unindexed plans",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per query; the fastest is reported")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    if not args.db.exists():
+        raise FileNotFoundError(f"Database file not found: {args.db}")
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.reset:
+            drop_indexes(conn)
+            conn.commit()
+        before = time_queries(conn, args.repeat)
+        print_plans("before", conn, before)
+        if not args.apply:
+            return
+        created = ensure_indexes(conn)
+        conn.commit()
+        print(f"[info] Created {len(created)} of {len(CURATED_INDEXES)} curated indexes: {', '.join(created) or '-'}")
+        after = time_queries(conn, args.repeat)
+        print_plans("after", conn, after)
+        print("==== timing (before -> after) ====")
+        for slug, elapsed in before.items():
+            if elapsed is not None and after.get(slug) is not None:
+                print(f"{slug:<40} {elapsed * 1000:9.2f} ms -> {after[slug] * 1000:9.2f} ms")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
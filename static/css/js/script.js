@@ -2,13 +2,41 @@
 
 // Initialize on page load
 window.onload = function() {
-    loadPlatforms();
-    loadCountries();
-    loadYearMonths();
+    loadInitialLists();
     initTabs();
     addLoadingStates();
 };
 
+// Load platforms, countries and year/months in one /api/batch round-trip;
+// fall back to the individual endpoints if the batch call fails
+function loadInitialLists() {
+    fetch('/api/batch', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            requests: [
+                { endpoint: '/api/platforms' },
+                { endpoint: '/api/countries' },
+                { endpoint: '/api/year-months' }
+            ]
+        })
+    })
+    .then(res => res.json())
+    .then(data => {
+        if (data.error || !Array.isArray(data.results)) throw new Error(data.error || 'Invalid batch response');
+        const [platforms, countries, yearMonths] = data.results;
+        if (platforms.status === 200) renderPlatforms(platforms.body); else loadPlatforms();
+        if (countries.status === 200) renderCountries(countries.body); else loadCountries();
+        if (yearMonths.status === 200) renderYearMonths(yearMonths.body); else loadYearMonths();
+    })
+    .catch(error => {
+        console.error('Batch load failed, loading lists one by one:', error);
+        loadPlatforms();
+        loadCountries();
+        loadYearMonths();
+    });
+}
+
 // Initialize tab switching
 function initTabs() {
     const navBtns = document.querySelectorAll('.nav-btn');
@@ -54,39 +82,41 @@ function addLoadingStates() {
 }
 
 // Load platform list
+function renderPlatforms(data) {
+    const listEl = document.getElementById('platforms-list');
+    if (data.length === 0) {
+        listEl.innerHTML = '<div class="error-message">No platform data available</div>';
+        return;
+    }
+    
+    listEl.innerHTML = data.map((platform, index) => {
+        return `
+            <div style="padding: 20px; background: var(--bg-card); border-radius: 16px; box-shadow: var(--shadow-soft); border: 1px solid rgba(0, 0, 0, 0.04); transition: all 0.3s ease;">
+                <strong style="font-size: 1rem; color: var(--text-primary);">${platform}</strong>
+            </div>
+        `;
+    }).join('');
+    
+    // Populate all platform dropdowns
+    const selectEls = document.querySelectorAll('#global-platform, #hashtag-platform, #trend-platform, #publish-platform, #creator-platform');
+    selectEls.forEach(selectEl => {
+        // Clear existing options (keep first one)
+        while (selectEl.children.length > 1) {
+            selectEl.removeChild(selectEl.lastChild);
+        }
+        data.forEach(platform => {
+            const option = document.createElement('option');
+            option.value = platform;
+            option.textContent = platform;
+            selectEl.appendChild(option);
+        });
+    });
+}
+
 function loadPlatforms() {
     fetch('/api/platforms')
         .then(res => res.json())
-        .then(data => {
-            const listEl = document.getElementById('platforms-list');
-            if (data.length === 0) {
-                listEl.innerHTML = '<div class="error-message">No platform data available</div>';
-                return;
-            }
-            
-            listEl.innerHTML = data.map((platform, index) => {
-                return `
-                    <div style="padding: 20px; background: var(--bg-card); border-radius: 16px; box-shadow: var(--shadow-soft); border: 1px solid rgba(0, 0, 0, 0.04); transition: all 0.3s ease;">
-                        <strong style="font-size: 1rem; color: var(--text-primary);">${platform}</strong>
-                    </div>
-                `;
-            }).join('');
-            
-            // Populate all platform dropdowns
-            const selectEls = document.querySelectorAll('#global-platform, #hashtag-platform, #trend-platform, #publish-platform, #creator-platform');
-            selectEls.forEach(selectEl => {
-                // Clear existing options (keep first one)
-                while (selectEl.children.length > 1) {
-                    selectEl.removeChild(selectEl.lastChild);
-                }
-                data.forEach(platform => {
-                    const option = document.createElement('option');
-                    option.value = platform;
-                    option.textContent = platform;
-                    selectEl.appendChild(option);
-                });
-            });
-        })
+        .then(data => renderPlatforms(data))
         .catch(error => {
             console.error('Failed to load platform list:', error);
             document.getElementById('platforms-list').innerHTML = 
@@ -354,23 +384,25 @@ function runDominanceExtended() {
     });
 }
 // Load countries/regions list
+function renderCountries(data) {
+    const listEl = document.getElementById('countries-list');
+    if (data.length === 0) {
+        listEl.innerHTML = '<div class="error-message">No country/region data available</div>';
+        return;
+    }
+    
+    listEl.innerHTML = data.map(country => 
+        `<div style="padding: 20px; background: var(--bg-card); border-radius: 16px; box-shadow: var(--shadow-soft); border: 1px solid rgba(0, 0, 0, 0.04); transition: all 0.3s ease;">
+            <strong style="font-size: 1rem; color: var(--text-primary);">${country.code}</strong> - ${country.name} 
+            <span style="color: var(--text-secondary); font-size: 0.9rem;">(${country.region}, ${country.language})</span>
+        </div>`
+    ).join('');
+}
+
 function loadCountries() {
     fetch('/api/countries')
         .then(res => res.json())
-        .then(data => {
-            const listEl = document.getElementById('countries-list');
-            if (data.length === 0) {
-                listEl.innerHTML = '<div class="error-message">No country/region data available</div>';
-                return;
-            }
-            
-            listEl.innerHTML = data.map(country => 
-                `<div style="padding: 20px; background: var(--bg-card); border-radius: 16px; box-shadow: var(--shadow-soft); border: 1px solid rgba(0, 0, 0, 0.04); transition: all 0.3s ease;">
-                    <strong style="font-size: 1rem; color: var(--text-primary);">${country.code}</strong> - ${country.name} 
-                    <span style="color: var(--text-secondary); font-size: 0.9rem;">(${country.region}, ${country.language})</span>
-                </div>`
-            ).join('');
-        })
+        .then(data => renderCountries(data))
         .catch(error => {
             console.error('Failed to load country list:', error);
             document.getElementById('countries-list').innerHTML = 
@@ -378,23 +410,25 @@ function loadCountries() {
         });
 }
 
+function renderYearMonths(data) {
+    const listEl = document.getElementById('year-months-list');
+    if (data.length === 0) {
+        listEl.innerHTML = '<div class="error-message">No year/month data available</div>';
+        return;
+    }
+    
+    listEl.innerHTML = data.map(ym => 
+        `<div style="padding: 20px; background: var(--bg-card); border-radius: 16px; box-shadow: var(--shadow-soft); border: 1px solid rgba(0, 0, 0, 0.04); transition: all 0.3s ease;">
+            <strong style="font-size: 1rem; color: var(--text-primary);">${ym.display}</strong>
+            <span style="color: var(--text-secondary); font-size: 0.9rem; margin-left: 10px;">(${ym.year_month})</span>
+        </div>`
+    ).join('');
+}
+
 function loadYearMonths() {
     fetch('/api/year-months')
         .then(res => res.json())
-        .then(data => {
-            const listEl = document.getElementById('year-months-list');
-            if (data.length === 0) {
-                listEl.innerHTML = '<div class="error-message">No year/month data available</div>';
-                return;
-            }
-            
-            listEl.innerHTML = data.map(ym => 
-                `<div style="padding: 20px; background: var(--bg-card); border-radius: 16px; box-shadow: var(--shadow-soft); border: 1px solid rgba(0, 0, 0, 0.04); transition: all 0.3s ease;">
-                    <strong style="font-size: 1rem; color: var(--text-primary);">${ym.display}</strong>
-                    <span style="color: var(--text-secondary); font-size: 0.9rem; margin-left: 10px;">(${ym.year_month})</span>
-                </div>`
-            ).join('');
-        })
+        .then(data => renderYearMonths(data))
         .catch(error => {
             console.error('Failed to load year/month list:', error);
             document.getElementById('year-months-list').innerHTML = 
@@ -0,0 +1,274 @@
+"""scripts/clean_and_reseed.py on a small generated CSV.
+
+The whole-file, chunked and --workers cleaning paths must write identical tables,
+and incremental runs must end where a full reseed of the same CSV does, with the
+rollups they patch equal to a rebuild from Content.
+"""
+
+from __future__ import annotations
+
+import csv
+import random
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+import clean_and_reseed as reseed  # noqa: E402  (needs scripts/ on sys.path)
+from analytics_db import ROLLUP_TABLES, ROLLUPS_VERSION, rebuild_rollups, version_synced  # noqa: E402
+
+# Tables the script writes, minus the bookkeeping in ingest_state (timestamps)
+SCHEMA = """
+CREATE TABLE Country (country_id INTEGER PRIMARY KEY AUTOINCREMENT, country_code TEXT UNIQUE NOT NULL,
+    country_name TEXT, region TEXT, language TEXT);
+CREATE TABLE Author (author_id INTEGER PRIMARY KEY AUTOINCREMENT, author_handle TEXT UNIQUE NOT NULL,
+    creator_avg_views REAL, creator_tier TEXT);
+CREATE TABLE Device (device_id INTEGER PRIMARY KEY AUTOINCREMENT, device_type TEXT, device_brand TEXT,
+    upload_hour INTEGER, traffic_source TEXT, is_weekend INTEGER);
+CREATE TABLE Trend (trend_id INTEGER PRIMARY KEY AUTOINCREMENT, trend_label TEXT, trend_type TEXT,
+    trend_duration_days INTEGER, engagement_velocity REAL, source_hint TEXT);
+CREATE TABLE Content (content_id TEXT PRIMARY KEY, platform TEXT, category TEXT, hashtag TEXT, title TEXT,
+    title_keywords TEXT, title_length INTEGER, has_emoji INTEGER, duration_sec INTEGER, views INTEGER,
+    likes INTEGER, comments INTEGER, shares INTEGER, saves INTEGER, dislikes INTEGER, engagement_rate REAL,
+    engagement_total INTEGER, like_rate REAL, dislike_rate REAL, engagement_per_1k REAL,
+    engagement_like_rate REAL, engagement_comment_rate REAL, engagement_share_rate REAL,
+    avg_watch_time_sec REAL, completion_rate REAL, publish_date_approx TEXT, year_month TEXT,
+    publish_dayofweek TEXT, publish_period TEXT, event_season TEXT, season TEXT, week_of_year INTEGER,
+    country_id INTEGER REFERENCES Country(country_id), author_id INTEGER REFERENCES Author(author_id),
+    device_id INTEGER REFERENCES Device(device_id), trend_id INTEGER REFERENCES Trend(trend_id));
+CREATE TABLE Content_Tags (id INTEGER PRIMARY KEY AUTOINCREMENT, content_id TEXT REFERENCES Content(content_id),
+    tag TEXT);
+CREATE TABLE Content_Comments (id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_id TEXT REFERENCES Content(content_id), sample_comment TEXT);
+"""
+TABLES = ("Country", "Author", "Device", "Trend", "Content", "Content_Tags", "Content_Comments",
+          "ingest_fingerprints")
+
+COUNTRIES = {"US": "north america", "gb": "Europe", "JP": " asia ", "BR": "South America", "ZA": "africa"}
+PLATFORMS = ["TikTok", "tik tok", " youtube shorts", "YouTube", ""]
+
+
+def make_row(rnd: random.Random, i: int) -> Dict[str, object]:
+    """One raw CSV row with the untidy values the cleaner has to handle.
+
+    Attributes that the script stores once per dimension key (country region, author
+    tier, trend velocity) depend only on that key, so the first occurrence wins everywhere.
+    """
+    country = rnd.choice(list(COUNTRIES))
+    author = rnd.randrange(12)
+    trend = rnd.randrange(4)
+    likes, comments, shares = rnd.randrange(5000), rnd.randrange(300), rnd.randrange(200)
+    return {
+        "row_id": f" r{i} ",
+        "platform": rnd.choice(PLATFORMS),
+        "category": rnd.choice(["food", " Gaming ", "", "Music"]),
+        "hashtag": rnd.choice(["#dance", "Dance", "", "#food  "]),
+        "title": rnd.choice(["Hello  world", "", "Clip"]),
+        "title_keywords": "kw",
+        "author_handle": f"@u{author}",
+        "creator_tier": ["mega", "Micro", "mid", "star"][author % 4],
+        "country": country,
+        "region": COUNTRIES[country],
+        "language": "",
+        "publish_dayofweek": rnd.choice(["monday", "Friday", "Sunday"]),
+        "publish_period": rnd.choice(["morning", "Night", ""]),
+        "event_season": "none",
+        "season": "winter",
+        "trend_label": ["Seasonal", "", "meme", "Evergreen"][trend],
+        "trend_type": "meme",
+        "source_hint": "" if trend % 2 else "search",
+        "duration_sec": rnd.choice([30, "", "-5"]),
+        "views": rnd.randrange(100_000),
+        "likes": likes if i % 9 else "",
+        "comments": comments,
+        "shares": shares,
+        "saves": rnd.randrange(100),
+        "dislikes": rnd.randrange(50),
+        # Deliberately not likes + comments + shares
+        "engagement_total": likes + comments + shares + rnd.randrange(1, 99),
+        "week_of_year": rnd.choice([3, 60, ""]),
+        "trend_duration_days": 10 + trend,
+        "upload_hour": rnd.choice([0, 7, 13, 23, 30]),
+        "engagement_rate": round(rnd.random() * 0.3, 4) if i % 7 else "",
+        "like_rate": 0.1,
+        "dislike_rate": 0.01,
+        "engagement_per_1k": round(rnd.random() * 90, 3),
+        "engagement_like_rate": 0.1,
+        "engagement_comment_rate": 0.05,
+        "engagement_share_rate": 0.02,
+        "avg_watch_time_sec": 20.5,
+        "completion_rate": round(rnd.random(), 4),
+        "creator_avg_views": 1000.0 * (author + 1),
+        "engagement_velocity": 0.5 * (trend + 1),
+        "has_emoji": rnd.choice(["true", "no", ""]),
+        "is_weekend": rnd.choice(["yes", "false"]),
+        "publish_date_approx": rnd.choice(["2025-01-15", "2025-02-03", "2025-03-30", "not a date"]),
+        "tags": rnd.choice(["a,,b", "", "c"]),
+        "sample_comments": rnd.choice([" ok ", "", "nice"]),
+        "device_type": rnd.choice(["Android", ""]),
+        "device_brand": "Samsung",
+        "traffic_source": rnd.choice(["Search", "ForYou"]),
+    }
+
+
+def make_rows(count: int, seed: int = 7) -> List[Dict[str, object]]:
+    rnd = random.Random(seed)
+    rows = [make_row(rnd, i) for i in range(count)]
+    # A repeated row_id keeps its first occurrence
+    rows.insert(count // 2, dict(rows[3], views=1))
+    return rows
+
+
+def write_csv(path: Path, rows: List[Dict[str, object]]) -> Path:
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def make_db(path: Path) -> Path:
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.close()
+    return path
+
+
+def run(monkeypatch, db: Path, csv_path: Path, *argv: str) -> None:
+    monkeypatch.setattr(reseed, "DB_PATH", db)
+    monkeypatch.setattr(reseed, "CSV_PATH", csv_path)
+    reseed.main(list(argv))
+
+
+def _rounded(row) -> tuple:
+    return tuple(round(v, 9) if isinstance(v, float) else v for v in row)
+
+
+def dump(db: Path, tables=TABLES) -> Dict[str, list]:
+    conn = sqlite3.connect(db)
+    try:
+        return {t: sorted(map(_rounded, conn.execute(f"SELECT * FROM {t}")), key=repr) for t in tables}
+    finally:
+        conn.close()
+
+
+def resolved(db: Path) -> Dict[str, list]:
+    """Content with every dimension id replaced by its natural key and attributes."""
+    content_cols = [c for c in reseed.CONTENT_COLUMNS if not c.endswith("_id") or c == "content_id"]
+    conn = sqlite3.connect(db)
+    try:
+        content = conn.execute(
+            f"SELECT {', '.join('c.' + col for col in content_cols)}, "
+            "co.country_code, co.country_name, co.region, co.language, "
+            "a.author_handle, a.creator_avg_views, a.creator_tier, "
+            "d.device_type, d.device_brand, d.upload_hour, d.traffic_source, d.is_weekend, "
+            "t.trend_label, t.trend_type, t.trend_duration_days, t.engagement_velocity, t.source_hint "
+            "FROM Content c LEFT JOIN Country co ON c.country_id = co.country_id "
+            "LEFT JOIN Author a ON c.author_id = a.author_id LEFT JOIN Device d ON c.device_id = d.device_id "
+            "LEFT JOIN Trend t ON c.trend_id = t.trend_id"
+        ).fetchall()
+        return {
+            "Content": sorted(content, key=repr),
+            "Content_Tags": sorted(conn.execute("SELECT content_id, tag FROM Content_Tags").fetchall()),
+            "Content_Comments": sorted(conn.execute(
+                "SELECT content_id, sample_comment FROM Content_Comments").fetchall()),
+            "ingest_fingerprints": sorted(conn.execute("SELECT * FROM ingest_fingerprints").fetchall()),
+        }
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def sample_csv(tmp_path: Path) -> Path:
+    return write_csv(tmp_path / "sample.csv", make_rows(60))
+
+
+def test_map_distinct_matches_astype_str():
+    values = pd.Series(["a ", None, "b", "a "], dtype="category")
+    assert reseed.map_distinct(values, str.strip).tolist() == values.astype(str).str.strip().tolist()
+    plain = pd.Series([" x", float("nan"), " x"])
+    assert reseed.map_distinct(plain, str.upper).tolist() == [" X", "NAN", " X"]
+
+
+def test_row_id_filter_keeps_first_occurrence_across_chunks():
+    row_filter = reseed.RowIdFilter()
+    assert row_filter.first_seen(pd.Series(["a", "b", "a"])).tolist() == [True, True, False]
+    assert row_filter.first_seen(pd.Series(["b", "c"])).tolist() == [False, True]
+    assert row_filter.duplicates == 2
+
+
+def test_frame_fingerprints_change_with_the_row(sample_csv: Path):
+    df = reseed.load_and_clean_dataframe(sample_csv)
+    before = reseed.frame_fingerprints(df)
+    assert before.equals(reseed.frame_fingerprints(df.copy()))
+    df.loc[df.index[0], "views"] += 1
+    df.at[df.index[1], "tags_list"] = df.at[df.index[1], "tags_list"] + ["extra"]
+    after = reseed.frame_fingerprints(df)
+    assert (before != after).tolist()[:3] == [True, True, False]
+
+
+def test_lookup_ids_resolves_composite_keys():
+    df = pd.DataFrame({"kind": ["x", "y", "x", "z"], "n": [1, 2, 1, 1]})
+    ids = reseed._lookup_ids(df, ["kind", "n"], {("x", 1): 10, ("y", 2): 20}, "kid")
+    assert ids.tolist()[:3] == [10, 20, 10]
+    assert pd.isna(ids.iloc[3])
+
+
+def test_chunked_and_pooled_cleaning_write_identical_tables(tmp_path: Path, sample_csv: Path, monkeypatch):
+    runs = {
+        "whole": (),
+        "chunked": ("--chunk-size", "7"),
+        "workers": ("--workers", "2"),
+        "chunked_workers": ("--chunk-size", "7", "--workers", "2"),
+    }
+    dumps = {}
+    for name, argv in runs.items():
+        db = make_db(tmp_path / f"{name}.db")
+        run(monkeypatch, db, sample_csv, "--batch-size", "5", *argv)
+        dumps[name] = dump(db, TABLES + tuple(ROLLUP_TABLES))
+    assert dumps["whole"]["Content"], "the sample should load some rows"
+    for name in runs:
+        assert dumps[name] == dumps["whole"], name
+
+
+@pytest.mark.parametrize("argv", [(), ("--chunk-size", "9")])
+def test_incremental_runs_match_a_full_reseed(tmp_path: Path, monkeypatch, argv):
+    rows = make_rows(80)
+    first = write_csv(tmp_path / "first.csv", rows[:45])
+    # Later file: a few existing rows changed, new rows (and dimension values) appended
+    changed = [dict(row) for row in rows]
+    for row in changed[5:45:6]:
+        row["views"] = int(row["views"]) + 17
+        row["hashtag"] = "#changed"
+        row["tags"] = "z"
+    final = write_csv(tmp_path / "final.csv", changed)
+
+    full = make_db(tmp_path / "full.db")
+    run(monkeypatch, full, final, *argv)
+
+    incremental = make_db(tmp_path / "incremental.db")
+    run(monkeypatch, incremental, first, *argv)
+    run(monkeypatch, incremental, final, "--incremental", *argv)
+    assert resolved(incremental) == resolved(full)
+
+    # A second pass over the same file finds nothing to write
+    patched = dump(incremental, tuple(ROLLUP_TABLES))
+    run(monkeypatch, incremental, final, "--incremental", *argv)
+    assert dump(incremental, tuple(ROLLUP_TABLES)) == patched
+
+    # The rollups were patched with apply_rollup_delta, not rebuilt: they must equal a rebuild
+    conn = sqlite3.connect(incremental)
+    try:
+        assert version_synced(conn, ROLLUPS_VERSION)
+        rebuild_rollups(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    assert dump(incremental, tuple(ROLLUP_TABLES)) == patched
@@ -0,0 +1,133 @@
+"""Bucket statistics shared by the publish-timing modes.
+
+Each mode reduces its rows to one engagement rate per bucket (hour, day part,
+weekday, heatmap cell). `bucket_stats` turns those into the average, the diff
+percentages and the peak / valley / ranking, and `slot_stats` folds hourly
+buckets into time slots through a 24-entry hour -> slot table. Both make a
+fixed number of linear passes, so the cost grows with the bucket count only.
+Standard library only.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+HOURS_PER_DAY = 24
+MAX_TIME_SLOTS = HOURS_PER_DAY
+
+
+@dataclass(frozen=True)
+class TimeSlot:
+    """Named range of upload hours, both ends inclusive; `label` (default: the name) is shown in reports."""
+    name: str
+    start: int
+    end: int
+    label: str = ''
+
+    def __post_init__(self) -> None:
+        if not self.label:
+            object.__setattr__(self, 'label', self.name)
+
+
+DEFAULT_TIME_SLOTS: Tuple[TimeSlot, ...] = (
+    TimeSlot('Late Night (0-4)', 0, 4, 'Late Night'),
+    TimeSlot('Early Morning (5-8)', 5, 8, 'Early Morning'),
+    TimeSlot('Morning (9-11)', 9, 11, 'Morning'),
+    TimeSlot('Afternoon (12-16)', 12, 16, 'Afternoon'),
+    TimeSlot('Evening (17-20)', 17, 20, 'Evening'),
+    TimeSlot('Night (21-23)', 21, 23, 'Night'),
+)
+
+
+def parse_time_slots(spec) -> Tuple[TimeSlot, ...]:
+    """Validate a `time_slots` request value: [{"name", "start", "end"}, ...] with hours 0-23.
+
+    Slots may leave hours uncovered but must not overlap; they are returned in hour order.
+    Raises ValueError with a message fit for the API response.
+    """
+    if spec is None:
+        return DEFAULT_TIME_SLOTS
+    if not isinstance(spec, list) or not spec:
+        raise ValueError("time_slots must be a non-empty list of {name, start, end} objects")
+    if len(spec) > MAX_TIME_SLOTS:
+        raise ValueError(f"time_slots allows at most {MAX_TIME_SLOTS} slots")
+    slots = []
+    for item in spec:
+        if not isinstance(item, dict):
+            raise ValueError("time_slots must be a non-empty list of {name, start, end} objects")
+        name, start, end = item.get('name'), item.get('start'), item.get('end')
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("Each time slot needs a non-empty name")
+        if any(not isinstance(h, int) or isinstance(h, bool) or not 0 <= h < HOURS_PER_DAY for h in (start, end)):
+            raise ValueError(f"Time slot '{name}': start and end must be hours from 0 to 23")
+        if start > end:
+            raise ValueError(f"Time slot '{name}': start must not be after end")
+        slots.append(TimeSlot(name.strip(), start, end))
+    slots.sort(key=lambda slot: slot.start)
+    for previous, slot in zip(slots, slots[1:]):
+        if slot.start <= previous.end:
+            raise ValueError(f"Time slots '{previous.name}' and '{slot.name}' overlap")
+    return tuple(slots)
+
+
+@dataclass
+class BucketStats:
+    average: float
+    diff_pct: List[float]
+    peak: int  # index of the first highest diff
+    valley: int  # index of the first lowest diff
+    ranking: List[int]  # indices by diff, highest first (ties keep bucket order)
+
+
+def bucket_stats(rates: Sequence[float]) -> Optional[BucketStats]:
+    """Average (2 dp), diff % against it (1 dp), peak, valley and ranking; None for no buckets."""
+    if not rates:
+        return None
+    average = round(sum(rates) / len(rates), 2)
+    if average > 0:
+        # + 0.0 turns a rounded -0.0 into 0.0
+        diff_pct = [round((rate - average) / average * 100, 1) + 0.0 for rate in rates]
+    else:
+        diff_pct = [0] * len(rates)
+    peak = valley = 0
+    for i, diff in enumerate(diff_pct):
+        if diff > diff_pct[peak]:
+            peak = i
+        if diff < diff_pct[valley]:
+            valley = i
+    ranking = sorted(range(len(diff_pct)), key=diff_pct.__getitem__, reverse=True)
+    return BucketStats(average, diff_pct, peak, valley, ranking)
+
+
+@dataclass
+class SlotStats:
+    slot: TimeSlot
+    diff: float  # mean diff % of the slot's hours (1 dp)
+    eng: float  # mean engagement rate of the slot's hours (2 dp)
+    count: int  # content published in the slot
+
+
+def slot_stats(hours: Sequence[int], rates: Sequence[float], diff_pct: Sequence[float],
+               counts: Sequence[int], slots: Sequence[TimeSlot] = DEFAULT_TIME_SLOTS) -> List[SlotStats]:
+    """Fold per-hour buckets into `slots`; slots without data get zeros."""
+    slot_of_hour: List[Optional[int]] = [None] * HOURS_PER_DAY
+    for index, slot in enumerate(slots):
+        for hour in range(slot.start, slot.end + 1):
+            slot_of_hour[hour] = index
+    # per slot: [hours seen, diff total, rate total, count total]
+    totals = [[0, 0, 0, 0] for _ in slots]
+    for hour, rate, diff, count in zip(hours, rates, diff_pct, counts):
+        index = slot_of_hour[hour] if 0 <= hour < HOURS_PER_DAY else None
+        if index is None:
+            continue
+        total = totals[index]
+        total[0] += 1
+        total[1] += diff
+        total[2] += rate
+        total[3] += count
+    return [
+        SlotStats(slot, round(diff_total / seen, 1) + 0.0, round(rate_total / seen, 2), count_total)
+        if seen else SlotStats(slot, 0, 0, 0)
+        for slot, (seen, diff_total, rate_total, count_total) in zip(slots, totals)
+    ]